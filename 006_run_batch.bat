@@ -0,0 +1,2 @@
+@echo off
+python -m Agents.Batch_Runner %*
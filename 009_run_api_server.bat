@@ -0,0 +1,2 @@
+@echo off
+python src\api_server.py %*
@@ -0,0 +1,2 @@
+@echo off
+python -m Agents.PRD_Archive %*
@@ -0,0 +1,81 @@
+# Agents/Artifact_Agent.py
+
+import asyncio
+import os
+from Agents.Base_Agent import BaseAgent
+from Agents.Document_Store import VersionedDocumentStore
+from Agents.Prompt_Builder import condense_document
+
+
+class PRDArtifactAgent(BaseAgent):
+    """
+    Base class for agents that derive a planning document from a finished PRD, such as a
+    work breakdown structure, a risk register or a test plan. Subclasses set the class
+    attributes below; documents are saved next to the PRDs as '{DOCUMENT_TYPE}_v{n}.md'.
+    """
+
+    DOCUMENT_TYPE = None  # file name prefix, e.g. "WBS"
+    DOCUMENT_TITLE = None  # e.g. "Work Breakdown Structure"
+    TASK = None  # kind of call for the model router, e.g. "wbs"
+    INSTRUCTIONS = None  # static system message
+
+    def __init__(self, model: str = "gpt-4o", temperature: float = 0.5, max_tokens: int = 2000,
+                 output_folder: str = None, **kwargs):
+        """
+        Extra keyword arguments (e.g. cache, router, backend) are forwarded to BaseAgent.
+
+        Args:
+            output_folder (str, optional): Where documents are saved. Defaults to the project's 'output' folder.
+        """
+        super().__init__(model=model, temperature=temperature, max_tokens=max_tokens, **kwargs)
+        self.agent_name = f"{self.DOCUMENT_TITLE} Agent"
+        self.project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+        self.output_folder = output_folder or os.path.join(self.project_root, "output")
+        self.document_store = VersionedDocumentStore(self.output_folder)
+
+    def _build_prompt(self, prd_document: str, context: dict = None) -> tuple[str, str]:
+        """
+        Builds the (system, user) messages: the PRD, then any further context documents
+        (title -> text), which are condensed first when the prompt is over budget.
+        """
+        prompt = self._prompt_builder(self.INSTRUCTIONS)
+        prompt.add("Product Requirements Document", prd_document, priority=2, compressor=condense_document,
+                   min_tokens=512)
+        for title, text in (context or {}).items():
+            prompt.add(title, text, priority=1, compressor=condense_document)
+        prompt.add(None, f"Generate the {self.DOCUMENT_TITLE}.", compressor=None)
+        return prompt.build()
+
+    def store(self, content: str) -> str:
+        """Saves a document under the next free version number and returns its path."""
+        version = self.document_store.allocate_version(self.DOCUMENT_TYPE)
+        filepath = self.document_store.document_path(self.DOCUMENT_TYPE, version)
+        try:
+            return self.document_store.write(content, self.DOCUMENT_TYPE, version)
+        except OSError as e:
+            raise IOError(f"Failed to save document to {filepath}: {e}")
+
+    def generate(self, prd_document: str, context: dict = None) -> tuple[str, str]:
+        """
+        Derives the document from a PRD and saves it.
+
+        Args:
+            prd_document (str): The final PRD.
+            context (dict, optional): Further documents to take into account, by title.
+
+        Returns:
+            tuple[str, str]: The document content and the path of the saved file.
+        """
+        try:
+            content = self._call_llm(*self._build_prompt(prd_document, context), task=self.TASK)
+            return content, self.store(content)
+        except Exception as e:
+            raise Exception(f"Error from {self.agent_name}: {e}")
+
+    async def agenerate(self, prd_document: str, context: dict = None) -> tuple[str, str]:
+        """Async version of generate; the file write runs in a worker thread."""
+        try:
+            content = await self._acall_llm(*self._build_prompt(prd_document, context), task=self.TASK)
+            return content, await asyncio.to_thread(self.store, content)
+        except Exception as e:
+            raise Exception(f"Error from {self.agent_name}: {e}")
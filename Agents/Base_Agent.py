@@ -1,65 +1,442 @@
 # base_agent.py (or could be part of your main script for now)
+import asyncio
 import os
-from dotenv import load_dotenv
+import time
 
 from abc import ABC, abstractmethod
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from openai import OpenAIError # Specific error class for OpenAI API issues
+from Agents.Client_Registry import get_async_openai_client, get_openai_client, load_environment
+from Agents.Inflight_Registry import InflightRegistry, get_default_inflight_registry
+from Agents.Instrumentation import Instrumentation, LLMCallRecord, get_instrumentation
+from Agents.LLM_Backends import LLMBackend, get_backend, get_default_backend
+from Agents.LLM_Cache import LLMCache, get_default_cache, make_cache_key
+from Agents.Model_Router import ModelRouter, get_default_router
+from Agents.Prompt_Builder import PromptBuilder, get_prompt_token_budget
+from Agents.Rate_Limiter import RateLimiter, estimate_request_tokens
+from Agents.Resilience import CallAttempts, ResilientCaller, get_default_resilience
 
 class BaseAgent(ABC):
     """
     Abstract Base Class for all agents in the PrecisionAI system.
     Handles common functionalities like OpenAI API interaction.
     """
-    def __init__(self, model: str = "gpt-4o", temperature: float = 0.7, max_tokens: int = 2000):
+    def __init__(self, model: str = "gpt-4o", temperature: float = 0.7, max_tokens: int = 2000,
+                 cache: LLMCache = None, use_cache: bool = True, rate_limiter: RateLimiter = None,
+                 client: OpenAI = None, async_client: AsyncOpenAI = None, instrumentation: Instrumentation = None,
+                 resilience: ResilientCaller = None, prompt_token_budget: int = None, router: ModelRouter = None,
+                 backend: LLMBackend = None, inflight: InflightRegistry = None):
         """
         Initializes the BaseAgent with OpenAI API client and default parameters.
         Args:
             model (str): The OpenAI model to use (e.g., "gpt-4o", "gpt-4-turbo").
             temperature (float): Controls creativity. Higher values (up to 1.0) mean more random output.
             max_tokens (int): The maximum number of tokens to generate in the completion.
+            cache (LLMCache, optional): Response cache to use. Defaults to the process-wide cache.
+            use_cache (bool): Set to False to always call the API, bypassing any cache.
+            rate_limiter (RateLimiter, optional): Shared RPM/TPM budget; calls wait for capacity before being sent.
+            client (OpenAI, optional): Client to use instead of the shared, pooled one.
+            async_client (AsyncOpenAI, optional): Async client to use instead of the shared one.
+            instrumentation (Instrumentation, optional): Where per-call metrics are recorded.
+                                                         Defaults to the process-wide instrumentation.
+            resilience (ResilientCaller, optional): Retry, deadline, circuit breaker and hedging settings.
+                                                    Defaults to the process-wide ResilientCaller.
+            prompt_token_budget (int, optional): Input tokens a prompt may use before its variable content
+                                                 is condensed. Defaults to PRECISIONAI_PROMPT_TOKEN_BUDGET.
+            router (ModelRouter, optional): Picks the model of each call from rules, cascade tier and observed
+                                            latency and cost. Defaults to the process-wide router, if routing
+                                            is enabled; otherwise every call uses model.
+            backend (LLMBackend, optional): Serves every call of this agent, e.g. a local llama.cpp, vLLM or
+                                            Ollama server (see Agents/LLM_Backends.py). By default a call goes to
+                                            the backend registered for its model, if any, else to the OpenAI API.
+            inflight (InflightRegistry, optional): Where uncached requests are claimed while in flight, so
+                                                   identical requests of other threads and processes wait for
+                                                   the result instead of calling the API too. Defaults to the
+                                                   process-wide registry; only used with a cache.
         """
-        load_dotenv()
+        load_environment()
         # Ensure API key is set via environment variable for security
         api_key = os.environ.get("OPENAI_API_KEY")
-        if not api_key:
+        # Without a key, agents can still run on a local backend
+        if not api_key and client is None and backend is None and get_default_backend() is None:
             raise ValueError("OPENAI_API_KEY environment variable not set.")
-        self.client = OpenAI(api_key=api_key)
+        # Agents share one pooled client per API key instead of opening their own connections
+        self.client = client or (get_openai_client(api_key) if api_key else None)
+        self.backend = backend
+        self._api_key = api_key
+        self._async_client = async_client
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        # Identical requests (same model, parameters and messages) are served from the cache
+        self.cache = (cache or get_default_cache()) if use_cache else None
+        # ... and identical requests still in flight elsewhere are waited for (see Agents/Inflight_Registry.py)
+        self.inflight = None
+        if self.cache is not None:
+            self.inflight = inflight if inflight is not None else get_default_inflight_registry()
+        self.rate_limiter = rate_limiter
+        self.instrumentation = instrumentation or get_instrumentation()
+        # Transient API errors are retried with backoff instead of aborting the workflow
+        self.resilience = resilience or get_default_resilience()
+        self.prompt_token_budget = prompt_token_budget or get_prompt_token_budget()
+        self.router = router if router is not None else get_default_router()
 
-    def _call_llm(self, system_message: str, user_message: str = None) -> str:
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """
+        The AsyncOpenAI client used by the async API: the one passed to the constructor,
+        or else the pooled client shared by all agents on the running event loop.
+        """
+        if self._async_client is not None:
+            return self._async_client
+        return get_async_openai_client(self._api_key)
+
+    def _backend_for(self, model: str):
+        """The backend serving a model: the agent's own, else the one registered for the model, else None (OpenAI)."""
+        return self.backend or get_backend(model)
+
+    def _client_for(self, model: str, asynchronous: bool = False):
+        """The (async) client whose chat.completions.create serves a model."""
+        backend = self._backend_for(model)
+        if backend is not None:
+            return backend.async_client() if asynchronous else backend.client()
+        if self.client is None:
+            raise ValueError(f"OPENAI_API_KEY environment variable not set, and no local backend serves '{model}'.")
+        return self.async_client if asynchronous else self.client
+
+    def _fan_out(self, requested: int) -> int:
+        """Caps how many requests one operation sends together by the backend's max_batch_size."""
+        backend = self._backend_for(self.model)
+        if backend is None or not backend.max_batch_size:
+            return requested
+        return max(1, min(requested, backend.max_batch_size))
+
+    def _prompt_builder(self, instructions: str) -> PromptBuilder:
+        """
+        Starts a prompt whose static instructions become the system message; variable content
+        added to the builder becomes the user message, fitted to this agent's token budget.
+        """
+        return PromptBuilder(instructions, model=self.model, budget_tokens=self.prompt_token_budget)
+
+    def _build_messages(self, system_message: str, user_message: str = None) -> list:
+        """Builds the chat message list sent to the Chat Completions API."""
+        messages = [{"role": "system", "content": system_message}]
+        if user_message:
+            messages.append({"role": "user", "content": user_message})
+        return messages
+
+    def _select_model(self, task: str, messages: list) -> str:
+        """The model for one call: the router's choice (see Agents/Model_Router.py), or the agent's own model."""
+        if self.router is None:
+            return self.model
+        return self.router.select(self.__class__.__name__, task, self.model, estimate_request_tokens(messages, 0),
+                                  resilience=self.resilience)
+
+    def _cache_lookup(self, model: str, messages: list, max_tokens: int, **request_options) -> tuple:
+        """
+        Checks the response cache for a request. Extra request options that change the
+        response (e.g. response_format) are part of the key.
+
+        Returns:
+            tuple: (cache_key, cached_content). cache_key is None if caching is disabled;
+                   cached_content is None on a miss.
+        """
+        if self.cache is None:
+            return None, None
+        cache_key = make_cache_key(model, self.temperature, max_tokens, messages, **request_options)
+        return cache_key, self.cache.get(cache_key)
+
+    def _claim_request(self, cache_key) -> tuple:
+        """
+        After a cache miss, claims the request in the in-flight registry. If another thread or
+        process (e.g. another app replica) is already sending the identical request, waits for
+        it instead, up to the call deadline, and returns its result from the shared cache.
+
+        Returns:
+            tuple: (claim, shared_content). Pass claim to _release_request once the call is done;
+                   shared_content is the other caller's result, or None if this call must be made.
+        """
+        if cache_key is None or self.inflight is None:
+            return None, None
+        return self.inflight.claim_or_wait(cache_key, lambda: self.cache.peek(cache_key),
+                                           timeout=self.resilience.deadline_s)
+
+    async def _aclaim_request(self, cache_key) -> tuple:
+        """Async version of _claim_request."""
+        if cache_key is None or self.inflight is None:
+            return None, None
+        return await self.inflight.aclaim_or_wait(cache_key, lambda: self.cache.peek(cache_key),
+                                                  timeout=self.resilience.deadline_s)
+
+    def _release_request(self, cache_key, claim):
+        """Releases a claim made by _claim_request, after the response was cached (or the call failed)."""
+        if claim is not None:
+            self.inflight.release(cache_key, claim)
+
+    def _record_usage(self, estimated_tokens: int, chat_completion):
+        """Reports the actual token usage of a completion back to the rate limiter."""
+        usage = getattr(chat_completion, "usage", None)
+        if self.rate_limiter is not None and usage is not None:
+            self.rate_limiter.record_usage(estimated_tokens, usage.total_tokens)
+
+    def _record_call(self, started: float, model: str, cache_key, cache_hit: bool = False, usage=None,
+                     ttft_s: float = None, stream: bool = False, error: Exception = None,
+                     attempts: CallAttempts = None, task: str = None):
+        """Emits an LLMCallRecord for one call to the agent's instrumentation sinks and router."""
+        if self.instrumentation is None and self.router is None:
+            return
+        if cache_key is None:
+            cache_status = "disabled"
+        else:
+            cache_status = "hit" if cache_hit else "miss"
+        record = LLMCallRecord(
+            agent=self.__class__.__name__,
+            model=model,
+            wall_time_s=time.perf_counter() - started,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0),
+            completion_tokens=getattr(usage, "completion_tokens", 0),
+            ttft_s=ttft_s,
+            cache_status=cache_status,
+            retries=attempts.retries if attempts else 0,
+            hedged=attempts.hedged if attempts else False,
+            stream=stream,
+            error=f"{error.__class__.__name__}: {error}" if error is not None else None,
+            batch=getattr(self._backend_for(model), "deferred", False),
+        )
+        if self.instrumentation is not None:
+            self.instrumentation.record(record)
+        if self.router is not None:
+            self.router.observe(record, task)
+
+    def _request_options(self, model: str, messages: list, max_tokens: int, timeout: float, **extra) -> dict:
+        """Keyword arguments for chat.completions.create; timeout is the call's remaining deadline."""
+        options = dict(model=model, messages=messages, temperature=self.temperature, max_tokens=max_tokens, **extra)
+        if timeout is not None:
+            options["timeout"] = timeout
+        return options
+
+    def _create_completion(self, model: str, messages: list, max_tokens: int, attempts: CallAttempts,
+                           estimated_tokens: int = 0, **extra):
+        """
+        Sends a request through the resilience layer (retries, deadline, circuit breaker, hedging).
+        Every request actually sent, retries and hedged duplicates included, first waits for
+        its estimated tokens in the rate limiter's budget; an attempt that fails hands its
+        reservation back, so only the successful one is settled by _record_usage.
+        """
+        def attempt(timeout):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(estimated_tokens)
+            try:
+                return self._client_for(model).chat.completions.create(
+                    **self._request_options(model, messages, max_tokens, timeout, **extra))
+            except BaseException:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.refund(estimated_tokens)
+                raise
+
+        return self.resilience.call(attempt, key=model, latency_key=f"{model}:{max_tokens}",
+                                    hedge=not extra.get("stream"), attempts=attempts)
+
+    async def _acreate_completion(self, model: str, messages: list, max_tokens: int, attempts: CallAttempts,
+                                  estimated_tokens: int = 0, **extra):
+        """Async counterpart of _create_completion."""
+        async def attempt(timeout):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.aacquire(estimated_tokens)
+            try:
+                return await self._client_for(model, asynchronous=True).chat.completions.create(
+                    **self._request_options(model, messages, max_tokens, timeout, **extra))
+            except BaseException:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.refund(estimated_tokens)
+                raise
+
+        return await self.resilience.acall(attempt, key=model, latency_key=f"{model}:{max_tokens}",
+                                           hedge=not extra.get("stream"), attempts=attempts)
+
+    def _call_llm(self, system_message: str, user_message: str = None, stream: bool = False, max_tokens: int = None,
+                  response_format: dict = None, task: str = None):
         """
         Internal method to make a call to the OpenAI Chat Completions API.
         Args:
             system_message (str): The system role message to guide the LLM.
             user_message (str, optional): The user role message. Defaults to None.
+            stream (bool): If True, return a generator of content chunks instead of the full text.
+            max_tokens (int, optional): Overrides the agent's max_tokens for this call.
+            response_format (dict, optional): e.g. {"type": "json_object"} for JSON mode. Not used when streaming.
+            task (str, optional): Kind of call (e.g. 'prd', 'review'), used by the model router's rules.
         Returns:
-            str: The content generated by the LLM.
+            str | Iterator[str]: The content generated by the LLM, or a generator of its chunks
+                                 when stream is True (see _stream_llm).
         Raises:
             OpenAIError: If there's an issue with the OpenAI API call.
+            CircuitOpenError / DeadlineExceededError: If the call could not be completed in time (see Agents/Resilience.py).
             Exception: For other unexpected errors.
         """
-        messages = [{"role": "system", "content": system_message}]
-        if user_message:
-            messages.append({"role": "user", "content": user_message})
+        if stream:
+            return self._stream_llm(system_message, user_message, max_tokens=max_tokens, task=task)
+
+        started = time.perf_counter()
+        max_tokens = max_tokens or self.max_tokens
+        messages = self._build_messages(system_message, user_message)
+        model = self._select_model(task, messages)
+        request_options = {"response_format": response_format} if response_format else {}
+        cache_key, cached_content = self._cache_lookup(model, messages, max_tokens, **request_options)
+        claim = None
+        if cached_content is None:
+            claim, cached_content = self._claim_request(cache_key)
+        if cached_content is not None:
+            self._record_call(started, model, cache_key, cache_hit=True, task=task)
+            return cached_content
 
+        estimated_tokens = estimate_request_tokens(messages, max_tokens)
+        attempts = CallAttempts()
         try:
-            chat_completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )
-            return chat_completion.choices[0].message.content
+            chat_completion = self._create_completion(model, messages, max_tokens, attempts, estimated_tokens,
+                                                      **request_options)
+            self._record_usage(estimated_tokens, chat_completion)
+            self._record_call(started, model, cache_key, usage=getattr(chat_completion, "usage", None),
+                              attempts=attempts, task=task)
+            content = chat_completion.choices[0].message.content
+            if cache_key is not None and content:
+                self.cache.set(cache_key, content)
+            return content
         except OpenAIError as e:
+            self._record_call(started, model, cache_key, error=e, attempts=attempts, task=task)
             print(f"OpenAI API Error in {self.__class__.__name__}: {e}")
             raise # Re-raise the exception to be handled upstream
         except Exception as e:
+            self._record_call(started, model, cache_key, error=e, attempts=attempts, task=task)
             print(f"An unexpected error occurred in {self.__class__.__name__}: {e}")
             raise # Re-raise the exception
+        finally:
+            self._release_request(cache_key, claim)
 
+    def _stream_llm(self, system_message: str, user_message: str = None, max_tokens: int = None, task: str = None):
+        """
+        Streams a chat completion, yielding content chunks as they arrive.
+        A cache hit is yielded as a single chunk. The assembled text is cached once
+        the stream completes and is also the generator's return value.
+        Args:
+            system_message (str): The system role message to guide the LLM.
+            user_message (str, optional): The user role message. Defaults to None.
+            max_tokens (int, optional): Overrides the agent's max_tokens for this call.
+            task (str, optional): Kind of call, used by the model router's rules.
+        Yields:
+            str: Successive pieces of the generated content.
+        Raises:
+            OpenAIError: If there's an issue with the OpenAI API call.
+            Exception: For other unexpected errors.
+        """
+        started = time.perf_counter()
+        max_tokens = max_tokens or self.max_tokens
+        messages = self._build_messages(system_message, user_message)
+        model = self._select_model(task, messages)
+        cache_key, cached_content = self._cache_lookup(model, messages, max_tokens)
+        claim = None
+        if cached_content is None:
+            claim, cached_content = self._claim_request(cache_key)
+        if cached_content is not None:
+            self._record_call(started, model, cache_key, cache_hit=True, stream=True, task=task)
+            yield cached_content
+            return cached_content
+
+        estimated_tokens = estimate_request_tokens(messages, max_tokens)
+        parts = []
+        usage = None
+        ttft_s = None
+        attempts = CallAttempts()
+        try:
+            # Opening the stream is retried; an error after chunks were yielded is raised as is
+            response_stream = self._create_completion(
+                model, messages, max_tokens, attempts, estimated_tokens, stream=True,
+                stream_options={"include_usage": True})
+            for chunk in response_stream:
+                # The final chunk carries usage only and has no choices
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                    self._record_usage(estimated_tokens, chunk)
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    if ttft_s is None:
+                        ttft_s = time.perf_counter() - started
+                    parts.append(text)
+                    yield text
+        except OpenAIError as e:
+            self._record_call(started, model, cache_key, ttft_s=ttft_s, stream=True, error=e, attempts=attempts,
+                              task=task)
+            print(f"OpenAI API Error in {self.__class__.__name__}: {e}")
+            raise
+        except Exception as e:
+            self._record_call(started, model, cache_key, ttft_s=ttft_s, stream=True, error=e, attempts=attempts,
+                              task=task)
+            print(f"An unexpected error occurred in {self.__class__.__name__}: {e}")
+            raise
+        else:
+            self._record_call(started, model, cache_key, usage=usage, ttft_s=ttft_s, stream=True,
+                              attempts=attempts, task=task)
+            content = "".join(parts)
+            if cache_key is not None and content:
+                self.cache.set(cache_key, content)
+            return content
+        finally:
+            # Also runs when the consumer abandons the stream
+            self._release_request(cache_key, claim)
+
+    async def _acall_llm(self, system_message: str, user_message: str = None, max_tokens: int = None,
+                         response_format: dict = None, task: str = None) -> str:
+        """
+        Async counterpart of _call_llm, backed by AsyncOpenAI.
+        Shares the response cache with the synchronous path.
+        Args:
+            system_message (str): The system role message to guide the LLM.
+            user_message (str, optional): The user role message. Defaults to None.
+            max_tokens (int, optional): Overrides the agent's max_tokens for this call.
+            response_format (dict, optional): e.g. {"type": "json_object"} for JSON mode.
+            task (str, optional): Kind of call, used by the model router's rules.
+        Returns:
+            str: The content generated by the LLM.
+        Raises:
+            OpenAIError: If there's an issue with the OpenAI API call.
+            Exception: For other unexpected errors.
+        """
+        started = time.perf_counter()
+        max_tokens = max_tokens or self.max_tokens
+        messages = self._build_messages(system_message, user_message)
+        model = self._select_model(task, messages)
+        request_options = {"response_format": response_format} if response_format else {}
+        cache_key, cached_content = self._cache_lookup(model, messages, max_tokens, **request_options)
+        claim = None
+        if cached_content is None:
+            claim, cached_content = await self._aclaim_request(cache_key)
+        if cached_content is not None:
+            self._record_call(started, model, cache_key, cache_hit=True, task=task)
+            return cached_content
+
+        estimated_tokens = estimate_request_tokens(messages, max_tokens)
+        attempts = CallAttempts()
+        try:
+            chat_completion = await self._acreate_completion(model, messages, max_tokens, attempts, estimated_tokens,
+                                                             **request_options)
+            self._record_usage(estimated_tokens, chat_completion)
+            self._record_call(started, model, cache_key, usage=getattr(chat_completion, "usage", None),
+                              attempts=attempts, task=task)
+            content = chat_completion.choices[0].message.content
+            if cache_key is not None and content:
+                self.cache.set(cache_key, content)
+            return content
+        except OpenAIError as e:
+            self._record_call(started, model, cache_key, error=e, attempts=attempts, task=task)
+            print(f"OpenAI API Error in {self.__class__.__name__}: {e}")
+            raise
+        except Exception as e:
+            self._record_call(started, model, cache_key, error=e, attempts=attempts, task=task)
+            print(f"An unexpected error occurred in {self.__class__.__name__}: {e}")
+            raise
+        finally:
+            self._release_request(cache_key, claim)
 
     @abstractmethod
     def generate(self, *args, **kwargs) -> str:
@@ -67,4 +444,12 @@ class BaseAgent(ABC):
         Abstract method that must be implemented by concrete agent classes.
         This method will contain the specific logic for each agent's task.
         """
-        pass
\ No newline at end of file
+        pass
+
+    async def agenerate(self, *args, **kwargs):
+        """
+        Async version of generate. Agents that implement a native async path
+        override this; the default runs generate in a worker thread so that every
+        agent can be awaited from the async orchestrator.
+        """
+        return await asyncio.to_thread(self.generate, *args, **kwargs)
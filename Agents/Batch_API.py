@@ -0,0 +1,460 @@
+# Agents/Batch_API.py
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import httpx
+from openai import APIStatusError, NotFoundError
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice, ChoiceDelta
+
+from Agents.Client_Registry import get_openai_client, load_environment
+from Agents.LLM_Backends import LLMBackend
+from Agents.LLM_Cache import DEFAULT_CACHE_DIR
+from Agents.Resilience import ResilientCaller, RetryPolicy
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+# A batch in one of these states will not answer any more of its requests
+BATCH_TERMINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+_BATCH_REQUEST = httpx.Request("POST", f"https://api.openai.com{BATCH_ENDPOINT}")
+
+
+class BatchRequestError(Exception):
+    """Raised for a request whose batch failed, expired or was cancelled without answering it."""
+
+
+def batch_request_id(body: dict) -> str:
+    """
+    Content-addressed custom_id of a batch request line: identical requests from
+    different workflows share one line, and a restarted run finds its earlier requests.
+    """
+    return hashlib.sha256(json.dumps(body, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class BatchJobStore:
+    """
+    Durable state of submitted batches and their requests in a local SQLite file. A request
+    is 'submitted' (in an open batch), 'queued' (its batch ended without answering it and it
+    awaits the next one) or 'completed' (answered while nobody was waiting for it, e.g.
+    during a restart); delivered requests are removed.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path (str): Path of the SQLite file. Created if it does not exist.
+        """
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS batches ("
+            " batch_id TEXT PRIMARY KEY, model TEXT, status TEXT NOT NULL, request_count INTEGER NOT NULL,"
+            " created_at REAL NOT NULL, updated_at REAL NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS batch_requests ("
+            " custom_id TEXT PRIMARY KEY, batch_id TEXT, status TEXT NOT NULL, body TEXT NOT NULL,"
+            " response TEXT, submissions INTEGER NOT NULL DEFAULT 1, updated_at REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_batch_requests_batch ON batch_requests(batch_id)")
+        self._conn.commit()
+
+    def add_batch(self, batch_id: str, model: str, requests: dict):
+        """Records a submitted batch and its requests (custom_id -> request body)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO batches (batch_id, model, status, request_count, created_at, updated_at)"
+                " VALUES (?, ?, 'submitted', ?, ?, ?)", (batch_id, model, len(requests), now, now))
+            for custom_id, body in requests.items():
+                self._conn.execute(
+                    "INSERT INTO batch_requests (custom_id, batch_id, status, body, updated_at)"
+                    " VALUES (?, ?, 'submitted', ?, ?) ON CONFLICT(custom_id) DO UPDATE SET"
+                    " batch_id = excluded.batch_id, status = 'submitted', response = NULL,"
+                    " submissions = submissions + 1, updated_at = excluded.updated_at",
+                    (custom_id, batch_id, json.dumps(body, ensure_ascii=False), now))
+            self._conn.commit()
+
+    def set_batch_status(self, batch_id: str, status: str):
+        with self._lock:
+            self._conn.execute("UPDATE batches SET status = ?, updated_at = ? WHERE batch_id = ?",
+                               (status, time.time(), batch_id))
+            self._conn.commit()
+
+    def open_batches(self) -> list:
+        """IDs of batches whose results have not been collected yet, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT batch_id FROM batches WHERE status NOT IN ('collected', 'missing') ORDER BY created_at").fetchall()
+        return [row[0] for row in rows]
+
+    def get_request(self, custom_id: str):
+        """
+        Returns:
+            tuple | None: (status, batch_id, body, response, submissions), or None for an unknown request.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, batch_id, body, response, submissions FROM batch_requests WHERE custom_id = ?",
+                (custom_id,)).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2]), json.loads(row[3]) if row[3] else None, row[4]
+
+    def batch_requests(self, batch_id: str) -> list:
+        """custom_ids of the requests still submitted in a batch."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT custom_id FROM batch_requests WHERE batch_id = ? AND status = 'submitted'",
+                (batch_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def complete_request(self, custom_id: str, response: dict):
+        """Keeps a response that arrived while nobody was waiting for it."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE batch_requests SET status = 'completed', response = ?, updated_at = ? WHERE custom_id = ?",
+                (json.dumps(response, ensure_ascii=False), time.time(), custom_id))
+            self._conn.commit()
+
+    def requeue_request(self, custom_id: str):
+        with self._lock:
+            self._conn.execute("UPDATE batch_requests SET status = 'queued', updated_at = ? WHERE custom_id = ?",
+                               (time.time(), custom_id))
+            self._conn.commit()
+
+    def delete_request(self, custom_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM batch_requests WHERE custom_id = ?", (custom_id,))
+            self._conn.commit()
+
+    def counts(self) -> dict:
+        """Number of batches and requests by status."""
+        with self._lock:
+            batches = dict(self._conn.execute("SELECT status, COUNT(*) FROM batches GROUP BY status").fetchall())
+            requests = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM batch_requests GROUP BY status").fetchall())
+        return {"batches": batches, "requests": requests}
+
+
+class BatchAPIBackend(LLMBackend):
+    """
+    Deferred execution through the OpenAI Batch API, for bulk jobs where cost and
+    throughput matter more than latency (batch requests cost half as much).
+
+    Each chat completion becomes one line of a batch input file instead of a request of
+    its own; the calling workflow simply waits (a thread blocks, a coroutine awaits).
+    A dispatcher thread collects the calls of all workflows, per model, into batch
+    submissions: when max_batch_requests are queued, or collect_window_s after the
+    first one was queued. It polls open batches every poll_interval_s and hands each
+    answer to the workflows waiting for it, which then continue with their next step.
+
+    Requests are state machines: queued -> submitted -> answered, failed or (when their
+    batch expired or failed) queued again, up to max_resubmissions times. Submitted
+    batches are recorded in a BatchJobStore, so a restarted run does not pay twice for
+    requests whose batch is still open or already answered.
+    """
+
+    name = "batch_api"
+    deferred = True
+
+    def __init__(self, client=None, models=None, max_batch_requests: int = 1000, collect_window_s: float = 10.0,
+                 poll_interval_s: float = 30.0, completion_window: str = "24h", max_resubmissions: int = 1,
+                 db_path: str = None):
+        """
+        Args:
+            client (OpenAI, optional): Client with the files and batches APIs, e.g. FakeBatchAPI for
+                                       offline runs. Defaults to the pooled client for OPENAI_API_KEY.
+            models (dict | list[str], optional): Models served through batches (see LLMBackend).
+            max_batch_requests (int): Requests per batch; a full batch is submitted at once.
+            collect_window_s (float): Seconds a queued request waits for others before its batch is submitted.
+            poll_interval_s (float): Seconds between status checks of open batches.
+            completion_window (str): The Batch API's completion window.
+            max_resubmissions (int): Times a request of an expired or failed batch is queued again.
+            db_path (str, optional): SQLite file of the batch state. Defaults to '.cache/batch_api.sqlite3'.
+        """
+        super().__init__(models=models)
+        self._batch_client = client
+        self.max_batch_requests = max_batch_requests
+        self.collect_window_s = collect_window_s
+        self.poll_interval_s = poll_interval_s
+        self.completion_window = completion_window
+        self.max_resubmissions = max_resubmissions
+        self.store = BatchJobStore(db_path or os.path.join(DEFAULT_CACHE_DIR, "batch_api.sqlite3"))
+        self._condition = threading.Condition()
+        self._queues = {}  # model -> OrderedDict(custom_id -> body) of requests not yet submitted
+        self._queued_since = {}  # model -> monotonic time its oldest queued request arrived
+        self._waiters = {}  # custom_id -> [Future] of the calls waiting for it
+        self._dispatcher = None
+        self._next_poll = 0.0
+        self.batches_submitted = 0
+        self.requests_submitted = 0
+
+    @property
+    def batch_client(self):
+        if self._batch_client is None:
+            load_environment()
+            api_key = os.environ.get("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY environment variable not set.")
+            self._batch_client = get_openai_client(api_key)
+        return self._batch_client
+
+    def agent_kwargs(self) -> dict:
+        """
+        BaseAgent keyword arguments for deferred execution: calls go through this backend,
+        with no per-call deadline or hedging (a batch may take hours to answer).
+        """
+        return {"backend": self,
+                "resilience": ResilientCaller(retry_policy=RetryPolicy(max_retries=2), deadline_s=None, hedge=False)}
+
+    # --- Calls ---
+
+    def submit(self, **kwargs) -> Future:
+        """
+        Queues a chat completion request for the next batch.
+
+        Returns:
+            Future: Resolves to its ChatCompletion, or to the request's error.
+        """
+        body = {key: value for key, value in kwargs.items()
+                if key not in ("timeout", "stream", "stream_options") and value is not None}
+        custom_id = batch_request_id(body)
+        future = Future()
+        with self._condition:
+            state = self.store.get_request(custom_id)
+            if state is not None and state[0] == "completed":
+                self.store.delete_request(custom_id)
+                future.set_result(ChatCompletion.model_validate(state[3]))
+                return future
+            self._waiters.setdefault(custom_id, []).append(future)
+            if (state is None or state[0] == "queued") and not any(custom_id in q for q in self._queues.values()):
+                self._enqueue(custom_id, body)
+            self._start_dispatcher()
+            self._condition.notify_all()
+        return future
+
+    def _enqueue(self, custom_id: str, body: dict):
+        # Callers hold self._condition
+        model = body.get("model")
+        queue = self._queues.setdefault(model, OrderedDict())
+        if not queue:
+            self._queued_since[model] = time.monotonic()
+        queue[custom_id] = body
+
+    def _create(self, **kwargs):
+        completion = self.submit(**kwargs).result()
+        return _completion_chunks(completion) if kwargs.get("stream") else completion
+
+    async def _acreate(self, **kwargs):
+        completion = await asyncio.wrap_future(self.submit(**kwargs))
+        if kwargs.get("stream"):
+            return _aiterate(_completion_chunks(completion))
+        return completion
+
+    # --- Dispatcher ---
+
+    def _start_dispatcher(self):
+        # Callers hold self._condition
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._next_poll = time.monotonic() + self.poll_interval_s
+            self._dispatcher = threading.Thread(target=self._dispatch, name="batch-api-dispatcher", daemon=True)
+            self._dispatcher.start()
+
+    def _due_models(self, now: float) -> list:
+        return [model for model, queue in self._queues.items() if queue and (
+            len(queue) >= self.max_batch_requests or now - self._queued_since[model] >= self.collect_window_s)]
+
+    def _dispatch(self):
+        while True:
+            with self._condition:
+                now = time.monotonic()
+                due = self._due_models(now)
+                if not due and now < self._next_poll:
+                    flush_times = [since + self.collect_window_s for model, since in self._queued_since.items()
+                                   if self._queues.get(model)]
+                    self._condition.wait(min([self._next_poll] + flush_times) - now)
+                    continue
+            # An error must never end this thread: every pending call waits on it, without a deadline
+            for model in due:
+                try:
+                    self._submit_batch(model)
+                except Exception as e:
+                    print(f"Warning: batch submission for {model} failed: {e}")
+            if time.monotonic() >= self._next_poll:
+                try:
+                    self.poll()
+                except Exception as e:
+                    print(f"Warning: polling open batches failed: {e}")
+                self._next_poll = time.monotonic() + self.poll_interval_s
+
+    def flush(self):
+        """Submits every queued request now, without waiting for the collection window."""
+        with self._condition:
+            models = [model for model, queue in self._queues.items() if queue]
+        for model in models:
+            self._submit_batch(model)
+
+    def _submit_batch(self, model: str):
+        """Uploads up to max_batch_requests queued requests of a model as one batch."""
+        with self._condition:
+            queue = self._queues.get(model)
+            if not queue:
+                return
+            requests = OrderedDict()
+            while queue and len(requests) < self.max_batch_requests:
+                custom_id, body = queue.popitem(last=False)
+                requests[custom_id] = body
+            if queue:
+                self._queued_since[model] = time.monotonic()
+        lines = "".join(json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body},
+                                   ensure_ascii=False) + "\n" for custom_id, body in requests.items())
+        try:
+            input_file = self.batch_client.files.create(
+                file=("precisionai-batch.jsonl", lines.encode("utf-8")), purpose="batch")
+            batch = self.batch_client.batches.create(
+                input_file_id=input_file.id, endpoint=BATCH_ENDPOINT, completion_window=self.completion_window,
+                metadata={"source": "precisionai"})
+        except Exception as e:
+            print(f"Warning: could not submit a batch of {len(requests)} requests: {e}")
+            for custom_id in requests:
+                self._deliver(custom_id, error=e)
+            return
+        try:
+            self.store.add_batch(batch.id, model, requests)
+        except sqlite3.Error as e:
+            print(f"Warning: could not record batch {batch.id}: {e}")
+            for custom_id in requests:
+                self._deliver(custom_id, error=e)
+            return
+        self.batches_submitted += 1
+        self.requests_submitted += len(requests)
+        print(f"Submitted batch {batch.id} with {len(requests)} {model} requests.")
+
+    def poll(self):
+        """Checks every open batch once and delivers the answers of finished ones."""
+        for batch_id in self.store.open_batches():
+            try:
+                batch = self.batch_client.batches.retrieve(batch_id)
+            except NotFoundError:
+                self.store.set_batch_status(batch_id, "missing")
+                self._settle(batch_id, {}, "missing")
+                continue
+            except Exception as e:
+                print(f"Warning: could not check batch {batch_id}: {e}")
+                continue
+            if batch.status not in BATCH_TERMINAL_STATES:
+                self.store.set_batch_status(batch_id, batch.status)
+                continue
+            results = {}
+            try:
+                for file_id in (batch.output_file_id, batch.error_file_id):
+                    if file_id:
+                        results.update(self._read_results(file_id))
+            except Exception as e:
+                print(f"Warning: could not download the results of batch {batch_id}, retrying at the next poll: {e}")
+                continue
+            self._settle(batch_id, results, batch.status)
+            self.store.set_batch_status(batch_id, "collected")
+
+    def _read_results(self, file_id: str) -> dict:
+        """
+        Parses a batch output or error file into {custom_id: (status_code, body)}. A malformed
+        record fails only its own request; a line without a readable custom_id is skipped, so
+        its request counts as unanswered (see _settle).
+        """
+        results = {}
+        for number, line in enumerate(self.batch_client.files.content(file_id).text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                custom_id = record["custom_id"]
+            except (ValueError, TypeError, KeyError) as e:
+                print(f"Warning: skipping malformed line {number} of batch file {file_id}: {e}")
+                continue
+            response = record.get("response") or {}
+            if not isinstance(response, dict):
+                results[custom_id] = (500, {"message": "Malformed batch result record."})
+                continue
+            body = response.get("body") or record.get("error") or {}
+            results[custom_id] = (response.get("status_code", 500), body)
+        return results
+
+    def _settle(self, batch_id: str, results: dict, batch_status: str):
+        """Delivers a finished batch's answers; unanswered requests are queued again or failed."""
+        for custom_id in self.store.batch_requests(batch_id):
+            if custom_id in results:
+                status_code, body = results[custom_id]
+                if status_code == 200:
+                    self._deliver(custom_id, response=body)
+                else:
+                    details = body.get("error") or body if isinstance(body, dict) else {}
+                    message = (details if isinstance(details, dict) else {}).get(
+                        "message", f"Batch request failed with status {status_code}.")
+                    self._deliver(custom_id, error=APIStatusError(
+                        message, response=httpx.Response(status_code, request=_BATCH_REQUEST), body=body))
+                continue
+            _, _, request_body, _, submissions = self.store.get_request(custom_id)
+            if submissions <= self.max_resubmissions:
+                with self._condition:
+                    self.store.requeue_request(custom_id)
+                    if self._waiters.get(custom_id):
+                        self._enqueue(custom_id, request_body)
+                        self._condition.notify_all()
+            else:
+                self._deliver(custom_id, error=BatchRequestError(
+                    f"Batch {batch_id} ended '{batch_status}' without answering the request."))
+
+    def _deliver(self, custom_id: str, response: dict = None, error: Exception = None):
+        completion = None
+        if error is None:
+            try:
+                completion = ChatCompletion.model_validate(response)
+            except Exception as e:
+                error = BatchRequestError(f"The batch answered with a malformed completion: {e}")
+        with self._condition:
+            waiters = [f for f in self._waiters.pop(custom_id, []) if not f.cancelled()]
+            if waiters or error is not None:
+                self.store.delete_request(custom_id)
+            else:
+                self.store.complete_request(custom_id, response)
+        for future in waiters:
+            if not future.set_running_or_notify_cancel():  # cancelled in the meantime
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(completion)
+
+    def stats(self) -> dict:
+        with self._condition:
+            queued = sum(len(queue) for queue in self._queues.values())
+            waiting = sum(len(futures) for futures in self._waiters.values())
+        return dict(super().stats(), queued=queued, waiting_calls=waiting, batches_submitted=self.batches_submitted,
+                    requests_submitted=self.requests_submitted, **self.store.counts())
+
+
+def _completion_chunks(completion: ChatCompletion):
+    """Replays a batch answer as a stream: one content chunk and one usage chunk."""
+    content = completion.choices[0].message.content if completion.choices else ""
+    yield ChatCompletionChunk(id=completion.id, object="chat.completion.chunk", created=completion.created,
+                              model=completion.model,
+                              choices=[ChunkChoice(index=0, delta=ChoiceDelta(content=content or ""))])
+    if completion.usage is not None:
+        yield ChatCompletionChunk(id=completion.id, object="chat.completion.chunk", created=completion.created,
+                                  model=completion.model, choices=[], usage=completion.usage)
+
+
+async def _aiterate(iterator):
+    for item in iterator:
+        yield item
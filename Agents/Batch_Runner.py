@@ -0,0 +1,245 @@
+# Agents/Batch_Runner.py
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import sys
+import time
+
+# Allow running as a script (python Agents/Batch_Runner.py) as well as a module
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from Agents.Batch_API import BatchAPIBackend
+from Agents.Orchestrator_Agent import Orchestrator
+from Agents.Rate_Limiter import RateLimiter
+
+# Input JSONL records may use either the short UI names or the workflow argument names
+INPUT_FIELD_ALIASES = {
+    "front_end_reqs": ("front_end_reqs", "front_end"),
+    "middleware_reqs": ("middleware_reqs", "middleware"),
+    "backend_reqs": ("backend_reqs", "backend"),
+    "other_details": ("other_details", "other", "others"),
+}
+
+
+class BatchRunner:
+    """
+    Runs many PRD workflows concurrently on one event loop.
+    Concurrency is bounded by a semaphore and API usage by an optional RateLimiter,
+    so throughput is set by the quota rather than by running jobs one at a time.
+    Results are appended to the output JSONL as each job finishes.
+    """
+
+    def __init__(self, orchestrator: Orchestrator, concurrency: int = 8, rate_limiter: RateLimiter = None,
+                 include_content: bool = False):
+        """
+        Args:
+            orchestrator (Orchestrator): The orchestrator whose agents run the workflows.
+            concurrency (int): Maximum number of workflows in flight at once.
+            rate_limiter (RateLimiter, optional): Shared RPM/TPM budget for all agents.
+            include_content (bool): If True, the final PRD text is written to the output records.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1.")
+        self.orchestrator = orchestrator
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self.include_content = include_content
+        if rate_limiter is not None:
+            for agent in orchestrator.get_all_agents().values():
+                agent.rate_limiter = rate_limiter
+
+    @staticmethod
+    def read_jobs(input_path: str):
+        """
+        Lazily yields job dictionaries from a JSONL file, one requirement set per line.
+        Each job gets an 'id' (the line number if not given) and the four workflow inputs.
+        A line that is not a JSON object yields {'id': line_number, 'error': ...} instead,
+        which the runners report as a failed job without stopping the batch.
+        """
+        with open(input_path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield {"id": line_number, "error": f"Invalid JSON on line {line_number}: {e}"}
+                    continue
+                if not isinstance(record, dict):
+                    yield {"id": line_number, "error": f"Line {line_number} is not a JSON object."}
+                    continue
+                job = {"id": record.get("id", line_number)}
+                for field, aliases in INPUT_FIELD_ALIASES.items():
+                    job[field] = next((record[a] for a in aliases if a in record), "")
+                yield job
+
+    async def _run_job(self, job: dict) -> dict:
+        if "error" in job:
+            return _invalid_job_result(job)
+        started = time.perf_counter()
+        result = {"id": job["id"]}
+        try:
+            prd_content, prd_path = await self.orchestrator.run_prd_workflow_async(
+                front_end_reqs=job["front_end_reqs"],
+                middleware_reqs=job["middleware_reqs"],
+                backend_reqs=job["backend_reqs"],
+                other_details=job["other_details"],
+            )
+            result.update(status="ok", prd_path=prd_path)
+            if self.include_content:
+                result["prd"] = prd_content
+        except Exception as e:
+            result.update(status="error", error=str(e))
+        result["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    async def run(self, jobs, output_path: str) -> dict:
+        """
+        Runs all jobs and streams one JSON result line per job to output_path.
+        Jobs are pulled from the iterable only when a concurrency slot is free,
+        so arbitrarily large inputs are never fully loaded into memory.
+
+        Args:
+            jobs (Iterable[dict]): Jobs as produced by read_jobs.
+            output_path (str): Path of the JSONL file to append results to.
+
+        Returns:
+            dict: Summary counts ('ok', 'error', 'elapsed_seconds').
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        summary = {"ok": 0, "error": 0}
+        started = time.perf_counter()
+        pending = set()
+
+        with open(output_path, "a", encoding="utf-8") as out:
+            async def worker(job):
+                try:
+                    result = await self._run_job(job)
+                finally:
+                    semaphore.release()
+                summary[result["status"]] += 1
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+
+            for job in jobs:
+                await semaphore.acquire()
+                task = asyncio.create_task(worker(job))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+
+        summary["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        return summary
+
+
+def _invalid_job_result(job: dict) -> dict:
+    # A line read_jobs could not parse; reported like a failed workflow
+    return {"id": job["id"], "status": "error", "error": job["error"], "elapsed_seconds": 0.0}
+
+
+def _rate_limited_agent_kwargs(rpm: float, tpm: float) -> dict:
+    # Runs inside each worker process; a RateLimiter holds locks and cannot be pickled
+    return {"rate_limiter": RateLimiter(rpm, tpm)}
+
+
+def run_in_processes(orchestrator: Orchestrator, jobs, output_path: str, include_content: bool = False) -> dict:
+    """
+    Runs all jobs on the orchestrator's execution backend (e.g. worker processes) and
+    appends one JSON result line per job to output_path as each finishes.
+
+    Returns:
+        dict: Summary counts ('ok', 'error', 'elapsed_seconds').
+    """
+    summary = {"ok": 0, "error": 0}
+    started = time.perf_counter()
+    job_ids = {}
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        def write(record):
+            summary[record["status"]] += 1
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+        def requirement_sets():
+            index = 0
+            for job in jobs:
+                if "error" in job:
+                    write(_invalid_job_result(job))
+                    continue
+                job_ids[index] = job["id"]
+                index += 1
+                yield job["front_end_reqs"], job["middleware_reqs"], job["backend_reqs"], job["other_details"]
+
+        for result in orchestrator.run_prd_workflows(requirement_sets(), include_content=include_content):
+            record = {"id": job_ids.pop(result.pop("index"))}
+            result.pop("pid", None)
+            record.update(result)
+            write(record)
+
+    summary["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate PRDs for every requirement set in a JSONL file.")
+    parser.add_argument("input", help="Input JSONL file, one requirement set per line.")
+    parser.add_argument("output", help="Output JSONL file; one result line is appended per job.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum workflows in flight (default: 8).")
+    parser.add_argument("--rpm", type=float, default=None, help="Requests-per-minute budget.")
+    parser.add_argument("--tpm", type=float, default=None, help="Tokens-per-minute budget.")
+    parser.add_argument("--max-iterations", type=int, default=3, help="Maximum review iterations per PRD.")
+    parser.add_argument("--include-content", action="store_true", help="Write the final PRD text to the output.")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Shard workflows across this many worker processes instead of one event loop. "
+                             "--rpm/--tpm are split evenly between the processes.")
+    parser.add_argument("--batch-api", action="store_true",
+                        help="Deferred mode: send the LLM calls of all workflows through the Batch API (half the "
+                             "cost, answers within --batch-window plus the batch turnaround). Use a high --concurrency.")
+    parser.add_argument("--batch-window", type=float, default=10.0,
+                        help="Seconds calls are collected before a batch is submitted (default: 10).")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Maximum requests per batch (default: 1000).")
+    parser.add_argument("--batch-poll", type=float, default=30.0,
+                        help="Seconds between status checks of submitted batches (default: 30).")
+    args = parser.parse_args(argv)
+    if args.batch_api and args.processes:
+        parser.error("--batch-api collects the calls of all workflows in one process; it cannot be combined "
+                     "with --processes.")
+
+    if args.processes:
+        factory = None
+        if args.rpm or args.tpm:
+            factory = functools.partial(_rate_limited_agent_kwargs,
+                                        args.rpm / args.processes if args.rpm else None,
+                                        args.tpm / args.processes if args.tpm else None)
+        orchestrator = Orchestrator(max_review_iterations=args.max_iterations, execution_backend="process",
+                                    max_workers=args.processes, agent_kwargs_factory=factory)
+        try:
+            summary = run_in_processes(orchestrator, BatchRunner.read_jobs(args.input), args.output,
+                                       include_content=args.include_content)
+        finally:
+            orchestrator.shutdown()
+        print(f"\n--- Batch Completed: {summary['ok']} succeeded, {summary['error']} failed "
+              f"in {summary['elapsed_seconds']}s ---")
+        return
+
+    agent_kwargs = None
+    if args.batch_api:
+        batch_backend = BatchAPIBackend(max_batch_requests=args.batch_size, collect_window_s=args.batch_window,
+                                        poll_interval_s=args.batch_poll)
+        agent_kwargs = batch_backend.agent_kwargs()
+    orchestrator = Orchestrator(max_review_iterations=args.max_iterations, agent_kwargs=agent_kwargs)
+    rate_limiter = RateLimiter(args.rpm, args.tpm) if (args.rpm or args.tpm) else None
+    runner = BatchRunner(orchestrator, concurrency=args.concurrency, rate_limiter=rate_limiter,
+                         include_content=args.include_content)
+    summary = asyncio.run(runner.run(BatchRunner.read_jobs(args.input), args.output))
+    print(f"\n--- Batch Completed: {summary['ok']} succeeded, {summary['error']} failed "
+          f"in {summary['elapsed_seconds']}s ---")
+
+
+if __name__ == "__main__":
+    main()
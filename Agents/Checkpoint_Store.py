@@ -0,0 +1,272 @@
+# Agents/Checkpoint_Store.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from Agents.LLM_Cache import DEFAULT_CACHE_DIR
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def hash_workflow_inputs(inputs: tuple) -> str:
+    """Returns a stable hash of a workflow's (front end, middleware, backend, other details) inputs."""
+    return hashlib.sha256(json.dumps(list(inputs), ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class WorkflowState:
+    """
+    The last checkpointed state of a PRD workflow.
+
+    iteration is the last iteration with a checkpoint (0 if none). step is 'prd' when
+    that iteration's PRD was saved but not yet reviewed, 'review' when its review is
+    stored too, or None for a workflow without checkpoints. For a completed workflow,
+    prd and prd_path are its result, which may come from an earlier, better-scored iteration.
+    best is (score, iteration, prd, prd_path) of the highest-scored reviewed iteration with a
+    structured verdict (the latest on ties), or None, so a resumed run keeps comparing against it.
+    """
+
+    def __init__(self, workflow_id: str, inputs: tuple, status: str = "running", iteration: int = 0,
+                 step: str = None, prd: str = None, prd_path: str = None, feedback: str = None,
+                 satisfactory: bool = False, verdict: dict = None):
+        self.workflow_id = workflow_id
+        self.inputs = inputs
+        self.status = status
+        self.iteration = iteration
+        self.step = step
+        self.prd = prd
+        self.prd_path = prd_path
+        self.feedback = feedback
+        self.satisfactory = satisfactory
+        self.verdict = verdict  # ReviewVerdict.to_dict() of the last review, if structured
+        self.best = None
+
+    @property
+    def next_iteration(self) -> int:
+        """The iteration the workflow continues with (a reviewed iteration is not repeated)."""
+        return self.iteration if self.step == "prd" else self.iteration + 1
+
+    @property
+    def previous_feedback(self):
+        """Feedback to pass to the next revision, if the last checkpoint is a review."""
+        return self.feedback if self.step == "review" else None
+
+    def is_finished(self, max_iterations: int) -> bool:
+        """True if nothing is left to do: completed, satisfactory, or out of iterations."""
+        if self.status == "completed":
+            return True
+        return self.step == "review" and (self.satisfactory or self.iteration >= max_iterations)
+
+    def __repr__(self):
+        return f"WorkflowState({self.workflow_id!r}, iteration={self.iteration}, step={self.step!r}, status={self.status!r})"
+
+
+class WorkflowCheckpointStore:
+    """
+    Durable per-iteration checkpoints of PRD workflows in a local SQLite file, keyed by
+    workflow ID. Each iteration is written twice: once when its PRD is saved and once
+    when its review verdict is known, so a restarted workflow repeats at most the one
+    LLM step that was in flight.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path (str): Path of the SQLite file. Created if it does not exist.
+        """
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS workflows ("
+            " workflow_id TEXT PRIMARY KEY, inputs TEXT NOT NULL, inputs_hash TEXT NOT NULL,"
+            " status TEXT NOT NULL, created_at REAL NOT NULL, updated_at REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_workflows_inputs ON workflows(inputs_hash, status)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS workflow_iterations ("
+            " workflow_id TEXT NOT NULL, iteration INTEGER NOT NULL, prd TEXT NOT NULL, prd_path TEXT,"
+            " feedback TEXT, satisfactory INTEGER, updated_at REAL NOT NULL,"
+            " PRIMARY KEY (workflow_id, iteration))")
+        self._ensure_column("workflows", "result_iteration", "INTEGER")
+        self._ensure_column("workflow_iterations", "verdict", "TEXT")
+        self._conn.commit()
+
+    def _ensure_column(self, table: str, column: str, declaration: str):
+        """Adds a column to a table created by an older version of this store."""
+        columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+    def start_workflow(self, workflow_id: str, inputs: tuple) -> WorkflowState:
+        """
+        Registers a workflow, or loads it if the ID is already known.
+
+        Args:
+            workflow_id (str): The workflow ID.
+            inputs (tuple): (front_end_reqs, middleware_reqs, backend_reqs, other_details).
+
+        Returns:
+            WorkflowState: The state to continue from.
+
+        Raises:
+            ValueError: If the workflow ID exists with different inputs.
+        """
+        inputs_hash = hash_workflow_inputs(inputs)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT inputs_hash FROM workflows WHERE workflow_id = ?", (workflow_id,)).fetchone()
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO workflows (workflow_id, inputs, inputs_hash, status, created_at, updated_at)"
+                    " VALUES (?, ?, ?, 'running', ?, ?)",
+                    (workflow_id, json.dumps(list(inputs), ensure_ascii=False), inputs_hash, now, now))
+                self._conn.commit()
+                return WorkflowState(workflow_id, tuple(inputs))
+            if row[0] != inputs_hash:
+                raise ValueError(f"Workflow '{workflow_id}' already exists with different inputs.")
+        return self.load(workflow_id)
+
+    def load(self, workflow_id: str):
+        """
+        Returns:
+            WorkflowState | None: The workflow's last checkpoint, or None if the ID is unknown.
+        """
+        with self._lock:
+            workflow = self._conn.execute(
+                "SELECT inputs, status, result_iteration FROM workflows WHERE workflow_id = ?",
+                (workflow_id,)).fetchone()
+            if workflow is None:
+                return None
+            last = self._conn.execute(
+                "SELECT iteration, prd, prd_path, feedback, satisfactory, verdict FROM workflow_iterations"
+                " WHERE workflow_id = ? ORDER BY iteration DESC LIMIT 1", (workflow_id,)).fetchone()
+            scored = self._conn.execute(
+                "SELECT iteration, prd, prd_path, verdict FROM workflow_iterations"
+                " WHERE workflow_id = ? AND verdict IS NOT NULL ORDER BY iteration", (workflow_id,)).fetchall()
+            result = None
+            if workflow[2] is not None and last is not None and workflow[2] != last[0]:
+                result = self._conn.execute(
+                    "SELECT prd, prd_path FROM workflow_iterations WHERE workflow_id = ? AND iteration = ?",
+                    (workflow_id, workflow[2])).fetchone()
+        state = WorkflowState(workflow_id, tuple(json.loads(workflow[0])), status=workflow[1])
+        if last is not None:
+            state.iteration, state.prd, state.prd_path, state.feedback, satisfactory, verdict = last
+            state.step = "prd" if satisfactory is None else "review"
+            state.satisfactory = bool(satisfactory)
+            state.verdict = json.loads(verdict) if verdict else None
+        if result is not None:
+            state.prd, state.prd_path = result
+        for iteration, prd, prd_path, verdict in scored:
+            score = json.loads(verdict).get("overall_score")
+            if score is not None and (state.best is None or score >= state.best[0]):
+                state.best = (score, iteration, prd, prd_path)
+        return state
+
+    def save_prd(self, workflow_id: str, iteration: int, prd: str, prd_path: str):
+        """Checkpoints an iteration's generated PRD, before it is reviewed."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO workflow_iterations"
+                " (workflow_id, iteration, prd, prd_path, feedback, satisfactory, updated_at)"
+                " VALUES (?, ?, ?, ?, NULL, NULL, ?)", (workflow_id, iteration, prd, prd_path, now))
+            self._conn.execute("UPDATE workflows SET updated_at = ? WHERE workflow_id = ?", (now, workflow_id))
+            self._conn.commit()
+
+    def save_review(self, workflow_id: str, iteration: int, feedback: str, satisfactory: bool, verdict: dict = None):
+        """Checkpoints an iteration's review feedback, satisfaction verdict and structured verdict (if any)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE workflow_iterations SET feedback = ?, satisfactory = ?, verdict = ?, updated_at = ?"
+                " WHERE workflow_id = ? AND iteration = ?",
+                (feedback, int(bool(satisfactory)), json.dumps(verdict) if verdict else None, now,
+                 workflow_id, iteration))
+            self._conn.execute("UPDATE workflows SET updated_at = ? WHERE workflow_id = ?", (now, workflow_id))
+            self._conn.commit()
+
+    def mark_completed(self, workflow_id: str, result_iteration: int = None):
+        """
+        Marks a workflow as finished; completed workflows are never resumed.
+        result_iteration names the iteration whose PRD is the result, if not the last one.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE workflows SET status = 'completed', result_iteration = COALESCE(?, result_iteration),"
+                " updated_at = ? WHERE workflow_id = ?", (result_iteration, time.time(), workflow_id))
+            self._conn.commit()
+
+    def find_resumable(self, inputs: tuple):
+        """
+        Returns the ID of the most recently updated unfinished workflow with exactly these
+        inputs, or None. Lets a UI pick up a run lost to a crashed session or restart.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT workflow_id FROM workflows WHERE inputs_hash = ? AND status = 'running'"
+                " ORDER BY updated_at DESC LIMIT 1", (hash_workflow_inputs(inputs),)).fetchone()
+        return row[0] if row else None
+
+    def find_completed(self, inputs: tuple, since: float = None):
+        """
+        Returns the state (with its result) of the most recently completed workflow with
+        exactly these inputs, or None. With since, only workflows completed at or after
+        that time.time() count, e.g. ones that ran concurrently in another process.
+        """
+        query = "SELECT workflow_id FROM workflows WHERE inputs_hash = ? AND status = 'completed'"
+        params = (hash_workflow_inputs(inputs),)
+        if since is not None:
+            query += " AND updated_at >= ?"
+            params += (since,)
+        with self._lock:
+            row = self._conn.execute(query + " ORDER BY updated_at DESC LIMIT 1", params).fetchone()
+        return self.load(row[0]) if row else None
+
+    def list_workflows(self, status: str = None) -> list:
+        """
+        Returns:
+            list[dict]: workflow_id, status, iterations and updated_at of each workflow, newest first.
+        """
+        query = ("SELECT w.workflow_id, w.status, COUNT(i.iteration), w.updated_at FROM workflows w"
+                 " LEFT JOIN workflow_iterations i ON i.workflow_id = w.workflow_id")
+        params = ()
+        if status:
+            query += " WHERE w.status = ?"
+            params = (status,)
+        query += " GROUP BY w.workflow_id ORDER BY w.updated_at DESC"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [{"workflow_id": r[0], "status": r[1], "iterations": r[2], "updated_at": r[3]} for r in rows]
+
+    def delete(self, workflow_id: str):
+        """Removes a workflow and its checkpoints."""
+        with self._lock:
+            self._conn.execute("DELETE FROM workflow_iterations WHERE workflow_id = ?", (workflow_id,))
+            self._conn.execute("DELETE FROM workflows WHERE workflow_id = ?", (workflow_id,))
+            self._conn.commit()
+
+
+def get_default_checkpoint_store():
+    """
+    Returns the process-wide checkpoint store, creating it on first use. Configured through:
+        PRECISIONAI_CHECKPOINTS     - set to "0" to disable workflow checkpoints.
+        PRECISIONAI_CHECKPOINT_DIR  - directory for the SQLite file (default: '.cache').
+
+    Returns:
+        WorkflowCheckpointStore | None: The shared store, or None if checkpoints are disabled.
+    """
+    global _default_store
+    if os.environ.get("PRECISIONAI_CHECKPOINTS", "1") == "0":
+        return None
+    with _default_store_lock:
+        if _default_store is None:
+            directory = os.environ.get("PRECISIONAI_CHECKPOINT_DIR", DEFAULT_CACHE_DIR)
+            _default_store = WorkflowCheckpointStore(os.path.join(directory, "workflows.sqlite3"))
+        return _default_store
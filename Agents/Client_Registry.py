@@ -0,0 +1,103 @@
+# Agents/Client_Registry.py
+
+import asyncio
+import os
+import threading
+import weakref
+
+import httpx
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+# Connection pool limits, tunable through environment variables
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+
+_lock = threading.Lock()
+_environment_loaded = False
+_sync_clients = {}  # (api_key, base_url) -> OpenAI
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> {(api_key, base_url): AsyncOpenAI}
+
+
+def load_environment():
+    """Loads the project's .env file once per process instead of once per agent."""
+    global _environment_loaded
+    if not _environment_loaded:
+        with _lock:
+            if not _environment_loaded:
+                load_dotenv()
+                _environment_loaded = True
+
+
+def get_pool_limits():
+    """
+    Returns the HTTP connection pool limits shared by all clients. Configured through:
+        PRECISIONAI_HTTP_MAX_CONNECTIONS  - total concurrent connections (default: 100).
+        PRECISIONAI_HTTP_MAX_KEEPALIVE    - idle connections kept open for reuse (default: 20).
+        PRECISIONAI_HTTP_KEEPALIVE_EXPIRY - seconds an idle connection is kept (default: 60).
+    """
+    return httpx.Limits(
+        max_connections=int(os.environ.get("PRECISIONAI_HTTP_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+        max_keepalive_connections=int(os.environ.get("PRECISIONAI_HTTP_MAX_KEEPALIVE", DEFAULT_MAX_KEEPALIVE_CONNECTIONS)),
+        keepalive_expiry=float(os.environ.get("PRECISIONAI_HTTP_KEEPALIVE_EXPIRY", DEFAULT_KEEPALIVE_EXPIRY)),
+    )
+
+
+def get_openai_client(api_key: str, base_url: str = None) -> OpenAI:
+    """
+    Returns the process-wide OpenAI client for an API key (and optional base URL),
+    creating it on first use. All agents share its keep-alive connection pool, so
+    TLS handshakes and connection setup are paid once per process, not per agent.
+    The SDK's own retries are disabled; BaseAgent retries through Agents/Resilience.py.
+
+    Args:
+        api_key (str): The OpenAI API key.
+        base_url (str, optional): Alternative API endpoint.
+
+    Returns:
+        OpenAI: The shared client.
+    """
+    key = (api_key, base_url)
+    client = _sync_clients.get(key)
+    if client is None:
+        with _lock:
+            client = _sync_clients.get(key)
+            if client is None:
+                client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0,
+                                http_client=DefaultHttpxClient(limits=get_pool_limits()))
+                _sync_clients[key] = client
+    return client
+
+
+def get_async_openai_client(api_key: str, base_url: str = None) -> AsyncOpenAI:
+    """
+    Returns the shared AsyncOpenAI client for the running event loop. Async connection
+    pools are bound to the loop that created them, so each loop gets its own client;
+    clients are dropped together with their loop.
+
+    Args:
+        api_key (str): The OpenAI API key.
+        base_url (str, optional): Alternative API endpoint.
+
+    Returns:
+        AsyncOpenAI: The shared client for the current event loop.
+    """
+    loop = asyncio.get_running_loop()
+    key = (api_key, base_url)
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0,
+                                 http_client=DefaultAsyncHttpxClient(limits=get_pool_limits()))
+            clients[key] = client
+    return client
+
+
+def close_all_clients():
+    """Closes the shared synchronous clients and their connection pools (e.g. at shutdown)."""
+    with _lock:
+        for client in _sync_clients.values():
+            client.close()
+        _sync_clients.clear()
@@ -0,0 +1,132 @@
+# Agents/Document_Store.py
+
+import os
+import re
+import tempfile
+
+from Agents.File_Lock import FileLock
+
+
+def atomic_write_text(filepath: str, content: str):
+    """
+    Writes a text file atomically: the content goes to a temporary file in the same
+    directory, is flushed to disk, and then renamed over the destination. Readers
+    therefore see either the old file or the complete new one, never a partial write.
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".part")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, filepath)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class VersionedDocumentStore:
+    """
+    Stores versioned documents as '{document_type}_v{version}.md' files in one folder.
+    The latest allocated version of each document type is kept in a small counter
+    file ('.{document_type}.version'), so allocating a version is constant-time
+    regardless of how many documents exist. Allocation is serialized with a lock file
+    and each version file is reserved with an exclusive create, which makes it safe
+    across threads and processes.
+    """
+
+    def __init__(self, folder: str, lock_timeout: float = 30.0):
+        """
+        Args:
+            folder (str): Directory holding the documents. Created if missing.
+            lock_timeout (float): Seconds to wait for the allocation lock.
+        """
+        self.folder = folder
+        self.lock_timeout = lock_timeout
+        os.makedirs(self.folder, exist_ok=True)
+
+    def _counter_path(self, document_type: str) -> str:
+        return os.path.join(self.folder, f".{document_type}.version")
+
+    def _lock(self, document_type: str) -> FileLock:
+        return FileLock(os.path.join(self.folder, f".{document_type}.lock"), timeout=self.lock_timeout)
+
+    def document_path(self, document_type: str, version: int) -> str:
+        """Returns the file path for a given document type and version."""
+        return os.path.join(self.folder, f"{document_type}_v{version}.md")
+
+    def _scan_max_version(self, document_type: str) -> int:
+        """
+        Finds the highest existing version by listing the folder. Only used once per
+        document type, to seed the counter for folders created before it existed.
+        """
+        pattern = re.compile(rf"{re.escape(document_type)}_v(\d+)\.md$")
+        max_version = 0
+        for filename in os.listdir(self.folder):
+            match = pattern.match(filename)
+            if match:
+                max_version = max(max_version, int(match.group(1)))
+        return max_version
+
+    def _read_counter(self, document_type: str) -> int:
+        try:
+            with open(self._counter_path(document_type), "r", encoding="ascii") as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return self._scan_max_version(document_type)
+
+    def latest_version(self, document_type: str) -> int:
+        """
+        Returns the most recently allocated version number (0 if none).
+        """
+        return self._read_counter(document_type)
+
+    def allocate_version(self, document_type: str) -> int:
+        """
+        Atomically allocates the next version number and reserves its file, so no other
+        thread or process can be handed the same version.
+
+        Args:
+            document_type (str): The type of document (e.g., "PRD", "WBS").
+
+        Returns:
+            int: The newly allocated version number.
+        """
+        with self._lock(document_type):
+            version = self._read_counter(document_type)
+            while True:
+                version += 1
+                try:
+                    # Reserve the file; if it already exists (e.g. the counter was reset), skip it
+                    os.close(os.open(self.document_path(document_type, version),
+                                     os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                    break
+                except FileExistsError:
+                    continue
+            atomic_write_text(self._counter_path(document_type), str(version))
+        return version
+
+    def write(self, document_content: str, document_type: str, version: int) -> str:
+        """
+        Atomically writes the content of a (previously allocated) version.
+
+        Returns:
+            str: The full path to the written file.
+        """
+        filepath = self.document_path(document_type, version)
+        atomic_write_text(filepath, document_content)
+        return filepath
+
+    def save_new(self, document_content: str, document_type: str) -> tuple[int, str]:
+        """
+        Allocates the next version and writes the document to it.
+
+        Returns:
+            tuple[int, str]: The allocated version and the full path to the saved file.
+        """
+        version = self.allocate_version(document_type)
+        return version, self.write(document_content, document_type, version)
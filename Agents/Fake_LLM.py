@@ -0,0 +1,485 @@
+# Agents/Fake_LLM.py
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+
+import httpx
+from openai import APIConnectionError, APITimeoutError, InternalServerError, NotFoundError, RateLimitError
+from openai.types import Batch, CompletionUsage, FileObject
+from openai.types.chat import ChatCompletion, ChatCompletionChunk, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice, ChoiceDelta
+
+from Agents.PRD_Sections import parse_prd_sections
+from Agents.Review_Verdict import VERDICT_MARKER
+
+# Sections of the canned PRD, in the order the real creator prompt asks for them
+CANNED_PRD_SECTIONS = [
+    "Introduction/Overview",
+    "Goals & Objectives",
+    "User Stories/Personas",
+    "Functional Requirements",
+    "Non-Functional Requirements",
+    "Technical Architecture Overview",
+    "Open Questions/Assumptions",
+    "Future Considerations/Phases",
+]
+
+_FILLER_WORDS = (
+    "the system shall provide users data service request response secure scalable "
+    "interface workflow module storage access report dashboard integration latency "
+    "availability audit notification account session validation cache queue"
+).split()
+
+# Error types the backend can inject, mapped to how they are constructed
+INJECTABLE_ERRORS = ("rate_limit", "timeout", "server_error", "connection")
+
+_FAKE_REQUEST = httpx.Request("POST", "https://fake-llm.local/v1/chat/completions")
+
+
+class FakeLLMConfig:
+    """
+    Behaviour of the fake chat-completions backend.
+
+    Args:
+        seed (int): Seed for all random draws (latency, errors, verdicts), so runs are reproducible.
+        latency_s (float): Median time to first token in seconds.
+        latency_jitter (float): Log-normal sigma applied to latency_s (0 gives a fixed latency).
+        tokens_per_second (float): Generation speed; completion time grows with output length.
+        time_scale (float): Multiplies every simulated delay (e.g. 0.01 runs 100x faster than real time).
+        error_rate (float): Probability that a call raises one of error_types instead of answering.
+        error_types (tuple): Subset of INJECTABLE_ERRORS to draw from.
+        satisfaction_rate (float): Probability that a review of a given PRD is satisfactory.
+                                   0 forces every workflow to use all of its iterations.
+        section_words (int): Approximate words per canned PRD section.
+        responder (callable, optional): responder(messages) -> str overriding the canned outputs.
+        model_speed (dict, optional): Speed factor per model-name prefix (longest match wins), e.g.
+                                      {"gpt-4o-mini": 2.5}: that model's latency and generation time are
+                                      divided by it. Other models run at speed 1.
+    """
+
+    def __init__(self, seed: int = 0, latency_s: float = 0.5, latency_jitter: float = 0.3,
+                 tokens_per_second: float = 80.0, time_scale: float = 1.0, error_rate: float = 0.0,
+                 error_types: tuple = ("rate_limit", "server_error"), satisfaction_rate: float = 0.5,
+                 section_words: int = 120, responder=None, model_speed: dict = None):
+        unknown = set(error_types) - set(INJECTABLE_ERRORS)
+        if unknown:
+            raise ValueError(f"Unknown error types {sorted(unknown)}; choose from {INJECTABLE_ERRORS}")
+        self.seed = seed
+        self.latency_s = latency_s
+        self.latency_jitter = latency_jitter
+        self.tokens_per_second = tokens_per_second
+        self.time_scale = time_scale
+        self.error_rate = error_rate
+        self.error_types = tuple(error_types)
+        self.satisfaction_rate = satisfaction_rate
+        self.section_words = section_words
+        self.responder = responder
+        self.model_speed = dict(model_speed or {})
+
+    def speed(self, model: str) -> float:
+        """The speed factor of a model (see model_speed)."""
+        matches = [prefix for prefix in self.model_speed if model and model.startswith(prefix)]
+        return self.model_speed[max(matches, key=len)] if matches else 1.0
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _digest(*parts) -> int:
+    return int(hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:12], 16)
+
+
+def _filler(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_FILLER_WORDS) for _ in range(words)).capitalize() + "."
+
+
+class FakeLLMBackend:
+    """
+    A deterministic, offline stand-in for the OpenAI chat-completions API. It recognises
+    the creator, section-revision and reviewer prompts used by the agents and answers
+    with canned documents of realistic size, simulating latency, token-rate-bound
+    generation, streaming and injected API errors. Answers depend only on the request
+    and the seed; latency and error draws come from a seeded generator.
+
+    Use client() / async_client() wherever an OpenAI / AsyncOpenAI client is expected,
+    e.g. BaseAgent(client=..., async_client=...) or Orchestrator(agent_kwargs=...).
+    """
+
+    def __init__(self, config: FakeLLMConfig = None):
+        self.config = config or FakeLLMConfig()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    # --- Canned responses ---
+
+    def respond(self, messages: list, response_format: dict = None) -> str:
+        """Returns the canned completion for a list of chat messages."""
+        if self.config.responder:
+            return self.config.responder(messages)
+        system = messages[0]["content"] if messages else ""
+        prompt = "\n".join(m["content"] for m in messages)
+        rng = random.Random(_digest(self.config.seed, prompt))
+        if "PRD) reviewer" in system:
+            if (response_format or {}).get("type") == "json_object":
+                return self._verdict(prompt, rng)
+            if VERDICT_MARKER in system:
+                # A streamed structured review: the free-text review, then its (consistent) verdict
+                review = self._review(prompt, random.Random(_digest(self.config.seed, prompt)))
+                return f"{review}\n{VERDICT_MARKER}\n{self._verdict(prompt, rng)}"
+            if "ASSESSMENT:" in system:
+                return self._aspect_review(prompt, rng)
+            return self._review(prompt, rng)
+        if "revising one section" in system:
+            return self._revised_section(prompt, rng)
+        if "provides a Product Requirements Document" in system:
+            return self._artifact(system, rng)
+        return self._prd(rng)
+
+    def _prd(self, rng: random.Random) -> str:
+        parts = ["# Product Requirements Document\n\n"]
+        for number, title in enumerate(CANNED_PRD_SECTIONS, start=1):
+            parts.append(f"## {number}. {title}\n\n{_filler(rng, self.config.section_words)}\n\n")
+        return "".join(parts)
+
+    def _artifact(self, system: str, rng: random.Random) -> str:
+        # A document derived from the PRD (WBS, risk register, test plan): its numbered headings, filled in
+        headings = re.findall(r"^\d+\.\s+\*\*(.+?):\*\*", system, re.MULTILINE)
+        return "\n\n".join(f"## {heading}\n\n{_filler(rng, self.config.section_words)}" for heading in headings)
+
+    def _revised_section(self, prompt: str, rng: random.Random) -> str:
+        match = re.search(r"exact heading line `([^`]+)`", prompt)
+        heading = match.group(1) if match else f"## 1. {CANNED_PRD_SECTIONS[0]}"
+        return f"{heading}\n\n{_filler(rng, self.config.section_words)}\n\n"
+
+    def _review(self, prompt: str, rng: random.Random) -> str:
+        _, sections = parse_prd_sections(prompt)
+        titles = [s.title for s in sections] or CANNED_PRD_SECTIONS
+        if rng.random() < self.config.satisfaction_rate:
+            return ("1.  **Overall Assessment:**\n    The PRD looks good and is satisfactory.\n"
+                    "2.  **Section-Specific Feedback:**\n    Each section is complete and clear.\n"
+                    "3.  **Cross-Cutting Issues:**\n    None found.\n"
+                    "4.  **Prioritized Recommendations:**\n    No critical changes required.")
+        flagged = rng.sample(titles, k=min(2, len(titles)))
+        lines = ["1.  **Overall Assessment:**", "    The PRD needs significant revision; several sections are incomplete.",
+                 "2.  **Section-Specific Feedback:**"]
+        lines += [f"    * **{title}:** {_filler(rng, 20)}" for title in titles]
+        lines += ["3.  **Cross-Cutting Issues:**", f"    {_filler(rng, 25)}",
+                  "4.  **Prioritized Recommendations:**"]
+        lines += [f"    {rank}. {title}: {_filler(rng, 15)}" for rank, title in enumerate(flagged, start=1)]
+        return "\n".join(lines)
+
+    def _verdict(self, prompt: str, rng: random.Random) -> str:
+        _, sections = parse_prd_sections(prompt)
+        titles = [s.title for s in sections] or CANNED_PRD_SECTIONS
+        satisfied = rng.random() < self.config.satisfaction_rate
+        low, high = (8.2, 9.6) if satisfied else (4.5, 7.8)
+        scores = [{"section": title, "score": round(rng.uniform(low, high), 1), "feedback": _filler(rng, 12)}
+                  for title in titles]
+        issues = []
+        if not satisfied:
+            for severity in ["high"] + rng.sample(["medium", "low"], k=rng.randint(0, 2)):
+                issues.append({"severity": severity, "section": rng.choice(titles),
+                               "issue": _filler(rng, 12), "recommendation": _filler(rng, 10)})
+        return json.dumps({
+            "summary": _filler(rng, 20),
+            "overall_score": round(sum(s["score"] for s in scores) / len(scores), 1),
+            "ready_for_development": satisfied,
+            "section_scores": scores,
+            "issues": issues,
+        })
+
+    def _aspect_review(self, prompt: str, rng: random.Random) -> str:
+        if rng.random() < self.config.satisfaction_rate:
+            return "ASSESSMENT: Complete and clear.\nISSUES:\n- none\nRECOMMENDATIONS:\n- none"
+        severity = rng.choice(["high", "medium", "low"])
+        # Whole-document aspects say where an issue occurs, as the response format asks
+        _, sections = parse_prd_sections(prompt)
+        where = f"In {rng.choice(sections).title}: " if len(sections) > 1 else ""
+        return (f"ASSESSMENT: {_filler(rng, 12)}\nISSUES:\n- [{severity}] {where}{_filler(rng, 12)}\n"
+                f"RECOMMENDATIONS:\n- {_filler(rng, 10)}")
+
+    # --- Simulation ---
+
+    def _draw(self, model: str = None) -> tuple:
+        """Draws (time to first token, error type or None) for one call to a model."""
+        config = self.config
+        with self._lock:
+            self.calls += 1
+            ttft = config.latency_s * self._rng.lognormvariate(0.0, config.latency_jitter) \
+                if config.latency_jitter > 0 else config.latency_s
+            error = None
+            if config.error_types and self._rng.random() < config.error_rate:
+                error = self._rng.choice(config.error_types)
+                self.errors += 1
+        return ttft * config.time_scale / config.speed(model), error
+
+    def _generation_time(self, completion_tokens: int, model: str = None) -> float:
+        return completion_tokens / self.config.tokens_per_second * self.config.time_scale / self.config.speed(model)
+
+    def _make_error(self, error: str) -> Exception:
+        if error == "rate_limit":
+            retry_after = f"{self.config.time_scale:g}"  # one simulated second
+            response = httpx.Response(429, request=_FAKE_REQUEST, headers={"retry-after": retry_after})
+            return RateLimitError("Rate limit reached (injected by fake backend)", response=response, body=None)
+        if error == "server_error":
+            response = httpx.Response(500, request=_FAKE_REQUEST)
+            return InternalServerError("Server error (injected by fake backend)", response=response, body=None)
+        if error == "timeout":
+            return APITimeoutError(request=_FAKE_REQUEST)
+        return APIConnectionError(message="Connection error (injected by fake backend)", request=_FAKE_REQUEST)
+
+    def _prepare(self, kwargs: dict) -> tuple:
+        messages = kwargs.get("messages", [])
+        content = self.respond(messages, kwargs.get("response_format"))
+        max_tokens = kwargs.get("max_tokens")
+        if max_tokens and _count_tokens(content) > max_tokens:
+            content = content[:max_tokens * 4]
+        usage = CompletionUsage(
+            prompt_tokens=sum(_count_tokens(m["content"]) for m in messages),
+            completion_tokens=_count_tokens(content),
+            total_tokens=0,
+        )
+        usage.total_tokens = usage.prompt_tokens + usage.completion_tokens
+        return content, usage
+
+    @staticmethod
+    def _completion(model: str, content: str, usage: CompletionUsage) -> ChatCompletion:
+        return ChatCompletion(
+            id=f"chatcmpl-fake-{uuid.uuid4().hex[:12]}", object="chat.completion", created=int(time.time()),
+            model=model, usage=usage,
+            choices=[Choice(index=0, finish_reason="stop",
+                            message=ChatCompletionMessage(role="assistant", content=content))],
+        )
+
+    @staticmethod
+    def _chunks(model: str, content: str, usage: CompletionUsage, include_usage: bool, pieces: int = 20):
+        completion_id = f"chatcmpl-fake-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        size = max(1, len(content) // pieces)
+        for start in range(0, len(content), size):
+            yield ChatCompletionChunk(
+                id=completion_id, object="chat.completion.chunk", created=created, model=model,
+                choices=[ChunkChoice(index=0, delta=ChoiceDelta(content=content[start:start + size]))],
+            )
+        if include_usage:
+            yield ChatCompletionChunk(id=completion_id, object="chat.completion.chunk", created=created,
+                                      model=model, choices=[], usage=usage)
+
+    def create(self, **kwargs):
+        """Synchronous chat.completions.create; returns a ChatCompletion or a chunk iterator."""
+        model = kwargs.get("model", "fake-model")
+        ttft, error = self._draw(model)
+        time.sleep(ttft)
+        if error:
+            raise self._make_error(error)
+        content, usage = self._prepare(kwargs)
+        if not kwargs.get("stream"):
+            time.sleep(self._generation_time(usage.completion_tokens, model))
+            return self._completion(model, content, usage)
+        include_usage = bool((kwargs.get("stream_options") or {}).get("include_usage"))
+
+        def stream():
+            chunks = list(self._chunks(model, content, usage, include_usage))
+            delay = self._generation_time(usage.completion_tokens, model) / max(1, len(chunks))
+            for chunk in chunks:
+                yield chunk
+                time.sleep(delay)
+        return stream()
+
+    async def acreate(self, **kwargs):
+        """Asynchronous chat.completions.create; returns a ChatCompletion or an async chunk iterator."""
+        model = kwargs.get("model", "fake-model")
+        ttft, error = self._draw(model)
+        await asyncio.sleep(ttft)
+        if error:
+            raise self._make_error(error)
+        content, usage = self._prepare(kwargs)
+        if not kwargs.get("stream"):
+            await asyncio.sleep(self._generation_time(usage.completion_tokens, model))
+            return self._completion(model, content, usage)
+        include_usage = bool((kwargs.get("stream_options") or {}).get("include_usage"))
+
+        async def stream():
+            chunks = list(self._chunks(model, content, usage, include_usage))
+            delay = self._generation_time(usage.completion_tokens, model) / max(1, len(chunks))
+            for chunk in chunks:
+                yield chunk
+                await asyncio.sleep(delay)
+        return stream()
+
+    # --- Client facades ---
+
+    def client(self):
+        """Returns an object shaped like openai.OpenAI (client.chat.completions.create)."""
+        return _FakeClient(self.create)
+
+    def async_client(self):
+        """Returns an object shaped like openai.AsyncOpenAI (await client.chat.completions.create)."""
+        return _FakeClient(self.acreate)
+
+    def agent_kwargs(self) -> dict:
+        """BaseAgent keyword arguments that route an agent's calls to this backend, uncached."""
+        return {"client": self.client(), "async_client": self.async_client(), "use_cache": False}
+
+
+def fake_agent_kwargs(config: FakeLLMConfig = None) -> dict:
+    """
+    Builds a fresh FakeLLMBackend and returns its agent_kwargs. Picklable through
+    functools.partial, so worker processes can create their own backend
+    (see Orchestrator's agent_kwargs_factory).
+    """
+    return FakeLLMBackend(config).agent_kwargs()
+
+
+class FakeBatchAPI:
+    """
+    An offline stand-in for the OpenAI Files and Batch APIs (client.files and client.batches),
+    e.g. BatchAPIBackend(client=FakeBatchAPI(...)). Each line of a batch is answered by a
+    FakeLLMBackend; its injected errors become lines of the batch's error file.
+
+    A batch is 'validating', then 'in_progress', and finishes turnaround_s (times the
+    backend's time_scale) after it was created: 'completed', or with probability
+    expire_rate 'expired' after answering only the first half of its requests.
+    """
+
+    # HTTP status of each injected error type in a batch's error file
+    ERROR_STATUS_CODES = {"rate_limit": 429, "server_error": 500, "timeout": 408, "connection": 503}
+
+    def __init__(self, backend: FakeLLMBackend = None, turnaround_s: float = 60.0, expire_rate: float = 0.0):
+        self.backend = backend or FakeLLMBackend()
+        self.turnaround_s = turnaround_s
+        self.expire_rate = expire_rate
+        self._rng = random.Random(self.backend.config.seed)
+        self._lock = threading.Lock()
+        self._files = {}  # file ID -> bytes
+        self._batches = {}  # batch ID -> dict of Batch fields
+        self._started = {}  # batch ID -> monotonic creation time
+        self.files = _FakeFiles(self)
+        self.batches = _FakeBatches(self)
+
+    def create_file(self, file, purpose: str) -> FileObject:
+        """files.create: file is bytes, a file object or a (filename, bytes) tuple."""
+        filename, data = file if isinstance(file, tuple) else ("upload.jsonl", file)
+        data = data.read() if hasattr(data, "read") else data
+        file_id = f"file-fake-{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self._files[file_id] = data
+        return FileObject(id=file_id, bytes=len(data), created_at=int(time.time()), filename=filename,
+                          object="file", purpose=purpose, status="processed")
+
+    def file_content(self, file_id: str):
+        """files.content: returns an object with .content (bytes) and .text."""
+        with self._lock:
+            if file_id not in self._files:
+                raise self._not_found(f"No such file: {file_id}")
+            return _FakeFileContent(self._files[file_id])
+
+    def create_batch(self, input_file_id: str, endpoint: str, completion_window: str, metadata: dict = None) -> Batch:
+        lines = self.file_content(input_file_id).text.splitlines()
+        batch_id = f"batch_fake_{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self._batches[batch_id] = {
+                "id": batch_id, "object": "batch", "endpoint": endpoint, "input_file_id": input_file_id,
+                "completion_window": completion_window, "status": "validating", "created_at": int(time.time()),
+                "metadata": metadata, "request_counts": {"completed": 0, "failed": 0, "total": len(lines)}}
+            self._started[batch_id] = time.monotonic()
+        return self.retrieve_batch(batch_id)
+
+    def retrieve_batch(self, batch_id: str) -> Batch:
+        with self._lock:
+            if batch_id not in self._batches:
+                raise self._not_found(f"No such batch: {batch_id}")
+            fields = self._batches[batch_id]
+            elapsed = time.monotonic() - self._started[batch_id]
+            turnaround = self.turnaround_s * self.backend.config.time_scale
+            if fields["status"] in ("validating", "in_progress"):
+                if elapsed >= turnaround:
+                    self._finish(fields)
+                elif elapsed >= 0.1 * turnaround:
+                    fields["status"] = "in_progress"
+            return Batch.model_validate(fields)
+
+    def cancel_batch(self, batch_id: str) -> Batch:
+        with self._lock:
+            if batch_id not in self._batches:
+                raise self._not_found(f"No such batch: {batch_id}")
+            if self._batches[batch_id]["status"] in ("validating", "in_progress"):
+                self._batches[batch_id]["status"] = "cancelled"
+        return self.retrieve_batch(batch_id)
+
+    def _finish(self, fields: dict):
+        # Callers hold self._lock
+        requests = [json.loads(line) for line in self._files[fields["input_file_id"]].decode("utf-8").splitlines()
+                    if line.strip()]
+        expired = self._rng.random() < self.expire_rate
+        if expired:
+            requests = requests[:len(requests) // 2]
+        outputs, errors = [], []
+        for number, request in enumerate(requests):
+            body = request["body"]
+            model = body.get("model", "fake-model")
+            _, error = self.backend._draw(model)
+            line = {"id": f"batch_req_{number}", "custom_id": request["custom_id"], "error": None}
+            if error:
+                line["response"] = {"status_code": self.ERROR_STATUS_CODES[error],
+                                    "body": {"error": {"message": f"{error} (injected by fake backend)", "type": error}}}
+                errors.append(line)
+            else:
+                content, usage = self.backend._prepare(body)
+                line["response"] = {"status_code": 200, "body": self.backend._completion(model, content, usage).model_dump()}
+                outputs.append(line)
+        for key, lines in (("output_file_id", outputs), ("error_file_id", errors)):
+            if lines:
+                file_id = f"file-fake-{uuid.uuid4().hex[:12]}"
+                self._files[file_id] = "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+                fields[key] = file_id
+        fields["status"] = "expired" if expired else "completed"
+        fields["request_counts"].update(completed=len(outputs), failed=len(errors))
+
+    @staticmethod
+    def _not_found(message: str) -> NotFoundError:
+        return NotFoundError(message, response=httpx.Response(404, request=_FAKE_REQUEST), body=None)
+
+
+class _FakeFileContent:
+    def __init__(self, content: bytes):
+        self.content = content
+        self.text = content.decode("utf-8")
+
+
+class _FakeFiles:
+    def __init__(self, api: FakeBatchAPI):
+        self.create = api.create_file
+        self.content = api.file_content
+
+
+class _FakeBatches:
+    def __init__(self, api: FakeBatchAPI):
+        self.create = api.create_batch
+        self.retrieve = api.retrieve_batch
+        self.cancel = api.cancel_batch
+
+
+class _FakeCompletions:
+    def __init__(self, create):
+        self.create = create
+
+
+class _FakeChat:
+    def __init__(self, create):
+        self.completions = _FakeCompletions(create)
+
+
+class _FakeClient:
+    def __init__(self, create):
+        self.chat = _FakeChat(create)
@@ -0,0 +1,75 @@
+# Agents/File_Lock.py
+
+import os
+import time
+
+
+class FileLockTimeout(TimeoutError):
+    """Raised when a FileLock cannot be acquired within its timeout."""
+
+
+class FileLock:
+    """
+    Cross-process (and cross-thread) mutual exclusion based on creating a lock
+    file with O_CREAT | O_EXCL, which is atomic on both POSIX and Windows.
+    Lock files left behind by a crashed process are broken after stale_after seconds.
+
+    Usage:
+        with FileLock(path + ".lock"):
+            ...
+    """
+
+    def __init__(self, lock_path: str, timeout: float = 30.0, stale_after: float = 60.0, poll_interval: float = 0.01):
+        """
+        Args:
+            lock_path (str): Path of the lock file to create.
+            timeout (float): Seconds to wait for the lock before raising FileLockTimeout.
+            stale_after (float): Age in seconds after which an existing lock file is considered abandoned.
+            poll_interval (float): Initial wait between acquisition attempts (doubles up to 0.2s).
+        """
+        self.lock_path = lock_path
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+        self._fd = None
+
+    def _break_if_stale(self):
+        try:
+            if time.time() - os.path.getmtime(self.lock_path) > self.stale_after:
+                os.remove(self.lock_path)
+                print(f"Warning: Removed stale lock file '{self.lock_path}'.")
+        except OSError:
+            pass  # Lock was released (or broken) by someone else in the meantime
+
+    def acquire(self):
+        """Blocks until the lock file is created by this holder."""
+        deadline = time.monotonic() + self.timeout
+        delay = self.poll_interval
+        while True:
+            try:
+                self._fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(self._fd, str(os.getpid()).encode("ascii"))
+                return
+            except FileExistsError:
+                self._break_if_stale()
+                if time.monotonic() >= deadline:
+                    raise FileLockTimeout(f"Timed out waiting for lock '{self.lock_path}'.")
+                time.sleep(delay)
+                delay = min(delay * 2, 0.2)
+
+    def release(self):
+        """Releases the lock by closing and deleting the lock file."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            try:
+                os.remove(self.lock_path)
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
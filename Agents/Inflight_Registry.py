@@ -0,0 +1,262 @@
+# Agents/Inflight_Registry.py
+
+import asyncio
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from Agents.LLM_Cache import DEFAULT_CACHE_DIR
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+class InflightRegistry:
+    """
+    Registry of work in progress (LLM requests, whole workflows), shared by every thread
+    and process on the host through a SQLite file in WAL mode. Before starting a piece of
+    work, a caller claims its key; a caller that finds the key already claimed waits for
+    the claim to be released and then reads the result from wherever the owner stored it
+    (e.g. the shared LLMCache disk tier), instead of repeating the work. This lets several
+    Streamlit replicas on one host share their API calls and workflows.
+
+    Owners refresh a heartbeat on their claims from a background thread; a claim whose
+    heartbeat is older than stale_after (its process crashed or hung) is taken over.
+    """
+
+    def __init__(self, db_path: str, stale_after: float = 30.0, poll_interval: float = 0.05,
+                 max_poll_interval: float = 0.5):
+        """
+        Args:
+            db_path (str): Path of the SQLite file. Created if it does not exist.
+            stale_after (float): Seconds without a heartbeat after which a claim is considered abandoned.
+            poll_interval (float): Initial wait between checks of a claim held by another process
+                                   (doubles up to max_poll_interval). Waiters in the owner's own
+                                   process are woken as soon as it releases the claim.
+            max_poll_interval (float): Longest wait between checks.
+        """
+        self.db_path = db_path
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._lock = threading.RLock()
+        self._owner_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._owned = {}  # key -> (claim token, threading.Event set on release)
+        self._heartbeat = None
+        self._stats = {"claims": 0, "takeovers": 0, "waits": 0, "shared_results": 0}
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Claims only need to survive the processes holding them, not power loss
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS inflight ("
+            " key TEXT PRIMARY KEY, owner TEXT NOT NULL, started_at REAL NOT NULL, heartbeat_at REAL NOT NULL)")
+        self._conn.commit()
+
+    def try_claim(self, key: str):
+        """
+        Claims a key if no live claim holds it.
+
+        Returns:
+            str | None: The claim token to pass to release, or None if another caller holds the key.
+        """
+        token = f"{self._owner_prefix}:{uuid.uuid4().hex[:8]}"
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT owner, heartbeat_at FROM inflight WHERE key = ?", (key,)).fetchone()
+            # One atomic statement: insert, or take over a claim whose heartbeat stopped
+            cursor = self._conn.execute(
+                "INSERT INTO inflight (key, owner, started_at, heartbeat_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, started_at = excluded.started_at,"
+                " heartbeat_at = excluded.heartbeat_at WHERE inflight.heartbeat_at < ?",
+                (key, token, now, now, now - self.stale_after))
+            self._conn.commit()
+            if cursor.rowcount != 1:
+                return None
+            if previous is not None and previous[1] < now - self.stale_after:
+                self._stats["takeovers"] += 1
+                print(f"Warning: Took over the abandoned in-flight claim of '{previous[0]}'.")
+            self._stats["claims"] += 1
+            self._owned[key] = (token, threading.Event())
+            self._start_heartbeat()
+        return token
+
+    def release(self, key: str, token: str):
+        """Releases a claim made by try_claim. Does nothing if token is None or no longer owns the key."""
+        if token is None:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM inflight WHERE key = ? AND owner = ?", (key, token))
+            self._conn.commit()
+            owned = self._owned.get(key)
+            if owned is None or owned[0] != token:
+                return
+            del self._owned[key]
+        owned[1].set()
+
+    def is_claimed(self, key: str) -> bool:
+        """True if a live claim (one with a recent heartbeat) holds the key."""
+        with self._lock:
+            row = self._conn.execute("SELECT heartbeat_at FROM inflight WHERE key = ?", (key,)).fetchone()
+        return row is not None and time.time() - row[0] <= self.stale_after
+
+    def _pauses(self, timeout: float):
+        """Yields how long to wait before the next check of a claim, until the timeout expires."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = self.poll_interval
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return
+            yield delay if remaining is None else min(delay, remaining)
+            delay = min(delay * 2, self.max_poll_interval)
+
+    def wait(self, key: str, timeout: float = None) -> bool:
+        """
+        Blocks while a live claim holds the key.
+
+        Returns:
+            bool: True once the key is free (released, or its claim went stale), False on timeout.
+        """
+        pauses = self._pauses(timeout)
+        while self.is_claimed(key):
+            pause = next(pauses, None)
+            if pause is None:
+                return False
+            with self._lock:
+                owned = self._owned.get(key)
+            if owned is not None:
+                owned[1].wait(pause)
+            else:
+                time.sleep(pause)
+        return True
+
+    async def await_release(self, key: str, timeout: float = None) -> bool:
+        """Async version of wait; polls without blocking the event loop."""
+        pauses = self._pauses(timeout)
+        while await asyncio.to_thread(self.is_claimed, key):
+            pause = next(pauses, None)
+            if pause is None:
+                return False
+            await asyncio.sleep(pause)
+        return True
+
+    def claim_or_wait(self, key: str, lookup, timeout: float = None) -> tuple:
+        """
+        Claims a key, or waits for the caller holding it and returns its result.
+
+        Args:
+            key (str): Identifies the work, e.g. an LLM cache key.
+            lookup (callable): lookup() returns the stored result of the work, or None.
+            timeout (float, optional): Longest wait for another caller. Unbounded if None.
+
+        Returns:
+            tuple: (token, result). With a token, this caller does the work and then calls
+                   release(key, token). With a result, another caller did it. (None, None) means
+                   the wait timed out: do the work without a claim.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            token = self.try_claim(key)
+            # The previous owner may have finished between the caller's own lookup and the claim
+            result = lookup()
+            if result is not None:
+                self.release(key, token)
+                self._count_shared()
+                return None, result
+            if token is not None:
+                return token, None
+            self._count_wait()
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self.wait(key, remaining):
+                return None, None
+            # Released without a result (the owner failed): claim the work for this caller
+
+    async def aclaim_or_wait(self, key: str, lookup, timeout: float = None) -> tuple:
+        """
+        Async version of claim_or_wait. lookup is a regular synchronous callable; it runs in a
+        worker thread, like the registry's own SQLite calls, so neither blocks the event loop.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            token = await asyncio.to_thread(self.try_claim, key)
+            result = await asyncio.to_thread(lookup)
+            if result is not None:
+                await asyncio.to_thread(self.release, key, token)
+                self._count_shared()
+                return None, result
+            if token is not None:
+                return token, None
+            self._count_wait()
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not await self.await_release(key, remaining):
+                return None, None
+
+    def _count_wait(self):
+        with self._lock:
+            self._stats["waits"] += 1
+
+    def _count_shared(self):
+        with self._lock:
+            self._stats["shared_results"] += 1
+
+    def _start_heartbeat(self):
+        if self._heartbeat is None or not self._heartbeat.is_alive():
+            self._heartbeat = threading.Thread(target=self._beat, name="inflight-heartbeat", daemon=True)
+            self._heartbeat.start()
+
+    def _beat(self):
+        """Refreshes the heartbeat of this process's claims until it holds none."""
+        while True:
+            time.sleep(self.stale_after / 3)
+            with self._lock:
+                tokens = [token for token, _ in self._owned.values()]
+                if not tokens:
+                    self._heartbeat = None
+                    return
+                try:
+                    self._conn.executemany("UPDATE inflight SET heartbeat_at = ? WHERE owner = ?",
+                                           [(time.time(), token) for token in tokens])
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    print(f"Warning: Could not refresh in-flight claims: {e}")
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: 'claims', 'takeovers', 'waits' and 'shared_results' of this process, plus
+                  'owned' (claims it holds now) and 'in_flight' (live claims of all processes).
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["owned"] = len(self._owned)
+            stats["in_flight"] = self._conn.execute(
+                "SELECT COUNT(*) FROM inflight WHERE heartbeat_at >= ?",
+                (time.time() - self.stale_after,)).fetchone()[0]
+        return stats
+
+
+def get_default_inflight_registry():
+    """
+    Returns the process-wide in-flight registry, creating it on first use. Configured through:
+        PRECISIONAI_INFLIGHT              - set to "0" to stop sharing in-flight work between callers.
+        PRECISIONAI_INFLIGHT_DIR          - directory for the SQLite file (default: '.cache'); processes
+                                            share their work only if they use the same directory.
+        PRECISIONAI_INFLIGHT_STALE_AFTER  - seconds without a heartbeat before a claim is taken over (default: 30).
+
+    Returns:
+        InflightRegistry | None: The shared registry, or None if it is disabled.
+    """
+    global _default_registry
+    if os.environ.get("PRECISIONAI_INFLIGHT", "1") == "0":
+        return None
+    with _default_registry_lock:
+        if _default_registry is None:
+            directory = os.environ.get("PRECISIONAI_INFLIGHT_DIR", DEFAULT_CACHE_DIR)
+            stale_after = float(os.environ.get("PRECISIONAI_INFLIGHT_STALE_AFTER", 30))
+            _default_registry = InflightRegistry(os.path.join(directory, "inflight.sqlite3"), stale_after=stale_after)
+        return _default_registry
@@ -0,0 +1,388 @@
+# Agents/Instrumentation.py
+
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+
+# Approximate USD prices per 1M tokens as (input, output). Models are matched by the
+# longest prefix, so dated snapshots such as 'gpt-4o-2024-08-06' resolve to 'gpt-4o'.
+MODEL_PRICING = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+# Batch API requests are billed at this fraction of the regular prices
+BATCH_PRICE_FACTOR = 0.5
+
+# Histogram bucket upper bounds (seconds) for the Prometheus exposition
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120, 300)
+
+_current_run_id = contextvars.ContextVar("precisionai_run_id", default=None)
+_active_tallies = contextvars.ContextVar("precisionai_usage_tallies", default=())
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    Estimates the USD cost of a call from MODEL_PRICING. Unknown models cost 0.
+
+    Returns:
+        float: Estimated cost in USD.
+    """
+    matches = [name for name in MODEL_PRICING if model and model.startswith(name)]
+    if not matches:
+        return 0.0
+    input_price, output_price = MODEL_PRICING[max(matches, key=len)]
+    return ((prompt_tokens or 0) * input_price + (completion_tokens or 0) * output_price) / 1_000_000
+
+
+def current_run_id():
+    """Returns the workflow run ID active in the current context, or None."""
+    return _current_run_id.get()
+
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """
+    Submits fn to a concurrent.futures executor so that it runs with a copy of the
+    caller's context variables (e.g. the current run ID). Plain executor.submit would
+    run it with the worker thread's own, empty context.
+    """
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class LLMCallRecord:
+    """Measurements for a single LLM call."""
+
+    def __init__(self, agent: str, model: str, wall_time_s: float, prompt_tokens: int = 0,
+                 completion_tokens: int = 0, ttft_s: float = None, cache_status: str = "disabled",
+                 retries: int = 0, stream: bool = False, error: str = None, run_id: str = None,
+                 started_at: float = None, hedged: bool = False, batch: bool = False):
+        self.kind = "llm_call"
+        self.run_id = run_id if run_id is not None else current_run_id()
+        self.agent = agent
+        self.model = model
+        self.started_at = started_at if started_at is not None else time.time() - wall_time_s
+        self.wall_time_s = wall_time_s
+        # Non-streaming calls only return once complete, so their first token arrives at the end
+        self.ttft_s = ttft_s if ttft_s is not None else wall_time_s
+        self.prompt_tokens = prompt_tokens or 0
+        self.completion_tokens = completion_tokens or 0
+        self.cost_usd = estimate_cost(model, self.prompt_tokens, self.completion_tokens) if cache_status != "hit" else 0.0
+        if batch:
+            self.cost_usd *= BATCH_PRICE_FACTOR
+        self.cache_status = cache_status  # "hit", "miss" or "disabled"
+        self.retries = retries
+        self.hedged = hedged  # a second, hedged request was sent
+        self.stream = stream
+        self.error = error
+        self.batch = batch  # answered through the Batch API
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class IterationRecord:
+    """Measurements for one creator/reviewer iteration of a PRD workflow."""
+
+    def __init__(self, iteration: int, wall_time_s: float, creator_s: float, reviewer_s: float,
+                 satisfactory: bool, run_id: str = None, score: float = None):
+        self.kind = "iteration"
+        self.run_id = run_id if run_id is not None else current_run_id()
+        self.iteration = iteration
+        self.wall_time_s = wall_time_s
+        self.creator_s = creator_s
+        self.reviewer_s = reviewer_s
+        self.satisfactory = satisfactory
+        self.score = score  # the reviewer's overall score, if it returned a structured verdict
+        self.recorded_at = time.time()
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class UsageTally:
+    """Token usage and cost of the LLM calls made inside an Instrumentation.usage_tally block."""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+        self.models = defaultdict(int)  # (agent, model) -> calls
+        self._lock = threading.Lock()
+
+    def add(self, record: LLMCallRecord):
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += record.prompt_tokens
+            self.completion_tokens += record.completion_tokens
+            self.cost_usd += record.cost_usd
+            self.models[(record.agent, record.model)] += 1
+
+    def merge(self, other: "UsageTally"):
+        """Adds the totals of another tally to this one."""
+        with self._lock:
+            self.calls += other.calls
+            self.prompt_tokens += other.prompt_tokens
+            self.completion_tokens += other.completion_tokens
+            self.cost_usd += other.cost_usd
+            for key, calls in other.models.items():
+                self.models[key] += calls
+
+    def model_of(self, agent: str):
+        """The model that served most of an agent's calls in this tally (routing may vary it), or None."""
+        with self._lock:
+            counts = {model: calls for (name, model), calls in self.models.items() if name == agent}
+        return max(counts, key=counts.get) if counts else None
+
+
+class InMemoryAggregateSink:
+    """
+    Keeps running totals per (agent, model) plus the raw records of the most recent
+    runs, so a UI can show a per-run breakdown.
+    """
+
+    def __init__(self, max_runs: int = 100):
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+        self._totals = defaultdict(lambda: defaultdict(float))
+        self._runs = OrderedDict()  # run_id -> list of records
+
+    def handle(self, record):
+        with self._lock:
+            if record.kind == "llm_call":
+                totals = self._totals[(record.agent, record.model)]
+                totals["calls"] += 1
+                totals["wall_time_s"] += record.wall_time_s
+                totals["prompt_tokens"] += record.prompt_tokens
+                totals["completion_tokens"] += record.completion_tokens
+                totals["cost_usd"] += record.cost_usd
+                totals["retries"] += record.retries
+                totals["hedged"] += record.hedged
+                totals["cache_hits"] += record.cache_status == "hit"
+                totals["errors"] += record.error is not None
+            if record.run_id is not None:
+                self._runs.setdefault(record.run_id, []).append(record)
+                self._runs.move_to_end(record.run_id)
+                while len(self._runs) > self.max_runs:
+                    self._runs.popitem(last=False)
+
+    def aggregates(self) -> list:
+        """
+        Returns:
+            list[dict]: One row of totals per (agent, model), including mean latency.
+        """
+        with self._lock:
+            rows = []
+            for (agent, model), totals in self._totals.items():
+                row = {"agent": agent, "model": model, **totals}
+                row["mean_wall_time_s"] = totals["wall_time_s"] / totals["calls"] if totals["calls"] else 0.0
+                rows.append(row)
+            return rows
+
+    def run_breakdown(self, run_id: str) -> dict:
+        """
+        Summarizes one workflow run.
+
+        Returns:
+            dict: {'calls': [...], 'iterations': [...], 'totals': {...}} with records as dicts.
+        """
+        with self._lock:
+            records = list(self._runs.get(run_id, []))
+        calls = [r.to_dict() for r in records if r.kind == "llm_call"]
+        iterations = [r.to_dict() for r in records if r.kind == "iteration"]
+        totals = {
+            "llm_calls": len(calls),
+            "cache_hits": sum(1 for c in calls if c["cache_status"] == "hit"),
+            "llm_time_s": sum(c["wall_time_s"] for c in calls),
+            "workflow_time_s": sum(i["wall_time_s"] for i in iterations),
+            "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+            "completion_tokens": sum(c["completion_tokens"] for c in calls),
+            "cost_usd": sum(c["cost_usd"] for c in calls),
+            "retries": sum(c["retries"] for c in calls),
+            "errors": sum(1 for c in calls if c["error"]),
+        }
+        return {"calls": calls, "iterations": iterations, "totals": totals}
+
+
+class JSONLSink:
+    """Appends every record as one JSON line to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def handle(self, record):
+        line = json.dumps(record.to_dict(), ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class PrometheusTextSink:
+    """
+    Accumulates counters and latency histograms and renders them in the Prometheus
+    text exposition format, e.g. for a /metrics endpoint or the node-exporter textfile collector.
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)  # (metric, labels) -> value
+        self._histograms = {}  # (metric, labels) -> [bucket counts..., sum, count]
+
+    def _observe(self, metric: str, labels: tuple, value: float):
+        key = (metric, labels)
+        histogram = self._histograms.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                histogram[index] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+    def handle(self, record):
+        with self._lock:
+            if record.kind == "llm_call":
+                labels = (("agent", record.agent), ("model", record.model))
+                self._counters[("precisionai_llm_calls_total", labels + (("cache", record.cache_status),))] += 1
+                self._counters[("precisionai_llm_tokens_total", labels + (("type", "prompt"),))] += record.prompt_tokens
+                self._counters[("precisionai_llm_tokens_total", labels + (("type", "completion"),))] += record.completion_tokens
+                self._counters[("precisionai_llm_cost_usd_total", labels)] += record.cost_usd
+                self._counters[("precisionai_llm_retries_total", labels)] += record.retries
+                self._counters[("precisionai_llm_hedged_requests_total", labels)] += record.hedged
+                if record.error is not None:
+                    self._counters[("precisionai_llm_errors_total", labels)] += 1
+                self._observe("precisionai_llm_call_duration_seconds", labels, record.wall_time_s)
+                self._observe("precisionai_llm_time_to_first_token_seconds", labels, record.ttft_s)
+            elif record.kind == "iteration":
+                self._observe("precisionai_workflow_iteration_duration_seconds", (), record.wall_time_s)
+
+    @staticmethod
+    def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+        pairs = labels + extra
+        if not pairs:
+            return ""
+        def escape(value):
+            return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in pairs) + "}"
+
+    def render(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            typed = set()
+            for (metric, labels), value in sorted(self._counters.items()):
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} counter")
+                    typed.add(metric)
+                lines.append(f"{metric}{self._format_labels(labels)} {value:g}")
+            for (metric, labels), histogram in sorted(self._histograms.items()):
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} histogram")
+                    typed.add(metric)
+                for bound, count in zip(self.buckets, histogram):
+                    lines.append(f"{metric}_bucket{self._format_labels(labels, (('le', f'{bound:g}'),))} {count}")
+                lines.append(f"{metric}_bucket{self._format_labels(labels, (('le', '+Inf'),))} {histogram[-1]}")
+                lines.append(f"{metric}_sum{self._format_labels(labels)} {histogram[-2]:g}")
+                lines.append(f"{metric}_count{self._format_labels(labels)} {histogram[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+class Instrumentation:
+    """
+    Fans records out to pluggable sinks. A sink is any object with a handle(record) method.
+    Sink failures are reported but never break the workflow being measured.
+    """
+
+    def __init__(self, sinks: list = None):
+        self.sinks = list(sinks or [])
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def remove_sink(self, sink):
+        if sink in self.sinks:
+            self.sinks.remove(sink)
+
+    def record(self, record):
+        if record.kind == "llm_call":
+            for tally in _active_tallies.get():
+                tally.add(record)
+        for sink in list(self.sinks):
+            try:
+                sink.handle(record)
+            except Exception as e:
+                print(f"Warning: Instrumentation sink {sink.__class__.__name__} failed: {e}")
+
+    def find_sink(self, sink_type):
+        """Returns the first registered sink of the given type, or None."""
+        return next((sink for sink in self.sinks if isinstance(sink, sink_type)), None)
+
+    @contextlib.contextmanager
+    def run_context(self, run_id: str = None):
+        """
+        Tags every record produced inside the block with a workflow run ID.
+        If a run is already active and no run_id is given, the active run is kept,
+        so nested workflow calls are attributed to the outer run.
+
+        Yields:
+            str: The active run ID.
+        """
+        active = current_run_id()
+        if run_id is None and active is not None:
+            yield active
+            return
+        token = _current_run_id.set(run_id or uuid.uuid4().hex[:12])
+        try:
+            yield _current_run_id.get()
+        finally:
+            _current_run_id.reset(token)
+
+
+    @contextlib.contextmanager
+    def usage_tally(self):
+        """
+        Adds up the token usage of every LLM call recorded inside the block, including calls
+        on threads started with submit_in_context. Blocks can be nested.
+
+        Yields:
+            UsageTally: The running totals.
+        """
+        tally = UsageTally()
+        token = _active_tallies.set(_active_tallies.get() + (tally,))
+        try:
+            yield tally
+        finally:
+            _active_tallies.reset(token)
+
+
+_default_instrumentation = None
+_default_lock = threading.Lock()
+
+
+def get_instrumentation() -> Instrumentation:
+    """
+    Returns the process-wide Instrumentation used by agents and the orchestrator.
+    It always has an InMemoryAggregateSink and a PrometheusTextSink; setting
+    PRECISIONAI_METRICS_JSONL to a file path also adds a JSONLSink.
+    """
+    global _default_instrumentation
+    with _default_lock:
+        if _default_instrumentation is None:
+            instrumentation = Instrumentation([InMemoryAggregateSink(), PrometheusTextSink()])
+            jsonl_path = os.environ.get("PRECISIONAI_METRICS_JSONL")
+            if jsonl_path:
+                instrumentation.add_sink(JSONLSink(jsonl_path))
+            _default_instrumentation = instrumentation
+        return _default_instrumentation
@@ -0,0 +1,203 @@
+# Agents/Job_Runner.py
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from Agents.Checkpoint_Store import hash_workflow_inputs
+from Agents.Orchestrator_Agent import Orchestrator
+
+# Streamed text events that are accumulated into the job's partial output instead of its event log
+CHUNK_EVENTS = ("prd_chunk", "review_chunk")
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised by JobRunner.submit when max_pending jobs are already queued or running."""
+
+
+class Job:
+    """
+    One PRD workflow running in the background. Progress is kept as the workflow's
+    event log (see Orchestrator.stream_prd_workflow) minus the text chunks, which are
+    accumulated into the current iteration's partial PRD and review instead.
+
+    status is 'queued', 'running', 'completed' or 'failed'.
+    """
+
+    def __init__(self, inputs: tuple, max_iterations: int):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.run_id = self.job_id
+        self.inputs = tuple(inputs)
+        self.inputs_hash = hash_workflow_inputs(self.inputs)
+        self.max_iterations = max_iterations
+        self.status = "queued"
+        self.events = []
+        self.partial = {kind: "" for kind in CHUNK_EVENTS}
+        self.content = None
+        self.path = None
+        self.error = None  # the exception of a failed job
+        self.created_at = time.time()
+        self.finished_at = None
+        self.submissions = 1  # identical submissions coalesced into this job
+        self._lock = threading.Lock()
+        self._done_event = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def wait(self, timeout: float = None) -> bool:
+        """Blocks until the job is done or the timeout expires; returns whether it is done."""
+        return self._done_event.wait(timeout)
+
+    def _record(self, event: dict):
+        with self._lock:
+            kind = event["event"]
+            if kind in CHUNK_EVENTS:
+                self.partial[kind] += event["text"]
+                return
+            if kind == "iteration_started":
+                self.partial = {k: "" for k in CHUNK_EVENTS}
+            self.events.append(event)
+
+    def _finish(self, status: str, content: str = None, path: str = None, error: Exception = None):
+        with self._lock:
+            self.status, self.content, self.path, self.error = status, content, path, error
+            self.partial = {kind: "" for kind in CHUNK_EVENTS}
+            self.finished_at = time.time()
+        self._done_event.set()
+
+    def progress(self) -> float:
+        """Rough completion fraction (0.0-1.0): each iteration counts as a PRD step and a review step."""
+        if self.status == "completed":
+            return 1.0
+        steps = sum(1 for event in self.events if event["event"] in ("prd_saved", "review_completed"))
+        resumed = next((e["iteration"] for e in self.events if e["event"] == "workflow_resumed"), 0)
+        return min(0.99, (steps + 2 * resumed) / (2 * max(1, self.max_iterations)))
+
+    def snapshot(self) -> dict:
+        """A consistent copy of the job's state, safe to render while the job keeps running."""
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "run_id": self.run_id,
+                "status": self.status,
+                "events": list(self.events),
+                "partial": dict(self.partial),
+                "content": self.content,
+                "path": self.path,
+                "error": self.error,
+                "progress": self.progress(),
+                "elapsed_s": (self.finished_at or time.time()) - self.created_at,
+            }
+
+    def __repr__(self):
+        return f"Job({self.job_id!r}, status={self.status!r})"
+
+
+class JobRunner:
+    """
+    Runs PRD workflows on a background thread pool so the caller (e.g. a Streamlit
+    script) never blocks on them and can poll their progress by job ID.
+
+    Submissions are memoized on a hash of the four inputs: an identical submission
+    returns the running job, or the finished one instantly, instead of starting a new
+    workflow. Failed jobs are not memoized, so submitting again retries them.
+    """
+
+    def __init__(self, orchestrator: Orchestrator, max_workers: int = 4, max_jobs: int = 256,
+                 max_pending: int = None):
+        """
+        Args:
+            orchestrator (Orchestrator): The orchestrator whose agents run the workflows.
+            max_workers (int): Workflows running at once; further jobs wait in the queue.
+            max_jobs (int): Finished jobs kept for lookup and memoization (oldest are evicted).
+            max_pending (int, optional): Maximum queued plus running jobs. New (non-coalesced)
+                                         submissions beyond it raise JobQueueFullError. Unbounded if None.
+        """
+        self.orchestrator = orchestrator
+        self.max_jobs = max_jobs
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prd-job")
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()  # job_id -> Job, oldest first
+        self._by_inputs = {}  # inputs hash -> job_id of the latest non-failed job
+
+    def submit(self, front_end_reqs: str, middleware_reqs: str, backend_reqs: str, other_details: str) -> Job:
+        """
+        Starts a workflow in the background, or returns the memoized job for identical inputs.
+
+        Returns:
+            Job: The job; check job.status or poll get(job.job_id) for progress.
+
+        Raises:
+            JobQueueFullError: If the inputs are new and max_pending jobs are already in flight.
+        """
+        inputs = (front_end_reqs, middleware_reqs, backend_reqs, other_details)
+        inputs_hash = hash_workflow_inputs(inputs)
+        with self._lock:
+            existing = self._jobs.get(self._by_inputs.get(inputs_hash))
+            if existing is not None and existing.status != "failed":
+                existing.submissions += 1
+                self._jobs.move_to_end(existing.job_id)
+                return existing
+            if self.max_pending is not None and self._pending_count() >= self.max_pending:
+                raise JobQueueFullError(f"{self.max_pending} jobs are already queued or running.")
+            job = Job(inputs, self.orchestrator.max_review_iterations)
+            self._jobs[job.job_id] = job
+            self._by_inputs[inputs_hash] = job.job_id
+            self._evict()
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str):
+        """Returns the job with this ID, or None if it is unknown or was evicted."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def find(self, front_end_reqs: str, middleware_reqs: str, backend_reqs: str, other_details: str):
+        """Returns the memoized job for these inputs, or None."""
+        inputs_hash = hash_workflow_inputs((front_end_reqs, middleware_reqs, backend_reqs, other_details))
+        with self._lock:
+            return self._jobs.get(self._by_inputs.get(inputs_hash))
+
+    def stats(self) -> dict:
+        """Number of known jobs per status."""
+        with self._lock:
+            counts = {"queued": 0, "running": 0, "completed": 0, "failed": 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return counts
+
+    def _pending_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if not job.done)
+
+    def _evict(self):
+        # Drop the oldest finished jobs beyond max_jobs; queued and running jobs are always kept
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            job = self._jobs.pop(job_id)
+            if self._by_inputs.get(job.inputs_hash) == job_id:
+                del self._by_inputs[job.inputs_hash]
+
+    def _run(self, job: Job):
+        job.status = "running"
+        try:
+            # Continue a run for the same inputs that was cut off by a crash or restart
+            workflow_id = self.orchestrator.find_resumable_workflow(*job.inputs)
+            for event in self.orchestrator.stream_prd_workflow(*job.inputs, run_id=job.run_id,
+                                                                workflow_id=workflow_id):
+                job._record(event)
+                if event["event"] == "workflow_completed":
+                    job._finish("completed", event["content"], event["path"])
+            if not job.done:
+                job._finish("failed", error=RuntimeError("The workflow ended without a result."))
+        except Exception as e:
+            print(f"Background job {job.job_id} failed: {e}")
+            job._finish("failed", error=e)
+
+    def shutdown(self, wait: bool = True):
+        """Stops accepting jobs; with wait=True, blocks until the running ones finish."""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,395 @@
+# Agents/LLM_Backends.py
+
+import asyncio
+import os
+import threading
+import weakref
+
+try:
+    import llama_cpp  # Optional: in-process CPU inference for LlamaCppBackend (pip install llama-cpp-python).
+except ImportError:
+    llama_cpp = None
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from Agents.Client_Registry import get_async_openai_client, get_openai_client, load_environment
+from Agents.Resilience import DeadlineExceededError
+
+_default_backend = None
+_default_backend_lock = threading.Lock()
+_registered_backends = []  # explicitly registered backends, consulted before the default one
+
+# OpenAI-compatible local servers: default endpoint and how many requests each decodes together
+# (llama.cpp 'llama-server --parallel 4', vLLM's continuous batching, OLLAMA_NUM_PARALLEL)
+LOCAL_SERVER_PRESETS = {
+    "llama_cpp_server": {"base_url": "http://127.0.0.1:8080/v1", "max_concurrency": 4, "max_batch_size": 4},
+    "vllm": {"base_url": "http://127.0.0.1:8000/v1", "max_concurrency": 64, "max_batch_size": 16},
+    "ollama": {"base_url": "http://127.0.0.1:11434/v1", "max_concurrency": 4, "max_batch_size": 4},
+}
+
+
+def parse_model_map(text: str):
+    """
+    Parses a comma-separated list of model names, each optionally mapped to the name the
+    backend knows it by ('gpt-4o-mini=llama3.1:8b,qwen2.5:7b').
+
+    Returns:
+        dict | None: Requested model -> served model, or None for an empty list (serve every model).
+    """
+    models = {}
+    for entry in (text or "").split(","):
+        name, _, served = entry.partition("=")
+        if name.strip():
+            models[name.strip()] = served.strip() or name.strip()
+    return models or None
+
+
+class LLMBackend:
+    """
+    Serves an agent's chat completions. A backend hands out OpenAI-shaped clients
+    (client.chat.completions.create, sync and async) and declares how much work it
+    can take:
+
+        max_concurrency - requests in flight at once; further calls wait for a free slot
+                          (until their deadline). A stream holds its slot until it is consumed.
+        max_batch_size  - requests one agent operation fans out together (e.g. parallel aspect
+                          reviews or section revisions). None leaves the agent's own limits.
+
+    Subclasses implement _create (and _acreate if they have a native async client).
+    """
+
+    name = "backend"
+    deferred = False  # answers arrive in batches, at reduced (batch) prices
+
+    def __init__(self, models=None, max_concurrency: int = None, max_batch_size: int = None):
+        """
+        Args:
+            models (dict | list[str], optional): Model names this backend serves, optionally mapped to the
+                                                 name sent to it. None serves every model, unchanged.
+            max_concurrency (int, optional): Requests in flight at once. None for no limit.
+            max_batch_size (int, optional): Requests an agent fans out together. None for no limit.
+        """
+        if isinstance(models, (list, tuple, set)):
+            models = {model: model for model in models}
+        self.models = dict(models) if models else None
+        self.max_concurrency = max_concurrency
+        self.max_batch_size = max_batch_size
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._async_slots = weakref.WeakKeyDictionary()  # event loop -> asyncio.Semaphore
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self._client = _ClientFacade(self.create)
+        self._async_client = _ClientFacade(self.acreate)
+
+    def serves(self, model: str) -> bool:
+        return self.models is None or model in self.models
+
+    def client(self):
+        """An object shaped like openai.OpenAI whose requests go to this backend."""
+        return self._client
+
+    def async_client(self):
+        """An object shaped like openai.AsyncOpenAI whose requests go to this backend."""
+        return self._async_client
+
+    def agent_kwargs(self) -> dict:
+        """BaseAgent keyword arguments that send all of an agent's calls to this backend."""
+        return {"backend": self}
+
+    def _request(self, kwargs: dict) -> dict:
+        # Requests carry the backend's name for the model
+        if self.models is not None and kwargs.get("model") in self.models:
+            kwargs = dict(kwargs, model=self.models[kwargs["model"]])
+        return kwargs
+
+    def _count(self, waiting: int = 0, in_flight: int = 0):
+        with self._lock:
+            self.waiting += waiting
+            self.in_flight += in_flight
+
+    def _create(self, **kwargs):
+        raise NotImplementedError
+
+    async def _acreate(self, **kwargs):
+        """Default async path: the synchronous request runs in a worker thread."""
+        response = await asyncio.to_thread(self._create, **kwargs)
+        return _iterate_in_thread(response) if kwargs.get("stream") else response
+
+    def create(self, **kwargs):
+        """chat.completions.create, within the backend's concurrency limit."""
+        if self._slots is not None:
+            timeout = kwargs.get("timeout")
+            self._count(waiting=1)
+            try:
+                acquired = self._slots.acquire(timeout=timeout) if timeout is not None else self._slots.acquire()
+            finally:
+                self._count(waiting=-1)
+            if not acquired:
+                raise DeadlineExceededError(f"No free {self.name} slot within {timeout:.1f}s.")
+        self._count(in_flight=1)
+        try:
+            response = self._create(**self._request(kwargs))
+        except BaseException:
+            self._release()
+            raise
+        if kwargs.get("stream"):
+            return self._release_after(response)
+        self._release()
+        return response
+
+    async def acreate(self, **kwargs):
+        """Async chat.completions.create, within the backend's concurrency limit (per event loop)."""
+        slots = self._get_async_slots()
+        if slots is not None:
+            self._count(waiting=1)
+            try:
+                await asyncio.wait_for(slots.acquire(), kwargs.get("timeout"))
+            except asyncio.TimeoutError:
+                raise DeadlineExceededError(f"No free {self.name} slot within {kwargs['timeout']:.1f}s.")
+            finally:
+                self._count(waiting=-1)
+        self._count(in_flight=1)
+        try:
+            response = await self._acreate(**self._request(kwargs))
+        except BaseException:
+            self._arelease(slots)
+            raise
+        if kwargs.get("stream"):
+            return self._arelease_after(response, slots)
+        self._arelease(slots)
+        return response
+
+    def _get_async_slots(self):
+        if not self.max_concurrency:
+            return None
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop not in self._async_slots:
+                self._async_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+            return self._async_slots[loop]
+
+    def _release(self):
+        self._count(in_flight=-1)
+        if self._slots is not None:
+            self._slots.release()
+
+    def _arelease(self, slots):
+        self._count(in_flight=-1)
+        if slots is not None:
+            slots.release()
+
+    def _release_after(self, stream):
+        try:
+            yield from stream
+        finally:
+            self._release()
+
+    async def _arelease_after(self, stream, slots):
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            self._arelease(slots)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": self.name, "in_flight": self.in_flight, "waiting": self.waiting,
+                    "max_concurrency": self.max_concurrency, "max_batch_size": self.max_batch_size}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(max_concurrency={self.max_concurrency}, max_batch_size={self.max_batch_size})"
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    An OpenAI-compatible HTTP server, e.g. a self-hosted llama.cpp server, vLLM or Ollama.
+    Requests use the shared, pooled clients of Agents/Client_Registry.py.
+    """
+
+    name = "openai_compatible"
+
+    def __init__(self, base_url: str, api_key: str = None, models=None, max_concurrency: int = None,
+                 max_batch_size: int = None):
+        """
+        Args:
+            base_url (str): The server's API root, e.g. 'http://127.0.0.1:8080/v1'.
+            api_key (str, optional): Key the server expects. Local servers usually need none.
+            models, max_concurrency, max_batch_size: See LLMBackend.
+        """
+        super().__init__(models=models, max_concurrency=max_concurrency, max_batch_size=max_batch_size)
+        self.base_url = base_url
+        self.api_key = api_key or "not-needed"
+
+    def _create(self, **kwargs):
+        return get_openai_client(self.api_key, self.base_url).chat.completions.create(**kwargs)
+
+    async def _acreate(self, **kwargs):
+        return await get_async_openai_client(self.api_key, self.base_url).chat.completions.create(**kwargs)
+
+    def __repr__(self):
+        return (f"{self.__class__.__name__}({self.base_url!r}, max_concurrency={self.max_concurrency}, "
+                f"max_batch_size={self.max_batch_size})")
+
+
+class OpenAIBackend(OpenAICompatibleBackend):
+    """The OpenAI API itself, with optional client-side concurrency limits."""
+
+    name = "openai"
+
+    def __init__(self, api_key: str = None, models=None, max_concurrency: int = None, max_batch_size: int = None):
+        load_environment()
+        api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY environment variable not set.")
+        super().__init__(None, api_key, models, max_concurrency, max_batch_size)
+
+
+class LlamaCppBackend(LLMBackend):
+    """
+    In-process CPU inference with llama.cpp (the optional 'llama-cpp-python' package) from
+    a local GGUF model file. The model is loaded on first use and decodes one request at
+    a time, so the backend allows a single request in flight.
+    """
+
+    name = "llama_cpp"
+
+    def __init__(self, model_path: str, models=None, n_ctx: int = 8192, n_threads: int = None,
+                 n_batch: int = 512, chat_format: str = None, **llama_kwargs):
+        """
+        Args:
+            model_path (str): Path of the GGUF model file.
+            models (dict | list[str], optional): Model names routed here (see LLMBackend). None routes every model.
+            n_ctx (int): Context window in tokens; prompts and completions must fit in it.
+            n_threads (int, optional): CPU threads for decoding. Defaults to llama.cpp's choice.
+            n_batch (int): Prompt tokens evaluated per step.
+            chat_format (str, optional): Chat template, if the model file does not declare one.
+            **llama_kwargs: Further llama_cpp.Llama options.
+        """
+        super().__init__(models=models, max_concurrency=1, max_batch_size=1)
+        self.model_path = model_path
+        self.llama_options = dict(n_ctx=n_ctx, n_threads=n_threads, n_batch=n_batch, chat_format=chat_format,
+                                  verbose=False, **llama_kwargs)
+        self._llama = None
+
+    def _model(self):
+        if llama_cpp is None:
+            raise ImportError("LlamaCppBackend needs the optional 'llama-cpp-python' package.")
+        with self._lock:
+            if self._llama is None:
+                self._llama = llama_cpp.Llama(model_path=self.model_path, **self.llama_options)
+            return self._llama
+
+    def _create(self, **kwargs):
+        options = {key: kwargs[key] for key in ("messages", "temperature", "max_tokens", "response_format")
+                   if kwargs.get(key) is not None}
+        if kwargs.get("stream"):
+            chunks = self._model().create_chat_completion(stream=True, **options)
+            return (ChatCompletionChunk.model_validate(chunk) for chunk in chunks)
+        return ChatCompletion.model_validate(self._model().create_chat_completion(**options))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.model_path!r})"
+
+
+async def _iterate_in_thread(iterator):
+    # Pulls each item of a blocking iterator in a worker thread
+    done = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+class _Completions:
+    def __init__(self, create):
+        self.create = create
+
+
+class _Chat:
+    def __init__(self, create):
+        self.completions = _Completions(create)
+
+
+class _ClientFacade:
+    def __init__(self, create):
+        self.chat = _Chat(create)
+
+
+def create_backend(kind: str, **options) -> LLMBackend:
+    """
+    Builds a backend by kind: 'openai', 'llama_cpp' (in-process; needs model_path) or an
+    OpenAI-compatible server preset from LOCAL_SERVER_PRESETS ('llama_cpp_server', 'vllm',
+    'ollama'), whose defaults options override.
+    """
+    if kind == "openai":
+        return OpenAIBackend(**options)
+    if kind == "llama_cpp":
+        return LlamaCppBackend(**options)
+    if kind not in LOCAL_SERVER_PRESETS:
+        raise ValueError(f"Unknown backend '{kind}'. Use 'openai', 'llama_cpp' or one of {sorted(LOCAL_SERVER_PRESETS)}.")
+    backend = OpenAICompatibleBackend(**dict(LOCAL_SERVER_PRESETS[kind], **options))
+    backend.name = kind
+    return backend
+
+
+def register_backend(backend: LLMBackend) -> LLMBackend:
+    """Routes the models a backend serves to it in this process (see get_backend)."""
+    with _default_backend_lock:
+        _registered_backends.append(backend)
+    return backend
+
+
+def unregister_backend(backend: LLMBackend):
+    with _default_backend_lock:
+        if backend in _registered_backends:
+            _registered_backends.remove(backend)
+
+
+def get_default_backend():
+    """
+    Returns the process-wide local backend, creating it on first use. Configured through:
+        PRECISIONAI_LOCAL_BACKEND          - 'llama_cpp_server', 'vllm', 'ollama' or 'llama_cpp' (default: none).
+        PRECISIONAI_LOCAL_BASE_URL         - the server's API root (default: the preset's).
+        PRECISIONAI_LOCAL_MODELS           - models served locally, e.g. 'gpt-4o-mini=llama3.1:8b'
+                                             (see parse_model_map; default: every model).
+        PRECISIONAI_LOCAL_MAX_CONCURRENCY  - requests in flight (default: the preset's).
+        PRECISIONAI_LOCAL_MAX_BATCH_SIZE   - requests an agent fans out together (default: the preset's).
+        PRECISIONAI_LOCAL_MODEL_PATH       - GGUF model file of the 'llama_cpp' backend.
+
+    Returns:
+        LLMBackend | None: The shared local backend, or None if none is configured.
+    """
+    global _default_backend
+    load_environment()
+    kind = os.environ.get("PRECISIONAI_LOCAL_BACKEND")
+    if not kind:
+        return None
+    with _default_backend_lock:
+        if _default_backend is None:
+            models = parse_model_map(os.environ.get("PRECISIONAI_LOCAL_MODELS", ""))
+            if kind == "llama_cpp":
+                _default_backend = LlamaCppBackend(os.environ["PRECISIONAI_LOCAL_MODEL_PATH"], models=models)
+            else:
+                options = {"models": models}
+                for option, variable, convert in (("base_url", "PRECISIONAI_LOCAL_BASE_URL", str),
+                                                  ("max_concurrency", "PRECISIONAI_LOCAL_MAX_CONCURRENCY", int),
+                                                  ("max_batch_size", "PRECISIONAI_LOCAL_MAX_BATCH_SIZE", int)):
+                    if os.environ.get(variable):
+                        options[option] = convert(os.environ[variable])
+                _default_backend = create_backend(kind, **options)
+        return _default_backend
+
+
+def get_backend(model: str):
+    """
+    Returns the backend that serves a model: the first registered backend serving it, then
+    the default local backend if it does, else None (the model is called on the OpenAI API).
+    """
+    with _default_backend_lock:
+        backend = next((b for b in _registered_backends if b.serves(model)), None)
+    if backend is not None:
+        return backend
+    default = get_default_backend()
+    return default if default is not None and default.serves(model) else None
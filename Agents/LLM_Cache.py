@@ -0,0 +1,269 @@
+# Agents/LLM_Cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Bump this whenever the shape of cached payloads or the key derivation changes,
+# so stale entries written by an older version are never served.
+CACHE_SCHEMA_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)), ".cache")
+
+
+def make_cache_key(model: str, temperature: float, max_tokens: int, messages: list, **request_options) -> str:
+    """
+    Builds a content-addressed key for a chat completion request.
+    Every parameter that can change the completion is part of the hash, so two
+    requests share a key only if they would be sent to the API identically.
+
+    Args:
+        model (str): The model name.
+        temperature (float): Sampling temperature.
+        max_tokens (int): Completion token limit.
+        messages (list): The chat messages, as sent to the API.
+        **request_options: Any other request parameters (e.g. response_format).
+
+    Returns:
+        str: A hex SHA-256 digest identifying the request.
+    """
+    payload = {
+        "v": CACHE_SCHEMA_VERSION,
+        "model": model,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "messages": messages,
+        "options": {k: v for k, v in request_options.items() if v is not None},
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier response cache for LLM completions.
+    Tier 1 is an in-process LRU dictionary; tier 2 is an optional SQLite file
+    with TTL expiry and size-based eviction, so results survive process restarts.
+    """
+
+    def __init__(self, max_memory_entries: int = 256, disk_path: str = None,
+                 ttl_seconds: float = 7 * 24 * 3600, max_disk_bytes: int = 200 * 1024 * 1024):
+        """
+        Initializes the cache.
+
+        Args:
+            max_memory_entries (int): Maximum entries kept in the in-process LRU tier.
+            disk_path (str, optional): Path of the SQLite file for the disk tier.
+                                       If None, only the memory tier is used.
+            ttl_seconds (float): Entries older than this are treated as misses and purged.
+                                 Use 0 or None to keep entries forever.
+            max_disk_bytes (int): Upper bound on the total payload size stored on disk.
+                                  Least recently used entries are evicted beyond it.
+        """
+        self.max_memory_entries = max_memory_entries
+        self.disk_path = disk_path
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()  # key -> (value, created_at)
+        self._lock = threading.RLock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        if self.disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.disk_path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.disk_path, check_same_thread=False, timeout=30)
+            # Several processes (e.g. app replicas) may share the file; WAL lets them read while one writes
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL, last_access REAL NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)")
+            # Running payload total, kept current by triggers so every process sharing the file sees
+            # the same figure and eviction never has to sum the whole table
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache_size (id INTEGER PRIMARY KEY CHECK (id = 1), total INTEGER NOT NULL)")
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS llm_cache_size_insert AFTER INSERT ON llm_cache BEGIN"
+                " UPDATE llm_cache_size SET total = total + new.size WHERE id = 1; END")
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS llm_cache_size_delete AFTER DELETE ON llm_cache BEGIN"
+                " UPDATE llm_cache_size SET total = total - old.size WHERE id = 1; END")
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS llm_cache_size_update AFTER UPDATE OF size ON llm_cache BEGIN"
+                " UPDATE llm_cache_size SET total = total - old.size + new.size WHERE id = 1; END")
+            # The only full scan: resynchronise the total on open (covers files written before it existed)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache_size (id, total)"
+                " VALUES (1, (SELECT COALESCE(SUM(size), 0) FROM llm_cache))")
+            self._conn.commit()
+        else:
+            self._conn = None
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return bool(self.ttl_seconds) and (now - created_at) > self.ttl_seconds
+
+    def _remember(self, key: str, value: str, created_at: float):
+        """Inserts into the memory tier, evicting the least recently used entry if full."""
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, key: str):
+        """
+        Looks up a cached completion.
+
+        Args:
+            key (str): A key produced by make_cache_key.
+
+        Returns:
+            str | None: The cached completion, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._is_expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if not self._is_expired(created_at, now):
+                        self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+                        self._conn.commit()
+                        self._remember(key, value, created_at)
+                        self._stats["disk_hits"] += 1
+                        return value
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+
+            self._stats["misses"] += 1
+            return None
+
+    def peek(self, key: str):
+        """
+        Looks up a cached completion without counting it as a hit or miss and without
+        touching recency. Meant for polling (e.g. while waiting on an in-flight request),
+        where repeated lookups would otherwise skew hit_rate.
+
+        Args:
+            key (str): A key produced by make_cache_key.
+
+        Returns:
+            str | None: The cached completion, or None if absent or expired.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._is_expired(entry[1], now):
+                return entry[0]
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None and not self._is_expired(row[1], now):
+                    return row[0]
+            return None
+
+    def set(self, key: str, value: str):
+        """
+        Stores a completion in both tiers.
+
+        Args:
+            key (str): A key produced by make_cache_key.
+            value (str): The completion text.
+        """
+        if value is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self._stats["writes"] += 1
+            if self._conn is not None:
+                # An upsert rather than INSERT OR REPLACE: REPLACE deletes without firing the size triggers
+                self._conn.execute(
+                    "INSERT INTO llm_cache (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size,"
+                    " created_at = excluded.created_at, last_access = excluded.last_access",
+                    (key, value, len(value.encode("utf-8")), now, now))
+                self._evict_disk(now)
+                self._conn.commit()
+
+    def _evict_disk(self, now: float):
+        """Purges expired rows, then the least recently used rows until under max_disk_bytes."""
+        if self.ttl_seconds:
+            cursor = self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._stats["evictions"] += max(cursor.rowcount, 0)
+        if not self.max_disk_bytes:
+            return
+        total = self._conn.execute("SELECT total FROM llm_cache_size WHERE id = 1").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        for key, size in self._conn.execute(
+                "SELECT key, size FROM llm_cache ORDER BY last_access ASC").fetchall():
+            if total <= self.max_disk_bytes:
+                break
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            total -= size
+            self._stats["evictions"] += 1
+
+    def clear(self):
+        """Removes every entry from both tiers. Counters are left untouched."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM llm_cache")
+                self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters plus the current tier sizes.
+
+        Returns:
+            dict: Counters such as 'memory_hits', 'disk_hits', 'misses', 'hit_rate'.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            if self._conn is not None:
+                stats["disk_entries"] = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """
+    Returns the process-wide cache shared by all agents, creating it on first use.
+    Configured through environment variables:
+        PRECISIONAI_LLM_CACHE      - set to "0" to disable caching entirely.
+        PRECISIONAI_LLM_CACHE_DIR  - directory for the SQLite disk tier (default: '.cache').
+        PRECISIONAI_LLM_CACHE_TTL  - entry lifetime in seconds (default: 7 days).
+
+    Returns:
+        LLMCache | None: The shared cache, or None if caching is disabled.
+    """
+    global _default_cache
+    if os.environ.get("PRECISIONAI_LLM_CACHE", "1") == "0":
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            cache_dir = os.environ.get("PRECISIONAI_LLM_CACHE_DIR", DEFAULT_CACHE_DIR)
+            ttl = float(os.environ.get("PRECISIONAI_LLM_CACHE_TTL", 7 * 24 * 3600))
+            _default_cache = LLMCache(disk_path=os.path.join(cache_dir, "llm_cache.sqlite3"), ttl_seconds=ttl)
+        return _default_cache
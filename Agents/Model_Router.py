@@ -0,0 +1,274 @@
+# Agents/Model_Router.py
+
+import contextlib
+import contextvars
+import os
+import threading
+
+from Agents.Resilience import CircuitBreaker
+
+_default_router = None
+_default_router_lock = threading.Lock()
+
+# Cascade tier ("small" or "large") of the calls made in the current context, set by the orchestrator
+_current_tier = contextvars.ContextVar("precisionai_model_tier", default=None)
+
+MODEL_TIERS = ("small", "large")
+DEFAULT_SMALL_MODEL = "gpt-4o-mini"
+DEFAULT_LARGE_MODEL = "gpt-4o"
+
+
+def current_model_tier():
+    """Returns the cascade tier active in the current context, or None."""
+    return _current_tier.get()
+
+
+@contextlib.contextmanager
+def model_tier(tier: str = None):
+    """
+    Routes the LLM calls made inside the block (including calls on threads started with
+    submit_in_context) to a cascade tier's model. A tier of None keeps the active one.
+    """
+    if tier is None:
+        yield current_model_tier()
+        return
+    if tier not in MODEL_TIERS:
+        raise ValueError(f"Unknown model tier '{tier}'. Use 'small' or 'large'.")
+    token = _current_tier.set(tier)
+    try:
+        yield tier
+    finally:
+        _current_tier.reset(token)
+
+
+class RoutingRule:
+    """
+    Sends matching LLM calls to one of a set of candidate models. Fields left as None
+    match every call; candidates may name a model or a tier ("small" or "large").
+    """
+
+    def __init__(self, models, agent: str = None, task: str = None, tier: str = None,
+                 max_prompt_tokens: int = None):
+        """
+        Args:
+            models (str | list[str]): Candidate models; the router picks among them by observed
+                                      latency, cost and errors (see ModelRouter.select).
+            agent (str, optional): Agent class name, e.g. 'PRDReviewerAgent'.
+            task (str, optional): Kind of call: 'prd', 'section_revision', 'review', 'aspect_review',
+                                  'wbs', 'risk_analysis' or 'test_plan'.
+            tier (str, optional): Cascade tier the rule applies to.
+            max_prompt_tokens (int, optional): Only match prompts of at most this many tokens.
+        """
+        self.models = [models] if isinstance(models, str) else list(models)
+        if not self.models:
+            raise ValueError("A routing rule needs at least one candidate model.")
+        self.agent = agent
+        self.task = task
+        self.tier = tier
+        self.max_prompt_tokens = max_prompt_tokens
+
+    def matches(self, agent: str, task: str, tier: str, prompt_tokens: int) -> bool:
+        return ((self.agent is None or self.agent == agent)
+                and (self.task is None or self.task == task)
+                and (self.tier is None or self.tier == tier)
+                and (self.max_prompt_tokens is None or prompt_tokens <= self.max_prompt_tokens))
+
+    def __repr__(self):
+        return (f"RoutingRule({self.models!r}, agent={self.agent!r}, task={self.task!r}, tier={self.tier!r}, "
+                f"max_prompt_tokens={self.max_prompt_tokens!r})")
+
+
+def parse_routing_rules(text: str) -> list:
+    """
+    Parses rules written as 'Agent.task=model[,model...]' separated by semicolons, where
+    Agent or task may be '*' (e.g. 'PRDReviewerAgent.aspect_review=small;*.section_revision=gpt-4.1-mini').
+
+    Returns:
+        list[RoutingRule]: The rules, in order.
+    """
+    rules = []
+    for entry in (text or "").split(";"):
+        if not entry.strip():
+            continue
+        target, separator, models = entry.partition("=")
+        agent, _, task = target.strip().partition(".")
+        if not separator or not models.strip():
+            raise ValueError(f"Invalid routing rule '{entry.strip()}'. Use 'Agent.task=model[,model...]'.")
+        rules.append(RoutingRule([m.strip() for m in models.split(",") if m.strip()],
+                                 agent=None if agent in ("", "*") else agent,
+                                 task=None if task in ("", "*") else task))
+    return rules
+
+
+class ModelStats:
+    """Exponentially weighted averages of the latency, cost and error rate of a model's calls."""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.calls = 0
+        self.latency_s = None
+        self.cost_usd = None
+        self.error_rate = 0.0
+
+    def update(self, latency_s: float, cost_usd: float, failed: bool):
+        self.calls += 1
+        self.error_rate += self.alpha * (float(failed) - self.error_rate)
+        if failed:
+            return
+        self.latency_s = latency_s if self.latency_s is None else self.latency_s + self.alpha * (latency_s - self.latency_s)
+        self.cost_usd = cost_usd if self.cost_usd is None else self.cost_usd + self.alpha * (cost_usd - self.cost_usd)
+
+    def to_dict(self) -> dict:
+        return {"calls": self.calls, "latency_s": self.latency_s, "cost_usd": self.cost_usd,
+                "error_rate": self.error_rate}
+
+
+class ModelRouter:
+    """
+    Picks the model for each LLM call of the agents that share it.
+
+    A call's candidates come from the first matching RoutingRule; without one, they are
+    the model of the active cascade tier (see model_tier) or else the agent's own model.
+    Among several candidates the router avoids models whose circuit is open or whose
+    recent error rate exceeds max_error_rate, tries each model until it has min_samples
+    observations, and then picks the lowest expected latency plus cost_weight times cost.
+    Every completed call is fed back through observe().
+
+    In cascade mode the orchestrator drafts with the small model and escalates to the
+    large one for the final iteration, or after a review scored below escalate_below
+    (see cascade_tier).
+    """
+
+    def __init__(self, small_model: str = DEFAULT_SMALL_MODEL, large_model: str = DEFAULT_LARGE_MODEL,
+                 rules: list = None, cascade: bool = False, escalate_below: float = 6.0, alpha: float = 0.2, min_samples: int = 3,
+                 max_error_rate: float = 0.5, cost_weight: float = 100.0):
+        """
+        Args:
+            small_model (str): Model of the "small" tier: fast and cheap, used for drafts.
+            large_model (str): Model of the "large" tier.
+            rules (list[RoutingRule], optional): Routing rules, first match wins.
+            cascade (bool): Draft with the small model and escalate to the large one (see cascade_tier).
+            escalate_below (float): Review score (out of 10) below which the next iteration uses the large model.
+            alpha (float): Weight of the newest observation in the moving averages.
+            min_samples (int): Observations of each candidate before the router starts choosing by its stats.
+            max_error_rate (float): Candidates whose recent error rate is above this are avoided.
+            cost_weight (float): Seconds of latency worth one US dollar when comparing candidates.
+        """
+        self.tier_models = {"small": small_model, "large": large_model}
+        self.rules = list(rules or [])
+        self.cascade = cascade
+        self.escalate_below = escalate_below
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.cost_weight = cost_weight
+        self._lock = threading.Lock()
+        self._stats = {}  # (model, task) and (model, None) -> ModelStats
+
+    def cascade_tier(self, final_iteration: bool, previous_score: float = None):
+        """
+        Returns:
+            str | None: The tier for a workflow iteration: "large" for the final iteration or when
+                        the previous review scored below escalate_below, "small" otherwise, and
+                        None when cascading is off.
+        """
+        if not self.cascade:
+            return None
+        if final_iteration or (previous_score is not None and previous_score < self.escalate_below):
+            return "large"
+        return "small"
+
+    def candidates(self, agent: str, task: str, default_model: str, prompt_tokens: int = 0) -> list:
+        """The models a call may use, before its stats are considered."""
+        tier = current_model_tier()
+        rule = next((r for r in self.rules if r.matches(agent, task, tier, prompt_tokens)), None)
+        if rule is not None:
+            return [self.tier_models.get(model, model) for model in rule.models]
+        return [self.tier_models[tier] if tier else default_model]
+
+    def select(self, agent: str, task: str, default_model: str, prompt_tokens: int = 0, resilience=None) -> str:
+        """
+        Chooses the model for one call.
+
+        Args:
+            agent (str): Class name of the calling agent.
+            task (str): Kind of call (see RoutingRule).
+            default_model (str): The agent's own model.
+            prompt_tokens (int): Estimated prompt size.
+            resilience (ResilientCaller, optional): Its circuit breakers mark models to avoid.
+
+        Returns:
+            str: The model name.
+        """
+        candidates = self.candidates(agent, task, default_model, prompt_tokens)
+        if len(candidates) == 1:
+            return candidates[0]
+        with self._lock:
+            stats = {model: (self._stats.get((model, task)), self._stats.get((model, None))) for model in candidates}
+        healthy = [model for model in candidates
+                   if not (resilience is not None and resilience.breaker(model).state == CircuitBreaker.OPEN)
+                   and not (stats[model][1] is not None and stats[model][1].error_rate > self.max_error_rate)]
+        candidates = healthy or candidates
+        untried = [model for model in candidates if stats[model][0] is None or stats[model][0].calls < self.min_samples]
+        if untried:
+            return min(untried, key=lambda model: stats[model][0].calls if stats[model][0] else 0)
+
+        def expected_cost(model):
+            task_stats = stats[model][0]
+            if task_stats.latency_s is None:  # every call so far failed
+                return float("inf")
+            return task_stats.latency_s + self.cost_weight * task_stats.cost_usd
+        return min(candidates, key=expected_cost)
+
+    def observe(self, record, task: str = None):
+        """Feeds the outcome of a call (an LLMCallRecord) back into the model's stats. Cache hits are ignored."""
+        if record.cache_status == "hit":
+            return
+        with self._lock:
+            for key in ((record.model, task), (record.model, None)):
+                if key not in self._stats:
+                    self._stats[key] = ModelStats(self.alpha)
+                self._stats[key].update(record.wall_time_s, record.cost_usd, record.error is not None)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: {model: {'calls', 'latency_s', 'cost_usd', 'error_rate', 'tasks': {task: {...}}}}.
+        """
+        with self._lock:
+            summary = {model: dict(stats.to_dict(), tasks={}) for (model, task), stats in self._stats.items()
+                       if task is None}
+            for (model, task), stats in self._stats.items():
+                if task is not None:
+                    summary[model]["tasks"][task] = stats.to_dict()
+        return summary
+
+
+def get_default_router():
+    """
+    Returns the process-wide model router, creating it on first use. Configured through:
+        PRECISIONAI_ROUTING          - "off" (default: every agent uses its own model), "rules" or "cascade".
+        PRECISIONAI_SMALL_MODEL      - model of the small tier (default: 'gpt-4o-mini').
+        PRECISIONAI_LARGE_MODEL      - model of the large tier (default: 'gpt-4o').
+        PRECISIONAI_ESCALATE_BELOW   - review score below which the cascade escalates (default: 6.0).
+        PRECISIONAI_ROUTING_RULES    - rules such as 'PRDReviewerAgent.aspect_review=small' (see parse_routing_rules).
+
+    Returns:
+        ModelRouter | None: The shared router, or None if routing is off.
+    """
+    global _default_router
+    mode = os.environ.get("PRECISIONAI_ROUTING", "off")
+    if mode == "off":
+        return None
+    if mode not in ("rules", "cascade"):
+        raise ValueError(f"Unknown PRECISIONAI_ROUTING '{mode}'. Use 'off', 'rules' or 'cascade'.")
+    with _default_router_lock:
+        if _default_router is None:
+            _default_router = ModelRouter(
+                small_model=os.environ.get("PRECISIONAI_SMALL_MODEL", DEFAULT_SMALL_MODEL),
+                large_model=os.environ.get("PRECISIONAI_LARGE_MODEL", DEFAULT_LARGE_MODEL),
+                rules=parse_routing_rules(os.environ.get("PRECISIONAI_ROUTING_RULES", "")),
+                cascade=mode == "cascade",
+                escalate_below=float(os.environ.get("PRECISIONAI_ESCALATE_BELOW", 6.0)),
+            )
+        return _default_router
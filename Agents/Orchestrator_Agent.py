@@ -1,10 +1,34 @@
 # main_orchestrator.py (or could be in a 'Orchestration' directory)
 
+import asyncio
+import contextlib
+import functools
 import os
 import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from Agents.Base_Agent import BaseAgent
+from Agents.Checkpoint_Store import (WorkflowCheckpointStore, WorkflowState, get_default_checkpoint_store,
+                                     hash_workflow_inputs)
+from Agents.Inflight_Registry import InflightRegistry, get_default_inflight_registry
+from Agents.Instrumentation import IterationRecord, current_run_id, get_instrumentation, submit_in_context
+from Agents.LLM_Cache import LLMCache
+from Agents.Model_Router import model_tier
+from Agents.PRD_Archive import PRDArchive, get_default_archive
 from Agents.PRD_Creator_Agent import PRDCreatorAgent
 from Agents.PRD_Reviewer_Agent import PRDReviewerAgent
+from Agents.Process_Backend import ProcessPoolBackend
+from Agents.Review_Verdict import ReviewVerdict
+from Agents.Risk_Analysis_Agent import RiskAnalysisAgent
+from Agents.Similarity_Index import SimilarMatch, SimilarityIndex, get_default_similarity_index
+from Agents.Test_Plan_Agent import TestPlanAgent
+from Agents.WBS_Creator_Agent import WBSCreatorAgent
+from Agents.Workflow_DAG import DAGRun, WorkflowDAG
+
+# Names of the workflow inputs, as passed to run_prd_workflow
+WORKFLOW_INPUTS = ("front_end_reqs", "middleware_reqs", "backend_reqs", "other_details")
 
 
 class Orchestrator:
@@ -14,7 +38,18 @@ class Orchestrator:
     addition and removal of agents and manages the iterative process.
     """
 
-    def __init__(self, max_review_iterations: int = 3):
+    # Documents run_blueprint_workflow can derive from the final PRD: artifact name -> agent name
+    BLUEPRINT_ARTIFACTS = {"wbs": "wbs_creator", "risks": "risk_analyst", "test_plan": "test_planner"}
+
+    def __init__(self, max_review_iterations: int = 3, incremental_revisions: bool = True, review_mode: str = "single",
+                 agent_kwargs: dict = None, output_folder: str = None,
+                 checkpoint_store: WorkflowCheckpointStore = None, use_checkpoints: bool = True,
+                 target_score: float = 8.0, min_score_improvement: float = 0.5,
+                 execution_backend: str = "thread", max_workers: int = None, agent_kwargs_factory=None,
+                 similarity_index: SimilarityIndex = None, near_duplicates: str = "reuse",
+                 seed_threshold: float = 0.8, reuse_threshold: float = 0.97, archive: PRDArchive = None,
+                 use_archive: bool = True, inflight: InflightRegistry = None,
+                 shared_workflow_timeout: float = 600.0):
         """
         Initializes the Orchestrator with a dictionary to hold agents
         and sets the maximum number of review iterations.
@@ -22,27 +57,126 @@ class Orchestrator:
         Args:
             max_review_iterations (int): The maximum number of times the
                                          PRD will be reviewed and revised.
+            incremental_revisions (bool): If True, revisions regenerate only the PRD
+                                          sections the reviewer flagged instead of the whole document.
+            review_mode (str): "single" for one whole-document review call, "parallel" to review
+                               sections and cross-cutting aspects concurrently (see PRDReviewerAgent), or
+                               "pipelined" to also overlap the reviewer with the creator in run_prd_workflow:
+                               sections are reviewed while the PRD streams in, and flagged sections are
+                               revised as soon as their own review is in (see _start_speculative_revision).
+                               The streaming and async workflows treat "pipelined" as "parallel".
+            agent_kwargs (dict, optional): Extra BaseAgent options (e.g. client, cache, rate_limiter, router)
+                                           passed to every core agent when it is constructed. A router in
+                                           cascade mode picks each iteration's model tier (see _cascade_tier).
+            output_folder (str, optional): Where the PRD creator saves documents. Defaults to 'output'.
+            checkpoint_store (WorkflowCheckpointStore, optional): Where workflow progress is checkpointed.
+                                                                  Defaults to the process-wide store.
+            use_checkpoints (bool): Set to False to run workflows without checkpoints.
+            target_score (float): With structured reviews, a PRD scoring at least this (out of 10)
+                                  with no high-severity issues is satisfactory.
+            min_score_improvement (float): With structured reviews, stop when a revision raises the
+                                           overall score by less than this. None disables the check.
+            execution_backend (str): How run_prd_workflows runs many workflows: "thread" (a thread pool
+                                     in this process) or "process" (a pool of worker processes, each
+                                     with its own warm Orchestrator; see Agents/Process_Backend.py).
+            max_workers (int, optional): Threads or processes used by run_prd_workflows. Defaults to
+                                         8 threads or one process per CPU core.
+            agent_kwargs_factory (callable, optional): Picklable zero-argument callable that builds the
+                                                       agent_kwargs inside each worker process. Needed when
+                                                       agent_kwargs holds clients or caches, which cannot be
+                                                       sent to another process.
+            similarity_index (SimilarityIndex, optional): Index of earlier requirement sets and their final
+                                                          PRDs. Defaults to the process-wide index.
+            near_duplicates (str): What a new workflow does with a near-identical earlier requirement set:
+                                   "reuse" returns its PRD if the similarity reaches reuse_threshold and
+                                   otherwise seeds the creator with it; "seed" only seeds; "off" disables
+                                   the lookup.
+            seed_threshold (float): Minimum similarity (0-1) for using an earlier PRD as the starting draft.
+            reuse_threshold (float): Minimum similarity (0-1) for returning an earlier PRD as is.
+            archive (PRDArchive, optional): Compressed, searchable archive that every generated PRD is added
+                                            to with its workflow metadata. Defaults to the process-wide archive.
+            use_archive (bool): Set to False to run workflows without archiving their PRDs.
+            inflight (InflightRegistry, optional): Where running workflows are claimed by their inputs, so that
+                                                   an identical workflow started by another thread or process
+                                                   (e.g. another app replica) waits for this one and returns its
+                                                   checkpointed result. Defaults to the process-wide registry.
+                                                   Not used without a checkpoint store, where the result could
+                                                   not be read back.
+            shared_workflow_timeout (float): Longest wait in seconds for an identical workflow running
+                                             elsewhere; after it, this workflow runs by itself. None waits
+                                             as long as the other workflow keeps its claim alive.
         """
+        if execution_backend not in ("thread", "process"):
+            raise ValueError(f"Unknown execution_backend '{execution_backend}'. Use 'thread' or 'process'.")
+        if near_duplicates not in ("reuse", "seed", "off"):
+            raise ValueError(f"Unknown near_duplicates '{near_duplicates}'. Use 'reuse', 'seed' or 'off'.")
         self.agents = {}
+        self._agent_factories = {}  # name -> callable building the agent on first get_agent
+        self._agents_lock = threading.Lock()
         self.max_review_iterations = max_review_iterations
+        self.incremental_revisions = incremental_revisions
+        self.review_mode = review_mode
+        self.agent_kwargs = dict(agent_kwargs or {})
+        self.output_folder = output_folder
+        self.instrumentation = get_instrumentation()
+        # Completed iterations survive crashes and restarts (see resume_prd_workflow)
+        self.checkpoint_store = (checkpoint_store or get_default_checkpoint_store()) if use_checkpoints else None
+        self.target_score = target_score
+        self.min_score_improvement = min_score_improvement
+        self.execution_backend = execution_backend
+        self.max_workers = max_workers
+        self.agent_kwargs_factory = agent_kwargs_factory
+        self._process_backend = None
+        # Near-identical earlier submissions are reused or seed the first draft (see Agents/Similarity_Index.py)
+        self.near_duplicates = near_duplicates
+        self.similarity_index = None
+        if near_duplicates != "off":
+            self.similarity_index = similarity_index if similarity_index is not None else get_default_similarity_index()
+        self.seed_threshold = seed_threshold
+        self.reuse_threshold = reuse_threshold
+        # Every generated PRD is indexed with its workflow, iteration and token usage (see Agents/PRD_Archive.py)
+        self.archive = None
+        if use_archive:
+            self.archive = archive if archive is not None else get_default_archive()
+        # Outputs of blueprint workflow nodes, reused while their inputs are unchanged (see build_blueprint_dag)
+        self.dag_memo = LLMCache(max_memory_entries=256, ttl_seconds=None)
+        # Identical workflows running elsewhere are waited for instead of repeated (see _shared_workflow)
+        self.inflight = inflight if inflight is not None else get_default_inflight_registry()
+        self.shared_workflow_timeout = shared_workflow_timeout
         self._initialize_core_agents()
         self.project_root = os.path.abspath(
             os.path.join(os.path.dirname(__file__), os.pardir))
 
     def _initialize_core_agents(self):
         """
-        Initializes the core agents required for the PRD workflow
-        (PRDCreatorAgent and PRDReviewerAgent) and adds them to the orchestrator.
+        Registers the core agents required for the PRD workflow (PRDCreatorAgent and
+        PRDReviewerAgent) and the agents deriving further documents from the PRD in
+        run_blueprint_workflow. They are constructed lazily, on first use, so creating
+        an Orchestrator is cheap.
         """
-        try:
-            creator_agent = PRDCreatorAgent()
-            reviewer_agent = PRDReviewerAgent()
-            self.add_agent("prd_creator", creator_agent)
-            self.add_agent("prd_reviewer", reviewer_agent)
-            print("Core agents (PRD Creator, PRD Reviewer) initialized and added.")
-        except Exception as e:
-            print(f"Error initializing core agents: {e}")
-            raise  # Re-raise to indicate a critical setup failure
+        self.register_agent_factory("prd_creator", lambda: PRDCreatorAgent(
+            output_folder=self.output_folder, **self.agent_kwargs))
+        self.register_agent_factory("prd_reviewer", lambda: PRDReviewerAgent(
+            review_mode="parallel" if self.review_mode == "pipelined" else self.review_mode, **self.agent_kwargs))
+        self.register_agent_factory("wbs_creator", lambda: WBSCreatorAgent(
+            output_folder=self.output_folder, **self.agent_kwargs))
+        self.register_agent_factory("risk_analyst", lambda: RiskAnalysisAgent(
+            output_folder=self.output_folder, **self.agent_kwargs))
+        self.register_agent_factory("test_planner", lambda: TestPlanAgent(
+            output_folder=self.output_folder, **self.agent_kwargs))
+
+    def register_agent_factory(self, name: str, factory):
+        """
+        Registers a callable that builds an agent the first time it is requested
+        via get_agent. An already constructed agent with the same name is replaced.
+
+        Args:
+            name (str): A unique name/identifier for the agent.
+            factory (Callable[[], BaseAgent]): Zero-argument callable returning the agent.
+        """
+        with self._agents_lock:
+            self._agent_factories[name] = factory
+            self.agents.pop(name, None)
 
     def add_agent(self, name: str, agent_instance: BaseAgent):
         """
@@ -67,15 +201,17 @@ class Orchestrator:
         Args:
             name (str): The name/identifier of the agent to remove.
         """
-        if name in self.agents:
-            del self.agents[name]
+        if name in self.agents or name in self._agent_factories:
+            self.agents.pop(name, None)
+            self._agent_factories.pop(name, None)
             print(f"Agent '{name}' removed successfully.")
         else:
             print(f"Warning: Agent '{name}' not found.")
 
     def get_agent(self, name: str) -> BaseAgent:
         """
-        Retrieves an agent instance by its name.
+        Retrieves an agent instance by its name, constructing it on first use
+        if it was registered through a factory.
 
         Args:
             name (str): The name/identifier of the agent.
@@ -87,10 +223,35 @@ class Orchestrator:
             ValueError: If the agent is not found.
         """
         agent = self.agents.get(name)
-        if not agent:
-            raise ValueError(f"Agent '{name}' not found in orchestrator.")
+        if agent:
+            return agent
+        with self._agents_lock:
+            agent = self.agents.get(name)
+            if agent:
+                return agent
+            factory = self._agent_factories.get(name)
+            if factory is None:
+                raise ValueError(f"Agent '{name}' not found in orchestrator.")
+            try:
+                agent = factory()
+            except Exception as e:
+                print(f"Error initializing agent '{name}': {e}")
+                raise  # Re-raise to indicate a critical setup failure
+            self.agents[name] = agent
+            print(f"Agent '{name}' initialized.")
         return agent
 
+    def get_all_agents(self) -> dict:
+        """
+        Returns every registered agent by name, constructing any that are still pending.
+
+        Returns:
+            dict[str, BaseAgent]: Agent name -> agent instance.
+        """
+        for name in list(self._agent_factories):
+            self.get_agent(name)
+        return dict(self.agents)
+
     def _is_prd_satisfactory(self, feedback: str) -> bool:
         """
         Determines if the PRD review feedback indicates a satisfactory document.
@@ -124,59 +285,897 @@ class Orchestrator:
         # If neither strong positive nor strong negative cues, assume more work is needed.
         return False
 
-    def run_prd_workflow(self, front_end_reqs: str, middleware_reqs: str, backend_reqs: str, other_details: str) -> tuple[str, str]:
+    def _revision_base(self, current_prd_content: str):
+        """Returns the PRD to revise section by section, or None to request a full regeneration."""
+        return current_prd_content if self.incremental_revisions else None
+
+    def _record_iteration(self, iteration: int, started: float, creator_done: float, satisfactory: bool,
+                          verdict: ReviewVerdict = None):
+        """Records the timing of one creator/reviewer iteration."""
+        now = time.perf_counter()
+        self.instrumentation.record(IterationRecord(
+            iteration=iteration, wall_time_s=now - started, creator_s=creator_done - started,
+            reviewer_s=now - creator_done, satisfactory=satisfactory,
+            score=verdict.overall_score if verdict else None))
+
+    @staticmethod
+    def _review(prd_reviewer: BaseAgent, prd_document: str) -> tuple:
+        """Returns (feedback, verdict); the verdict is None for reviewers without structured output."""
+        if hasattr(prd_reviewer, "assess"):
+            return prd_reviewer.assess(prd_document)
+        return prd_reviewer.generate(prd_document=prd_document), None
+
+    @staticmethod
+    async def _areview(prd_reviewer: BaseAgent, prd_document: str) -> tuple:
+        """Async version of _review."""
+        if hasattr(prd_reviewer, "aassess"):
+            return await prd_reviewer.aassess(prd_document)
+        return await prd_reviewer.agenerate(prd_document=prd_document), None
+
+    @staticmethod
+    def _review_stream(prd_reviewer: BaseAgent, prd_document: str):
+        """Streaming version of _review: yields feedback chunks and returns (feedback, verdict)."""
+        if hasattr(prd_reviewer, "assess"):
+            return (yield from prd_reviewer.assess(prd_document, stream=True))
+        feedback = yield from prd_reviewer.generate(prd_document=prd_document, stream=True)
+        return feedback, None
+
+    @staticmethod
+    def _generate_into_review(prd_creator: BaseAgent, review, **generate_kwargs) -> tuple:
+        """Streams a PRD from the creator into a pipelined review and returns (content, path)."""
+        chunks = prd_creator.generate(stream=True, **generate_kwargs)
+        while True:
+            try:
+                review.feed(next(chunks))
+            except StopIteration as stop:
+                return stop.value
+
+    def _start_speculative_revision(self, prd_creator: BaseAgent, review, inputs: tuple, prd_document: str,
+                                    tier: str = None, previous_verdict: ReviewVerdict = None):
+        """
+        Starts the next revision while the review of prd_document is still running (see
+        PRDCreatorAgent.start_speculative_revision). Its calls use the model tier the next
+        iteration is expected to have. Sections are only revised once the section reviews in so
+        far make it likely that _evaluate_review will ask for another iteration.
+
+        Returns:
+            tuple[SpeculativeRevision, UsageTally, str]: The revision, the token usage of its speculative
+                                                         calls and its model tier.
+        """
+        def revision_likely(partial_verdict: ReviewVerdict) -> bool:
+            # Cross-cutting reviews can only lower the score, so an unsatisfactory partial verdict stays one
+            _, stop_reason = self._evaluate_review(None, partial_verdict, previous_verdict)
+            return stop_reason is None
+
+        with self.instrumentation.usage_tally() as usage, model_tier(tier) as active_tier:
+            revision = prd_creator.start_speculative_revision(inputs, prd_document, review, revision_likely)
+            return revision, usage, active_tier
+
+    def _cascade_tier(self, prd_creator: BaseAgent, iteration: int, previous_verdict: ReviewVerdict = None):
+        """
+        Returns the model tier ("small" or "large") of an iteration's creator and reviewer calls when
+        the creator's router cascades (see ModelRouter.cascade_tier): drafts use the small model, and
+        the final iteration, or one following a low review score, the large one. None otherwise.
+        """
+        router = getattr(prd_creator, "router", None)
+        if router is None:
+            return None
+        return router.cascade_tier(iteration == self.max_review_iterations,
+                                   previous_verdict.overall_score if previous_verdict else None)
+
+    def _evaluate_review(self, feedback: str, verdict: ReviewVerdict, previous_verdict: ReviewVerdict) -> tuple:
+        """
+        Decides whether the workflow stops after a review.
+        With a structured verdict the PRD is satisfactory once it reaches target_score with
+        no high-severity issues, and the loop also stops when the last revision improved
+        the overall score by less than min_score_improvement (further revisions are not
+        paying off). Free-text reviews fall back to the keyword heuristic.
+
+        Returns:
+            tuple[bool, str | None]: (satisfactory, stop reason: 'satisfactory', 'converged' or None).
+        """
+        if verdict is None:
+            satisfactory = self._is_prd_satisfactory(feedback)
+            return satisfactory, "satisfactory" if satisfactory else None
+        if verdict.is_satisfactory(self.target_score):
+            return True, "satisfactory"
+        if (previous_verdict is not None and self.min_score_improvement is not None
+                and verdict.overall_score - previous_verdict.overall_score < self.min_score_improvement):
+            return False, "converged"
+        return False, None
+
+    @staticmethod
+    def _best_result(best: tuple, iteration: int, verdict: ReviewVerdict, content: str, path: str) -> tuple:
+        """
+        Keeps (score, iteration, content, path) of the highest-scored PRD so far, so a
+        revision that scores worse never replaces a better earlier draft as the result.
+        """
+        if verdict is None:
+            return None, iteration, content, path
+        if best is None or best[0] is None or verdict.overall_score >= best[0]:
+            return verdict.overall_score, iteration, content, path
+        return best
+
+    @staticmethod
+    def _previous_verdict(state: WorkflowState):
+        """The structured verdict of a resumed workflow's last review, if any."""
+        return ReviewVerdict.from_dict(state.verdict) if state.step == "review" and state.verdict else None
+
+    def _open_workflow(self, workflow_id: str, inputs: tuple, mode: str = "") -> tuple:
+        """
+        Loads or registers a workflow for run_prd_workflow (and its async version) and looks up
+        a near-duplicate for a new one.
+
+        Returns:
+            tuple[WorkflowState, SimilarMatch | None, tuple | None]: The state, the near-duplicate match, and
+                                                                     the workflow's (content, path) if nothing
+                                                                     is left to run.
+        """
+        state = self._load_workflow_state(workflow_id, inputs)
+        if state.is_finished(self.max_review_iterations):
+            print(f"\n--- Workflow {workflow_id} already finished. Returning its last PRD. ---")
+            self._checkpoint("mark_completed", workflow_id)
+            return state, None, (state.prd, state.prd_path)
+        if state.step:
+            print(f"\n--- Resuming workflow {workflow_id} at iteration {state.next_iteration}{mode} ---")
+        else:
+            print(f"\n--- Starting PRD Generation Workflow{mode} ---")
+        near_duplicate, reuse = self._find_near_duplicate(state)
+        if reuse:
+            return state, near_duplicate, self._reuse_near_duplicate(workflow_id, near_duplicate)
+        return state, near_duplicate, None
+
+    def _prd_request(self, inputs: tuple, previous_feedback: str, current_prd: str, near_duplicate) -> dict:
+        """Keyword arguments of an iteration's PRD creator call (generate, agenerate or streamed)."""
+        front_end_reqs, middleware_reqs, backend_reqs, other_details = inputs
+        return dict(
+            front_end_reqs=front_end_reqs,
+            middleware_reqs=middleware_reqs,
+            backend_reqs=backend_reqs,
+            other_details=other_details,
+            previous_feedback=previous_feedback,  # Pass feedback for revision
+            previous_prd=self._revision_base(current_prd),
+            draft_prd=near_duplicate.prd if near_duplicate and current_prd is None else None
+        )
+
+    def _save_iteration_prd(self, state: WorkflowState, iteration: int, content: str, path: str, usage):
+        """Checkpoints and archives the PRD an iteration generated."""
+        self._checkpoint("save_prd", state.workflow_id, iteration, content, path)
+        self._archive_prd(state.workflow_id, iteration, state.inputs, content, path, usage)
+
+    def _conclude_iteration(self, state: WorkflowState, iteration: int, started: float, creator_done: float,
+                            review: tuple, previous_verdict: ReviewVerdict, content: str, path: str,
+                            best: tuple) -> tuple:
+        """
+        Evaluates, checkpoints and records an iteration's (feedback, verdict) review.
+
+        Returns:
+            tuple: (satisfactory, stop reason, best result so far); see _evaluate_review and _best_result.
+        """
+        feedback, verdict = review
+        satisfactory, stop_reason = self._evaluate_review(feedback, verdict, previous_verdict)
+        self._checkpoint("save_review", state.workflow_id, iteration, feedback, satisfactory,
+                         verdict.to_dict() if verdict else None)
+        self._record_iteration(iteration, started, creator_done, satisfactory, verdict)
+        return satisfactory, stop_reason, self._best_result(best, iteration, verdict, content, path)
+
+    @staticmethod
+    def _report_progress(iteration: int, stop_reason: str):
+        """Prints why the workflow stops after an iteration, or that it continues."""
+        if stop_reason == "satisfactory":
+            print(f"\n--- PRD is satisfactory after {iteration} iterations. ---")
+        elif stop_reason == "converged":
+            print(f"\n--- Review scores converged after {iteration} iterations. Returning the best-scored PRD. ---")
+        else:
+            print("PRD requires further revisions. Incorporating feedback for next iteration.")
+
+    def _finish_workflow(self, workflow_id: str, best: tuple, content: str, path: str, inputs: tuple = None) -> tuple:
+        """
+        Marks a workflow completed and returns its best-scored PRD (or the last one). With
+        inputs, the result is also added to the near-duplicate index for later submissions.
+        """
+        if best is not None and best[0] is not None:
+            _, iteration, content, path = best
+            self._checkpoint("mark_completed", workflow_id, iteration)
+        else:
+            self._checkpoint("mark_completed", workflow_id)
+        if inputs is not None and self.similarity_index is not None:
+            try:
+                self.similarity_index.add(inputs, content, path)
+            except sqlite3.Error as e:
+                print(f"Warning: Could not index the PRD of workflow {workflow_id}: {e}")
+        if self.archive is not None:
+            try:
+                self.archive.mark_final(workflow_id, path)
+            except sqlite3.Error as e:
+                print(f"Warning: Could not update the PRD archive for workflow {workflow_id}: {e}")
+        return content, path
+
+    def _archive_prd(self, workflow_id: str, iteration: int, inputs: tuple, content: str, path: str, usage):
+        """
+        Adds a generated PRD to the archive with its workflow metadata and the token usage of
+        the calls that produced it. A failing archive is reported but never aborts the workflow.
+        """
+        if self.archive is None:
+            return
+        prd_creator = self.get_agent("prd_creator")
+        # The model that actually wrote the PRD: the router or a cascade tier may have replaced the agent's own
+        model = usage.model_of(prd_creator.__class__.__name__) or prd_creator.model
+        match = re.search(r"_v(\d+)\.md$", path or "")
+        try:
+            self.archive.add(content, "PRD", int(match.group(1)) if match else None, path, workflow_id, iteration,
+                             hash_workflow_inputs(inputs), model,
+                             usage.prompt_tokens, usage.completion_tokens)
+        except sqlite3.Error as e:
+            print(f"Warning: Could not archive the PRD of workflow {workflow_id}: {e}")
+
+    def _find_near_duplicate(self, state: WorkflowState) -> tuple:
+        """
+        Looks up a near-identical earlier requirement set for a workflow that starts from scratch.
+
+        Returns:
+            tuple[SimilarMatch | None, bool]: The match (None if there is none) and whether it is
+                                              close enough to be returned as is instead of seeding.
+        """
+        if self.similarity_index is None or state.step is not None:
+            return None, False
+        try:
+            match = self.similarity_index.find_similar(state.inputs, self.seed_threshold)
+        except sqlite3.Error as e:
+            print(f"Warning: Could not search the near-duplicate index: {e}")
+            return None, False
+        if match is None:
+            return None, False
+        reuse = self.near_duplicates == "reuse" and match.similarity >= self.reuse_threshold
+        print(f"Found a near-identical earlier requirement set (similarity {match.similarity:.2f}); "
+              f"{'reusing' if reuse else 'starting from'} its PRD: {match.prd_path}")
+        return match, reuse
+
+    def _reuse_near_duplicate(self, workflow_id: str, match: SimilarMatch) -> tuple:
+        """Completes a workflow with the PRD of a near-identical earlier requirement set, without LLM calls."""
+        self._checkpoint("save_prd", workflow_id, 1, match.prd, match.prd_path)
+        self._checkpoint("mark_completed", workflow_id)
+        return match.prd, match.prd_path
+
+    def _load_workflow_state(self, workflow_id: str, inputs: tuple) -> WorkflowState:
+        """
+        Returns the checkpointed state of a workflow, registering it if it is new.
+        Without a checkpoint store, every workflow starts from scratch.
+        """
+        if self.checkpoint_store is None:
+            return WorkflowState(workflow_id, inputs)
+        try:
+            return self.checkpoint_store.start_workflow(workflow_id, inputs)
+        except sqlite3.Error as e:
+            print(f"Warning: Could not load checkpoints for workflow {workflow_id}: {e}")
+            return WorkflowState(workflow_id, inputs)
+
+    def _checkpoint(self, method: str, workflow_id: str, *args):
+        """
+        Calls a checkpoint store method. A failing checkpoint is reported but never
+        aborts the workflow; it only means less can be resumed later.
+        """
+        if self.checkpoint_store is None:
+            return
+        try:
+            getattr(self.checkpoint_store, method)(workflow_id, *args)
+        except sqlite3.Error as e:
+            print(f"Warning: Could not checkpoint workflow {workflow_id}: {e}")
+
+    def _resumed_inputs(self, workflow_id: str) -> tuple:
+        """Returns the inputs of a checkpointed workflow, for the resume_* methods."""
+        state = self.checkpoint_store.load(workflow_id) if self.checkpoint_store is not None else None
+        if state is None:
+            raise ValueError(f"No checkpointed workflow with ID '{workflow_id}'.")
+        return state.inputs
+
+    def _completed_since(self, inputs: tuple, since: float):
+        """The checkpointed state of a workflow with these inputs that completed after since, or None."""
+        if self.checkpoint_store is None:
+            return None
+        try:
+            return self.checkpoint_store.find_completed(inputs, since)
+        except sqlite3.Error as e:
+            print(f"Warning: Could not look up completed workflows: {e}")
+            return None
+
+    def _workflow_claim_key(self, inputs: tuple):
+        """The in-flight registry key of a workflow, or None if identical workflows are not shared."""
+        # A waiting workflow reads the other one's result from the checkpoint store
+        if self.inflight is None or self.checkpoint_store is None:
+            return None
+        return f"workflow:{hash_workflow_inputs(inputs)}"
+
+    def _warn_shared_timeout(self, claim, shared):
+        if claim is None and shared is None:
+            print(f"Warning: An identical workflow did not finish within {self.shared_workflow_timeout:g}s. "
+                  f"Running this one without waiting further.")
+
+    @contextlib.contextmanager
+    def _shared_workflow(self, inputs: tuple):
+        """
+        Claims a workflow's inputs in the in-flight registry for the duration of the block.
+        If an identical workflow is already running in another thread or process, first waits
+        for it to finish, up to shared_workflow_timeout. Yields that workflow's completed state,
+        or None if this one has to run.
+        """
+        key = self._workflow_claim_key(inputs)
+        if key is None:
+            yield None
+            return
+        since = time.time()
+        claim, shared = self.inflight.claim_or_wait(key, lambda: self._completed_since(inputs, since),
+                                                    timeout=self.shared_workflow_timeout)
+        self._warn_shared_timeout(claim, shared)
+        try:
+            yield shared
+        finally:
+            self.inflight.release(key, claim)
+
+    @contextlib.asynccontextmanager
+    async def _ashared_workflow(self, inputs: tuple):
+        """Async version of _shared_workflow."""
+        key = self._workflow_claim_key(inputs)
+        if key is None:
+            yield None
+            return
+        since = time.time()
+        claim, shared = await self.inflight.aclaim_or_wait(key, lambda: self._completed_since(inputs, since),
+                                                           timeout=self.shared_workflow_timeout)
+        self._warn_shared_timeout(claim, shared)
+        try:
+            yield shared
+        finally:
+            await asyncio.to_thread(self.inflight.release, key, claim)
+
+    def _workflow_in_flight(self, inputs: tuple) -> bool:
+        """True if an identical workflow is running elsewhere, so _shared_workflow would wait for it."""
+        key = self._workflow_claim_key(inputs)
+        return key is not None and self.inflight.is_claimed(key)
+
+    def _run_shared_prd_workflow(self, inputs: tuple, workflow_id: str) -> tuple:
+        """Runs _run_prd_workflow under the inputs' in-flight claim, or adopts an identical workflow's result."""
+        with self._shared_workflow(inputs) as shared:
+            if shared is not None:
+                return self._adopt_shared_result(workflow_id, shared)
+            return self._run_prd_workflow(*inputs, workflow_id=workflow_id)
+
+    async def _arun_shared_prd_workflow(self, inputs: tuple, workflow_id: str) -> tuple:
+        """Async version of _run_shared_prd_workflow."""
+        async with self._ashared_workflow(inputs) as shared:
+            if shared is not None:
+                return await asyncio.to_thread(self._adopt_shared_result, workflow_id, shared)
+            return await self._run_prd_workflow_async(*inputs, workflow_id=workflow_id)
+
+    def _adopt_shared_result(self, workflow_id: str, shared: WorkflowState) -> tuple:
+        """Completes a workflow with the result of an identical one that finished elsewhere, without LLM calls."""
+        print(f"\n--- An identical workflow ({shared.workflow_id}) finished in another worker. Returning its PRD. ---")
+        if shared.workflow_id != workflow_id:
+            self._load_workflow_state(workflow_id, shared.inputs)
+            self._checkpoint("save_prd", workflow_id, 1, shared.prd, shared.prd_path)
+            self._checkpoint("mark_completed", workflow_id)
+        return shared.prd, shared.prd_path
+
+    def find_resumable_workflow(self, front_end_reqs: str, middleware_reqs: str, backend_reqs: str, other_details: str):
+        """
+        Returns the ID of the latest unfinished workflow with exactly these inputs
+        (e.g. one interrupted by a crashed session or restart), or None.
+        """
+        if self.checkpoint_store is None:
+            return None
+        return self.checkpoint_store.find_resumable((front_end_reqs, middleware_reqs, backend_reqs, other_details))
+
+    def run_prd_workflow(self, front_end_reqs: str, middleware_reqs: str, backend_reqs: str, other_details: str,
+                         run_id: str = None, workflow_id: str = None) -> tuple[str, str]:
         """
         Runs the iterative PRD creation and review workflow.
+        Each iteration's PRD, review feedback and verdict are checkpointed under the
+        workflow ID; running again with the ID of an interrupted workflow continues
+        after its last completed step instead of starting over. If an identical workflow
+        is already running in another thread or process, waits for it and returns its result.
 
         Args:
             front_end_reqs (str): Description of front-end requirements.
             middleware_reqs (str): Description of middleware requirements.
             backend_reqs (str): Description of backend requirements.
             other_details (str): Any additional project details or requirements.
+            run_id (str, optional): ID under which this run's metrics are recorded.
+                                    Generated if omitted (see Instrumentation.run_context).
+            workflow_id (str, optional): ID under which the workflow is checkpointed. Defaults to the run ID.
 
         Returns:
             tuple[str, str]: A tuple containing the final generated PRD document content
                              and the full path to the saved PRD file.
+
+        Raises:
+            ValueError: If workflow_id was checkpointed with different inputs.
+        """
+        inputs = (front_end_reqs, middleware_reqs, backend_reqs, other_details)
+        with self.instrumentation.run_context(run_id) as active_run_id:
+            return self._run_shared_prd_workflow(inputs, workflow_id or active_run_id)
+
+    def resume_prd_workflow(self, workflow_id: str, run_id: str = None) -> tuple[str, str]:
         """
+        Continues a checkpointed workflow from its last completed step, using its stored inputs.
+        A workflow that already finished returns its final PRD without any LLM calls.
+
+        Raises:
+            ValueError: If no workflow with this ID was checkpointed.
+        """
+        return self.run_prd_workflow(*self._resumed_inputs(workflow_id), run_id=run_id, workflow_id=workflow_id)
+
+    def _run_prd_workflow(self, front_end_reqs: str, middleware_reqs: str, backend_reqs: str, other_details: str,
+                          workflow_id: str = None) -> tuple[str, str]:
+        """Body of run_prd_workflow, executed inside the run's instrumentation context."""
         prd_creator = self.get_agent("prd_creator")
         prd_reviewer = self.get_agent("prd_reviewer")
 
-        current_prd_content = None
-        saved_prd_path = None
-        previous_feedback = None
+        state, near_duplicate, result = self._open_workflow(
+            workflow_id, (front_end_reqs, middleware_reqs, backend_reqs, other_details))
+        if result is not None:
+            return result
+        current_prd_content = state.prd
+        saved_prd_path = state.prd_path
+        previous_feedback = state.previous_feedback
+        previous_verdict = self._previous_verdict(state)
+        satisfactory = False
+        best = state.best
+        pipelined = self.review_mode == "pipelined"
+        speculative = None  # (SpeculativeRevision, UsageTally, tier) of the last reviewed PRD, in pipelined mode
+
+        for iteration in range(state.next_iteration, self.max_review_iterations + 1):
+            print(f"\n--- Iteration {iteration} ---")
+            iteration_started = time.perf_counter()
+            tier = self._cascade_tier(prd_creator, iteration, previous_verdict)
+            if tier:
+                print(f"Using the {tier} model tier.")
+            if speculative is not None and speculative[2] != tier:
+                speculative[0].cancel()  # drafted for another model tier
+                speculative = None
+            review = None  # pipelined review of this iteration's PRD
+            try:
+                if iteration == state.iteration and state.step == "prd":
+                    print(f"Reusing checkpointed PRD: {saved_prd_path}")
+                else:
+                    print(f"Generating/Revising PRD...")
+                    with self.instrumentation.usage_tally() as usage, model_tier(tier):
+                        revised = speculative[0].complete(previous_feedback) if speculative is not None else None
+                        if revised is not None:
+                            usage.merge(speculative[1])
+                            current_prd_content, saved_prd_path = revised, prd_creator.store_prd(revised)
+                        else:
+                            request = self._prd_request(state.inputs, previous_feedback, current_prd_content,
+                                                        near_duplicate)
+                            if pipelined:
+                                # The review starts on each section while the PRD is still being written
+                                review = prd_reviewer.start_pipelined_review()
+                                current_prd_content, saved_prd_path = self._generate_into_review(
+                                    prd_creator, review, **request)
+                            else:
+                                current_prd_content, saved_prd_path = prd_creator.generate(**request)
+                    print(f"PRD Generated/Revised. Saved to: {saved_prd_path}")
+                    self._save_iteration_prd(state, iteration, current_prd_content, saved_prd_path, usage)
+                creator_done = time.perf_counter()
+                speculative = None
+
+                print(f"Reviewing PRD...")
+                with model_tier(tier):
+                    if pipelined:
+                        # A checkpointed or speculatively revised PRD is complete: its review starts all at once
+                        review = review or prd_reviewer.start_pipelined_review()
+                        review.finish(current_prd_content)
+                        if self.incremental_revisions and iteration < self.max_review_iterations:
+                            speculative = self._start_speculative_revision(
+                                prd_creator, review, state.inputs, current_prd_content,
+                                self._cascade_tier(prd_creator, iteration + 1), previous_verdict)
+                        review_feedback, verdict = review.result()
+                    else:
+                        review_feedback, verdict = self._review(prd_reviewer, current_prd_content)
+            except BaseException:
+                if speculative is not None:
+                    speculative[0].cancel()
+                raise
+            finally:
+                if review is not None:
+                    review.cancel()
+            print(f"Review Feedback:\n{review_feedback}")
+
+            satisfactory, stop_reason, best = self._conclude_iteration(
+                state, iteration, iteration_started, creator_done, (review_feedback, verdict), previous_verdict,
+                current_prd_content, saved_prd_path, best)
+            self._report_progress(iteration, stop_reason)
+            if stop_reason:
+                if speculative is not None:
+                    print("Discarding the speculative revision: the workflow stops here.")
+                    speculative[0].cancel()
+                break
+            previous_feedback = review_feedback
+            previous_verdict = verdict
+        else:
+            print(
+                f"\n--- Max iterations ({self.max_review_iterations}) reached. Returning the final PRD. ---")
+        return self._finish_workflow(workflow_id, None if satisfactory else best, current_prd_content,
+                                     saved_prd_path, state.inputs)
+
+    @staticmethod
+    def _relay_chunks(chunks, event: str, iteration: int):
+        """
+        Re-emits the chunks of an agent stream as workflow events and returns the
+        stream's own return value, so callers can write 'result = yield from ...'.
+        """
+        while True:
+            try:
+                text = next(chunks)
+            except StopIteration as stop:
+                return stop.value
+            yield {"event": event, "iteration": iteration, "text": text}
+
+    def stream_prd_workflow(self, front_end_reqs: str, middleware_reqs: str, backend_reqs: str, other_details: str,
+                            run_id: str = None, workflow_id: str = None):
+        """
+        Streaming version of run_prd_workflow. Yields events as the workflow
+        progresses so a UI can render the PRD and the review while they are generated.
+        Checkpoints and resumes exactly like run_prd_workflow. The review is streamed once
+        the PRD is complete, in pipelined review mode too.
+
+        Event dictionaries all carry an 'event' key:
+            workflow_resumed   - {'workflow_id', 'iteration', 'content', 'path', 'feedback'}
+                                 (only when continuing from a checkpoint)
+            near_duplicate_found - {'similarity', 'path', 'reused'} (only for a new workflow whose inputs
+                                 are near-identical to an earlier one; if 'reused', workflow_completed follows)
+            duplicate_in_progress - {} (an identical workflow is running elsewhere; this one waits for it)
+            workflow_shared    - {'workflow_id', 'path'} (that workflow finished; workflow_completed follows
+                                 with its result)
+            iteration_started  - {'iteration', 'model_tier'} (see _cascade_tier)
+            prd_chunk          - {'iteration', 'text'}
+            prd_saved          - {'iteration', 'content', 'path'}
+            review_chunk       - {'iteration', 'text'}
+            review_completed   - {'iteration', 'feedback', 'satisfactory', 'score', 'stop_reason'}
+            workflow_completed - {'iterations', 'content', 'path', 'satisfactory', 'run_id', 'workflow_id'}
+
+        Args:
+            front_end_reqs (str): Description of front-end requirements.
+            middleware_reqs (str): Description of middleware requirements.
+            backend_reqs (str): Description of backend requirements.
+            other_details (str): Any additional project details or requirements.
+            run_id (str, optional): ID under which this run's metrics are recorded.
+            workflow_id (str, optional): ID under which the workflow is checkpointed. Defaults to the run ID.
+
+        Yields:
+            dict: Workflow events, ending with 'workflow_completed'.
+        """
+        inputs = (front_end_reqs, middleware_reqs, backend_reqs, other_details)
+        if self._workflow_in_flight(inputs):
+            yield {"event": "duplicate_in_progress"}
+        with self.instrumentation.run_context(run_id) as active_run_id, self._shared_workflow(inputs) as shared:
+            workflow_id = workflow_id or active_run_id
+            if shared is not None:
+                yield {"event": "workflow_shared", "workflow_id": shared.workflow_id, "path": shared.prd_path}
+                content, path = self._adopt_shared_result(workflow_id, shared)
+                yield {"event": "workflow_completed", "iterations": shared.iteration, "content": content,
+                       "path": path, "satisfactory": shared.satisfactory, "run_id": active_run_id,
+                       "workflow_id": workflow_id}
+                return
+            prd_creator = self.get_agent("prd_creator")
+            prd_reviewer = self.get_agent("prd_reviewer")
+
+            state = self._load_workflow_state(workflow_id, inputs)
+            current_prd_content = state.prd
+            saved_prd_path = state.prd_path
+            previous_feedback = state.previous_feedback
+            satisfactory = state.satisfactory
+            iteration = state.iteration
+            previous_verdict = self._previous_verdict(state)
+            best = state.best
+            if state.step:
+                yield {"event": "workflow_resumed", "workflow_id": workflow_id, "iteration": state.iteration,
+                       "content": current_prd_content, "path": saved_prd_path, "feedback": state.feedback}
+            near_duplicate, reuse = self._find_near_duplicate(state)
+            if near_duplicate is not None:
+                yield {"event": "near_duplicate_found", "similarity": near_duplicate.similarity,
+                       "path": near_duplicate.prd_path, "reused": reuse}
+            if reuse:
+                current_prd_content, saved_prd_path = self._reuse_near_duplicate(workflow_id, near_duplicate)
+
+            if not reuse and not state.is_finished(self.max_review_iterations):
+                for iteration in range(state.next_iteration, self.max_review_iterations + 1):
+                    tier = self._cascade_tier(prd_creator, iteration, previous_verdict)
+                    yield {"event": "iteration_started", "iteration": iteration, "model_tier": tier}
+                    iteration_started = time.perf_counter()
+                    if not (iteration == state.iteration and state.step == "prd"):
+                        with self.instrumentation.usage_tally() as usage, model_tier(tier):
+                            current_prd_content, saved_prd_path = yield from self._relay_chunks(
+                                prd_creator.generate(
+                                    stream=True, **self._prd_request(state.inputs, previous_feedback,
+                                                                     current_prd_content, near_duplicate)),
+                                "prd_chunk", iteration)
+                        self._save_iteration_prd(state, iteration, current_prd_content, saved_prd_path, usage)
+                    creator_done = time.perf_counter()
+                    yield {"event": "prd_saved", "iteration": iteration,
+                           "content": current_prd_content, "path": saved_prd_path}
+
+                    with model_tier(tier):
+                        review_feedback, verdict = yield from self._relay_chunks(
+                            self._review_stream(prd_reviewer, current_prd_content), "review_chunk", iteration)
+                    satisfactory, stop_reason, best = self._conclude_iteration(
+                        state, iteration, iteration_started, creator_done, (review_feedback, verdict),
+                        previous_verdict, current_prd_content, saved_prd_path, best)
+                    yield {"event": "review_completed", "iteration": iteration, "feedback": review_feedback,
+                           "satisfactory": satisfactory, "score": verdict.overall_score if verdict else None,
+                           "stop_reason": stop_reason}
+                    if stop_reason:
+                        break
+                    previous_feedback = review_feedback
+                    previous_verdict = verdict
+
+            if not reuse:
+                current_prd_content, saved_prd_path = self._finish_workflow(
+                    workflow_id, None if satisfactory else best, current_prd_content, saved_prd_path, state.inputs)
+            yield {"event": "workflow_completed", "iterations": iteration, "content": current_prd_content,
+                   "path": saved_prd_path, "satisfactory": satisfactory, "run_id": active_run_id,
+                   "workflow_id": workflow_id}
+
+    async def run_prd_workflow_async(self, front_end_reqs: str, middleware_reqs: str, backend_reqs: str, other_details: str,
+                                     run_id: str = None, workflow_id: str = None) -> tuple[str, str]:
+        """
+        Async version of run_prd_workflow. Agent calls are awaited instead of blocking
+        a thread, so a single event loop can drive many workflows concurrently, e.g.
+        with asyncio.gather(*(orchestrator.run_prd_workflow_async(...) for ...)).
+
+        Args:
+            front_end_reqs (str): Description of front-end requirements.
+            middleware_reqs (str): Description of middleware requirements.
+            backend_reqs (str): Description of backend requirements.
+            other_details (str): Any additional project details or requirements.
+            run_id (str, optional): ID under which this run's metrics are recorded.
+            workflow_id (str, optional): ID under which the workflow is checkpointed. Defaults to the run ID.
+
+        Returns:
+            tuple[str, str]: A tuple containing the final generated PRD document content
+                             and the full path to the saved PRD file.
+        """
+        inputs = (front_end_reqs, middleware_reqs, backend_reqs, other_details)
+        with self.instrumentation.run_context(run_id) as active_run_id:
+            return await self._arun_shared_prd_workflow(inputs, workflow_id or active_run_id)
 
-        print("\n--- Starting PRD Generation Workflow ---")
+    async def resume_prd_workflow_async(self, workflow_id: str, run_id: str = None) -> tuple[str, str]:
+        """Async version of resume_prd_workflow."""
+        return await self.run_prd_workflow_async(*self._resumed_inputs(workflow_id), run_id=run_id,
+                                                 workflow_id=workflow_id)
 
-        for iteration in range(1, self.max_review_iterations + 1):
+    async def _run_prd_workflow_async(self, front_end_reqs: str, middleware_reqs: str, backend_reqs: str, other_details: str,
+                                      workflow_id: str = None) -> tuple[str, str]:
+        """
+        Body of run_prd_workflow_async, executed inside the run's instrumentation context.
+        Checkpoint, archive and index calls run in worker threads, so their SQLite I/O never
+        blocks the event loop. Pipelined review mode is built on threads (see PipelinedReview),
+        so it runs the synchronous workflow in a worker thread.
+        """
+        inputs = (front_end_reqs, middleware_reqs, backend_reqs, other_details)
+        if self.review_mode == "pipelined":
+            return await asyncio.to_thread(self._run_prd_workflow, *inputs, workflow_id=workflow_id)
+        prd_creator = self.get_agent("prd_creator")
+        prd_reviewer = self.get_agent("prd_reviewer")
+
+        state, near_duplicate, result = await asyncio.to_thread(self._open_workflow, workflow_id, inputs, " (async)")
+        if result is not None:
+            return result
+        current_prd_content = state.prd
+        saved_prd_path = state.prd_path
+        previous_feedback = state.previous_feedback
+        previous_verdict = self._previous_verdict(state)
+        satisfactory = False
+        best = state.best
+
+        for iteration in range(state.next_iteration, self.max_review_iterations + 1):
             print(f"\n--- Iteration {iteration} ---")
-            print(f"Generating/Revising PRD...")
-            current_prd_content, saved_prd_path = prd_creator.generate(
-                front_end_reqs=front_end_reqs,
-                middleware_reqs=middleware_reqs,
-                backend_reqs=backend_reqs,
-                other_details=other_details,
-                previous_feedback=previous_feedback  # Pass feedback for revision
-            )
-            print(f"PRD Generated/Revised. Saved to: {saved_prd_path}")
+            iteration_started = time.perf_counter()
+            tier = self._cascade_tier(prd_creator, iteration, previous_verdict)
+            if tier:
+                print(f"Using the {tier} model tier.")
+            if iteration == state.iteration and state.step == "prd":
+                print(f"Reusing checkpointed PRD: {saved_prd_path}")
+            else:
+                print(f"Generating/Revising PRD...")
+                with self.instrumentation.usage_tally() as usage, model_tier(tier):
+                    current_prd_content, saved_prd_path = await prd_creator.agenerate(
+                        **self._prd_request(state.inputs, previous_feedback, current_prd_content, near_duplicate))
+                print(f"PRD Generated/Revised. Saved to: {saved_prd_path}")
+                await asyncio.to_thread(
+                    self._save_iteration_prd, state, iteration, current_prd_content, saved_prd_path, usage)
+            creator_done = time.perf_counter()
 
             print(f"Reviewing PRD...")
-            review_feedback = prd_reviewer.generate(
-                prd_document=current_prd_content)
+            with model_tier(tier):
+                review_feedback, verdict = await self._areview(prd_reviewer, current_prd_content)
             print(f"Review Feedback:\n{review_feedback}")
 
-            if self._is_prd_satisfactory(review_feedback):
-                print(
-                    f"\n--- PRD is satisfactory after {iteration} iterations. ---")
-                return current_prd_content, saved_prd_path
-            else:
-                print(
-                    "PRD requires further revisions. Incorporating feedback for next iteration.")
-                # Store feedback for the next generation call
-                previous_feedback = review_feedback
+            satisfactory, stop_reason, best = await asyncio.to_thread(
+                self._conclude_iteration, state, iteration, iteration_started, creator_done,
+                (review_feedback, verdict), previous_verdict, current_prd_content, saved_prd_path, best)
+            self._report_progress(iteration, stop_reason)
+            if stop_reason:
+                break
+            previous_feedback = review_feedback
+            previous_verdict = verdict
+        else:
+            print(
+                f"\n--- Max iterations ({self.max_review_iterations}) reached. Returning the final PRD. ---")
+        return await asyncio.to_thread(self._finish_workflow, workflow_id, None if satisfactory else best,
+                                       current_prd_content, saved_prd_path, state.inputs)
+
+
+    def build_blueprint_dag(self, artifacts=None, asynchronous: bool = False) -> WorkflowDAG:
+        """
+        Builds the blueprint workflow as a DAG: the iterative PRD creation and review loop is
+        one node reading the four workflow inputs, and every requested artifact is a node
+        reading the final PRD, so the artifacts are generated concurrently. Node outputs
+        are memoized in self.dag_memo, so a node whose upstream artifacts are unchanged is
+        not run again. Further agents can be added as nodes of the returned DAG.
+
+        Args:
+            artifacts (Iterable[str], optional): Keys of BLUEPRINT_ARTIFACTS. Defaults to all of them.
+            asynchronous (bool): Build coroutine nodes for WorkflowDAG.arun.
+
+        Returns:
+            WorkflowDAG: Nodes 'prd' (outputs 'prd', 'prd_path') and one per artifact
+                         (outputs '<artifact>', '<artifact>_path').
+        """
+        artifacts = list(self.BLUEPRINT_ARTIFACTS) if artifacts is None else list(artifacts)
+        unknown = set(artifacts) - set(self.BLUEPRINT_ARTIFACTS)
+        if unknown:
+            raise ValueError(f"Unknown artifacts {sorted(unknown)}. Use {sorted(self.BLUEPRINT_ARTIFACTS)}.")
+        dag = WorkflowDAG(memo=self.dag_memo, max_workers=len(artifacts) + 1)
+        dag.add_node("prd", self._aprd_node if asynchronous else self._prd_node, inputs=WORKFLOW_INPUTS,
+                     outputs=("prd", "prd_path"))
+        for artifact in artifacts:
+            node = self._aartifact_node if asynchronous else self._artifact_node
+            dag.add_node(artifact, functools.partial(node, artifact), inputs=("prd",),
+                         outputs=(artifact, f"{artifact}_path"))
+        return dag
+
+    def _prd_node(self, **inputs) -> dict:
+        content, path = self._run_shared_prd_workflow(tuple(inputs[name] for name in WORKFLOW_INPUTS),
+                                                      current_run_id())
+        return {"prd": content, "prd_path": path}
+
+    async def _aprd_node(self, **inputs) -> dict:
+        content, path = await self._arun_shared_prd_workflow(tuple(inputs[name] for name in WORKFLOW_INPUTS),
+                                                             current_run_id())
+        return {"prd": content, "prd_path": path}
+
+    def _artifact_node(self, artifact: str, prd: str) -> dict:
+        content, path = self.get_agent(self.BLUEPRINT_ARTIFACTS[artifact]).generate(prd)
+        return {artifact: content, f"{artifact}_path": path}
+
+    async def _aartifact_node(self, artifact: str, prd: str) -> dict:
+        content, path = await self.get_agent(self.BLUEPRINT_ARTIFACTS[artifact]).agenerate(prd)
+        return {artifact: content, f"{artifact}_path": path}
+
+    def run_blueprint_workflow(self, front_end_reqs: str, middleware_reqs: str, backend_reqs: str, other_details: str,
+                               artifacts=None, run_id: str = None) -> DAGRun:
+        """
+        Runs the PRD workflow and then derives the requested documents (work breakdown
+        structure, risk register, test plan) from the final PRD concurrently, so the
+        blueprint takes the PRD's time plus the slowest artifact rather than the sum.
+
+        Args:
+            front_end_reqs (str): Description of front-end requirements.
+            middleware_reqs (str): Description of middleware requirements.
+            backend_reqs (str): Description of backend requirements.
+            other_details (str): Any additional project details or requirements.
+            artifacts (Iterable[str], optional): Keys of BLUEPRINT_ARTIFACTS. Defaults to all of them.
+            run_id (str, optional): ID under which this run's metrics are recorded; also the PRD's workflow ID.
+
+        Returns:
+            DAGRun: run.artifacts holds 'prd', 'prd_path' and '<artifact>' / '<artifact>_path' for each
+                    artifact; run.critical_path() and run.durations show where the time went.
+        """
+        dag = self.build_blueprint_dag(artifacts)
+        inputs = dict(zip(WORKFLOW_INPUTS, (front_end_reqs, middleware_reqs, backend_reqs, other_details)))
+        with self.instrumentation.run_context(run_id):
+            run = dag.run(inputs)
+        self._report_blueprint(run)
+        return run
+
+    async def run_blueprint_workflow_async(self, front_end_reqs: str, middleware_reqs: str, backend_reqs: str,
+                                           other_details: str, artifacts=None, run_id: str = None) -> DAGRun:
+        """Async version of run_blueprint_workflow."""
+        dag = self.build_blueprint_dag(artifacts, asynchronous=True)
+        inputs = dict(zip(WORKFLOW_INPUTS, (front_end_reqs, middleware_reqs, backend_reqs, other_details)))
+        with self.instrumentation.run_context(run_id):
+            run = await dag.arun(inputs)
+        self._report_blueprint(run)
+        return run
+
+    @staticmethod
+    def _report_blueprint(run: DAGRun):
+        reused = f", reused: {', '.join(sorted(run.memoized))}" if run.memoized else ""
+        print(f"\n--- Blueprint completed in {run.wall_time_s:.1f}s (critical path: "
+              f"{' -> '.join(run.critical_path())}; {run.sequential_time_s:.1f}s if run one after another{reused}) ---")
+
+    def _get_process_backend(self) -> ProcessPoolBackend:
+        """The process pool behind the "process" execution backend, started on first use."""
+        if self._process_backend is None:
+            config = {
+                "max_review_iterations": self.max_review_iterations,
+                "incremental_revisions": self.incremental_revisions,
+                "review_mode": self.review_mode,
+                "output_folder": self.output_folder,
+                "use_checkpoints": self.checkpoint_store is not None,
+                "checkpoint_db_path": self.checkpoint_store.db_path if self.checkpoint_store else None,
+                "target_score": self.target_score,
+                "min_score_improvement": self.min_score_improvement,
+                "near_duplicates": self.near_duplicates,
+                "similarity_db_path": self.similarity_index.db_path if self.similarity_index else None,
+                "seed_threshold": self.seed_threshold,
+                "reuse_threshold": self.reuse_threshold,
+                "use_archive": self.archive is not None,
+                "archive_db_path": self.archive.db_path if self.archive else None,
+            }
+            factory = self.agent_kwargs_factory or functools.partial(dict, self.agent_kwargs)
+            self._process_backend = ProcessPoolBackend(config, self.max_workers, factory)
+        return self._process_backend
+
+    def warm_up(self):
+        """
+        Constructs the agents up front and, with the "process" execution backend, starts
+        the worker processes, so the first workflows do not pay for the setup.
+        """
+        self.get_all_agents()
+        if self.execution_backend == "process":
+            self._get_process_backend().start()
+
+    def run_prd_workflows(self, requirement_sets, include_content: bool = True):
+        """
+        Runs a PRD workflow for each requirement set on the configured execution backend
+        and yields the results as they finish. Use this instead of calling run_prd_workflow
+        in a loop for large batches; with the "process" backend, throughput scales with
+        the number of CPU cores.
+
+        Args:
+            requirement_sets (Iterable[tuple]): (front_end_reqs, middleware_reqs, backend_reqs, other_details)
+                                                per workflow. Consumed lazily.
+            include_content (bool): If False, results carry only the saved PRD path, not its text.
+
+        Yields:
+            dict: 'index' (position in requirement_sets), 'status' ('ok' or 'error'),
+                  'prd_path' and 'prd' on success, or 'error'.
+        """
+        if self.execution_backend == "process":
+            backend = self._get_process_backend()
+            backend.include_content = include_content
+            yield from backend.map(requirement_sets)
+            return
+
+        def run(index, inputs):
+            result = {"index": index}
+            try:
+                content, path = self.run_prd_workflow(*inputs)
+                result.update(status="ok", prd_path=path)
+                if include_content:
+                    result["prd"] = content
+            except Exception as e:
+                result.update(status="error", error=str(e))
+            return result
+
+        max_workers = self.max_workers or 8
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = set()
+            for index, inputs in enumerate(requirement_sets):
+                pending.add(submit_in_context(executor, run, index, tuple(inputs)))
+                if len(pending) >= 2 * max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from (future.result() for future in done)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from (future.result() for future in done)
 
-        print(
-            f"\n--- Max iterations ({self.max_review_iterations}) reached. Returning last generated PRD. ---")
-        return current_prd_content, saved_prd_path
+    def shutdown(self):
+        """Stops the worker processes of the "process" execution backend, if they were started."""
+        if self._process_backend is not None:
+            self._process_backend.shutdown()
+            self._process_backend = None
 
 
 # Example Usage (assuming you have Base_Agent, PRD_Creator_Agent, PRD_Reviewer_Agent in 'Agents' directory)
@@ -194,10 +1193,9 @@ if __name__ == "__main__":
     try:
         orchestrator = Orchestrator(max_review_iterations=3)
 
-        # You can add more agents here if needed, for example:
-        # from Agents.WBS_Creator_Agent import WBSCreatorAgent # Assuming you have one
-        # wbs_agent = WBSCreatorAgent()
-        # orchestrator.add_agent("wbs_creator", wbs_agent)
+        # To also derive a WBS, risk register and test plan from the final PRD, concurrently:
+        # run = orchestrator.run_blueprint_workflow(front_end, middleware, backend, other)
+        # print(run.artifacts["wbs_path"], run.artifacts["risks_path"], run.artifacts["test_plan_path"])
 
         final_prd_content, final_prd_path = orchestrator.run_prd_workflow(
             front_end_reqs=front_end,
@@ -0,0 +1,455 @@
+# Agents/PRD_Archive.py
+
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+try:
+    import zstandard  # Optional: smaller and faster compression. Without it documents are gzip-compressed.
+except ImportError:
+    zstandard = None
+
+from Agents.LLM_Cache import DEFAULT_CACHE_DIR
+
+_default_archive = None
+_default_archive_lock = threading.Lock()
+
+ZSTD_LEVEL = 10
+GZIP_LEVEL = 6
+
+# Retention runs automatically after this many newly archived documents
+RETENTION_INTERVAL = 500
+
+DOCUMENT_COLUMNS = ("doc_id", "document_type", "version", "path", "workflow_id", "iteration", "inputs_hash",
+                    "model", "prompt_tokens", "completion_tokens", "created_at", "is_final", "file_pruned",
+                    "size_bytes", "stored_bytes", "codec")
+
+
+def compress_text(text: str) -> tuple:
+    """
+    Compresses a document with zstd if the zstandard package is installed, otherwise with gzip.
+
+    Returns:
+        tuple[str, bytes]: The codec name ('zstd' or 'gzip') and the compressed bytes.
+    """
+    data = text.encode("utf-8")
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return "gzip", gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def decompress_text(codec: str, data: bytes) -> str:
+    """Reverses compress_text."""
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This document is zstd-compressed; install the 'zstandard' package to read it.")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    if codec == "gzip":
+        return gzip.decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown codec '{codec}'.")
+
+
+def fts_query(text: str) -> str:
+    """
+    Turns free text into an FTS5 query that matches documents containing all of its words
+    (prefix matches for words ending in '*'), so punctuation never causes a syntax error.
+    """
+    terms = re.findall(r"\w+\*?", text or "")
+    return " ".join(f'"{term.rstrip("*")}"' + ("*" if term.endswith("*") else "") for term in terms)
+
+
+class ArchivedDocument:
+    """Index entry of an archived document; content is only filled in by PRDArchive.get."""
+
+    def __init__(self, doc_id: int, document_type: str, version: int, path: str, workflow_id: str, iteration: int,
+                 inputs_hash: str, model: str, prompt_tokens: int, completion_tokens: int, created_at: float,
+                 is_final: int, file_pruned: int, size_bytes: int, stored_bytes: int, codec: str,
+                 content: str = None):
+        self.doc_id = doc_id
+        self.document_type = document_type
+        self.version = version
+        self.path = path
+        self.workflow_id = workflow_id
+        self.iteration = iteration
+        self.inputs_hash = inputs_hash
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.created_at = created_at
+        self.is_final = bool(is_final)  # the PRD its workflow returned
+        self.file_pruned = bool(file_pruned)  # the markdown file was removed; the archive keeps the content
+        self.size_bytes = size_bytes
+        self.stored_bytes = stored_bytes
+        self.codec = codec
+        self.content = content
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+    def __repr__(self):
+        return f"ArchivedDocument({self.doc_id}, {self.document_type}_v{self.version}, workflow={self.workflow_id!r})"
+
+
+class PRDArchive:
+    """
+    A compressed, indexed archive of every generated document, kept in one SQLite file
+    next to the plain markdown files in 'output'.
+
+    Content is stored once per distinct text (identical documents share a blob) and
+    compressed with zstd or gzip. A metadata table indexes workflow ID, iteration, input
+    hash, model, token usage and timestamps, and a contentless FTS5 table provides ranked
+    full-text search without keeping a second, uncompressed copy of the text. Lookups and
+    searches go through indexes, so they stay fast with hundreds of thousands of documents.
+    """
+
+    def __init__(self, db_path: str, retention_days: float = None, max_documents: int = None,
+                 prune_files_days: float = None):
+        """
+        Args:
+            db_path (str): Path of the SQLite file. Created if it does not exist.
+            retention_days (float, optional): Documents older than this are deleted by apply_retention,
+                                              except final PRDs. Kept forever if None.
+            max_documents (int, optional): apply_retention keeps at most this many documents, newest first.
+            prune_files_days (float, optional): apply_retention deletes the markdown files of archived
+                                                documents older than this; their content stays in the archive.
+        """
+        self.db_path = db_path
+        self.retention_days = retention_days
+        self.max_documents = max_documents
+        self.prune_files_days = prune_files_days
+        self._lock = threading.RLock()
+        self._added_since_retention = 0
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " blob_id INTEGER PRIMARY KEY, content_hash TEXT UNIQUE NOT NULL, codec TEXT NOT NULL,"
+            " size_bytes INTEGER NOT NULL, stored_bytes INTEGER NOT NULL, body BLOB NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " doc_id INTEGER PRIMARY KEY, blob_id INTEGER NOT NULL, document_type TEXT NOT NULL,"
+            " version INTEGER, path TEXT, workflow_id TEXT, iteration INTEGER, inputs_hash TEXT, model TEXT,"
+            " prompt_tokens INTEGER NOT NULL DEFAULT 0, completion_tokens INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL, is_final INTEGER NOT NULL DEFAULT 0, file_pruned INTEGER NOT NULL DEFAULT 0)")
+        for name, columns in (("workflow", "workflow_id, iteration"), ("inputs", "inputs_hash"),
+                              ("created", "created_at"), ("version", "document_type, version"),
+                              ("path", "path"), ("blob", "blob_id")):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_documents_{name} ON documents({columns})")
+        try:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5("
+                " content, content='', tokenize='porter unicode61')")
+            self.full_text = True
+        except sqlite3.OperationalError:
+            print("Warning: This SQLite build has no FTS5; PRD archive full-text search is disabled.")
+            self.full_text = False
+        self._conn.commit()
+
+    def _select(self, where: str = "", params: tuple = (), tail: str = "", source: str = "documents d") -> list:
+        columns = ", ".join(f"d.{c}" for c in DOCUMENT_COLUMNS[:-3]) + ", b.size_bytes, b.stored_bytes, b.codec"
+        query = f"SELECT {columns} FROM {source} JOIN blobs b ON b.blob_id = d.blob_id"
+        if where:
+            query += f" WHERE {where}"
+        with self._lock:
+            return [ArchivedDocument(*row) for row in self._conn.execute(f"{query} {tail}", params)]
+
+    def _store_blob(self, content: str) -> int:
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        row = self._conn.execute("SELECT blob_id FROM blobs WHERE content_hash = ?", (content_hash,)).fetchone()
+        if row is not None:
+            return row[0]
+        codec, body = compress_text(content)
+        blob_id = self._conn.execute(
+            "INSERT INTO blobs (content_hash, codec, size_bytes, stored_bytes, body) VALUES (?, ?, ?, ?, ?)",
+            (content_hash, codec, len(content.encode("utf-8")), len(body), body)).lastrowid
+        if self.full_text:
+            self._conn.execute("INSERT INTO documents_fts (rowid, content) VALUES (?, ?)", (blob_id, content))
+        return blob_id
+
+    def add(self, content: str, document_type: str = "PRD", version: int = None, path: str = None,
+            workflow_id: str = None, iteration: int = None, inputs_hash: str = None, model: str = None,
+            prompt_tokens: int = 0, completion_tokens: int = 0, created_at: float = None) -> int:
+        """
+        Archives a document with its metadata.
+
+        Returns:
+            int: The document's archive ID.
+        """
+        with self._lock:
+            blob_id = self._store_blob(content or "")
+            doc_id = self._conn.execute(
+                "INSERT INTO documents (blob_id, document_type, version, path, workflow_id, iteration, inputs_hash,"
+                " model, prompt_tokens, completion_tokens, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (blob_id, document_type, version, path, workflow_id, iteration, inputs_hash, model,
+                 prompt_tokens or 0, completion_tokens or 0, created_at or time.time())).lastrowid
+            self._conn.commit()
+            self._added_since_retention += 1
+            run_retention = self._added_since_retention >= RETENTION_INTERVAL
+        if run_retention:
+            self.apply_retention()
+        return doc_id
+
+    def mark_final(self, workflow_id: str, path: str):
+        """Flags the document a workflow returned, so retention keeps it."""
+        with self._lock:
+            self._conn.execute("UPDATE documents SET is_final = 1 WHERE workflow_id = ? AND path = ?",
+                               (workflow_id, path))
+            self._conn.commit()
+
+    def get(self, doc_id: int = None, path: str = None):
+        """
+        Loads an archived document by archive ID or by its original file path (the latest one).
+
+        Returns:
+            ArchivedDocument | None: The document with its content, or None if it is not archived.
+        """
+        if doc_id is not None:
+            matches = self._select("d.doc_id = ?", (doc_id,))
+        else:
+            matches = self._select("d.path = ?", (path,), "ORDER BY d.doc_id DESC LIMIT 1")
+        if not matches:
+            return None
+        document = matches[0]
+        with self._lock:
+            codec, body = self._conn.execute(
+                "SELECT b.codec, b.body FROM documents d JOIN blobs b ON b.blob_id = d.blob_id WHERE d.doc_id = ?",
+                (document.doc_id,)).fetchone()
+        document.content = decompress_text(codec, body)
+        return document
+
+    def find(self, workflow_id: str = None, inputs_hash: str = None, document_type: str = None,
+             since: float = None, until: float = None, final_only: bool = False, limit: int = 100) -> list:
+        """
+        Lists archived documents by metadata, newest first.
+
+        Returns:
+            list[ArchivedDocument]: Matching index entries (without content).
+        """
+        conditions, params = self._filters(workflow_id, inputs_hash, document_type, since, until, final_only)
+        return self._select(" AND ".join(conditions), (*params, limit), "ORDER BY d.created_at DESC LIMIT ?")
+
+    @staticmethod
+    def _filters(workflow_id, inputs_hash, document_type, since, until, final_only) -> tuple:
+        conditions, params = [], []
+        for column, value in (("d.workflow_id", workflow_id), ("d.inputs_hash", inputs_hash),
+                              ("d.document_type", document_type)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("d.created_at >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("d.created_at < ?")
+            params.append(until)
+        if final_only:
+            conditions.append("d.is_final = 1")
+        return conditions, params
+
+    def search(self, query: str, workflow_id: str = None, document_type: str = None, since: float = None,
+               until: float = None, final_only: bool = False, limit: int = 20, raw: bool = False) -> list:
+        """
+        Full-text search, best matches (BM25) first. Words are stemmed, so 'authenticate'
+        also finds 'authentication'.
+
+        Args:
+            query (str): Words that must all appear. With raw=True, an FTS5 query expression
+                         (e.g. 'oauth OR saml', '"single sign on"', 'pay*').
+
+        Returns:
+            list[ArchivedDocument]: Matching index entries (without content).
+
+        Raises:
+            RuntimeError: If SQLite was built without FTS5.
+        """
+        if not self.full_text:
+            raise RuntimeError("Full-text search needs an SQLite build with FTS5.")
+        match = query if raw else fts_query(query)
+        if not match:
+            return []
+        conditions, params = self._filters(workflow_id, None, document_type, since, until, final_only)
+        return self._select(" AND ".join(["documents_fts MATCH ?"] + conditions), (match, *params, limit),
+                            "ORDER BY f.rank, d.created_at DESC LIMIT ?",
+                            source="documents_fts f JOIN documents d ON d.blob_id = f.rowid")
+
+    def stats(self) -> dict:
+        """Document and blob counts, original and stored sizes in bytes."""
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            blobs, size, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0), COALESCE(SUM(stored_bytes), 0) FROM blobs").fetchone()
+        return {"documents": documents, "blobs": blobs, "size_bytes": size, "stored_bytes": stored,
+                "ratio": round(size / stored, 2) if stored else None}
+
+    def _delete_documents(self, doc_ids: list) -> int:
+        # Blobs no longer referenced by any document are removed together with their FTS entries
+        for start in range(0, len(doc_ids), 500):
+            chunk = doc_ids[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            blob_ids = [row[0] for row in self._conn.execute(
+                f"SELECT DISTINCT blob_id FROM documents WHERE doc_id IN ({marks})", chunk)]
+            self._conn.execute(f"DELETE FROM documents WHERE doc_id IN ({marks})", chunk)
+            for blob_id in blob_ids:
+                if self._conn.execute("SELECT 1 FROM documents WHERE blob_id = ? LIMIT 1", (blob_id,)).fetchone():
+                    continue
+                codec, body = self._conn.execute("SELECT codec, body FROM blobs WHERE blob_id = ?",
+                                                 (blob_id,)).fetchone()
+                if self.full_text:
+                    # A contentless FTS5 row is deleted by repeating the text it was indexed with
+                    self._conn.execute("INSERT INTO documents_fts (documents_fts, rowid, content) VALUES ('delete', ?, ?)",
+                                       (blob_id, decompress_text(codec, body)))
+                self._conn.execute("DELETE FROM blobs WHERE blob_id = ?", (blob_id,))
+        return len(doc_ids)
+
+    def apply_retention(self, retention_days: float = None, max_documents: int = None,
+                        prune_files_days: float = None, now: float = None) -> dict:
+        """
+        Applies the retention policy (arguments default to the archive's settings):
+        documents older than retention_days are deleted unless they are final PRDs, only
+        the newest max_documents are kept, and the markdown files of documents older than
+        prune_files_days are deleted from disk while their content stays in the archive.
+
+        Returns:
+            dict: Number of 'deleted' documents and 'pruned_files'.
+        """
+        retention_days = self.retention_days if retention_days is None else retention_days
+        max_documents = self.max_documents if max_documents is None else max_documents
+        prune_files_days = self.prune_files_days if prune_files_days is None else prune_files_days
+        now = now or time.time()
+        deleted, pruned = 0, 0
+        with self._lock:
+            self._added_since_retention = 0
+            expired = []
+            if retention_days is not None:
+                expired = [row[0] for row in self._conn.execute(
+                    "SELECT doc_id FROM documents WHERE created_at < ? AND is_final = 0",
+                    (now - retention_days * 86400,))]
+            if max_documents is not None:
+                expired += [row[0] for row in self._conn.execute(
+                    "SELECT doc_id FROM documents ORDER BY created_at DESC LIMIT -1 OFFSET ?", (max_documents,))]
+            deleted = self._delete_documents(sorted(set(expired)))
+            if prune_files_days is not None:
+                for doc_id, path in self._conn.execute(
+                        "SELECT doc_id, path FROM documents WHERE created_at < ? AND file_pruned = 0"
+                        " AND path IS NOT NULL", (now - prune_files_days * 86400,)).fetchall():
+                    try:
+                        os.remove(path)
+                        pruned += 1
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        print(f"Warning: Could not prune archived file {path}: {e}")
+                        continue
+                    self._conn.execute("UPDATE documents SET file_pruned = 1 WHERE doc_id = ?", (doc_id,))
+            self._conn.commit()
+        if deleted or pruned:
+            print(f"PRD archive retention: deleted {deleted} documents, pruned {pruned} files.")
+        return {"deleted": deleted, "pruned_files": pruned}
+
+    def import_folder(self, folder: str, document_type: str = "PRD") -> int:
+        """
+        Archives the '{document_type}_vN.md' files of a folder that are not archived yet
+        (e.g. PRDs generated before the archive existed), dated by their modification time.
+
+        Returns:
+            int: Number of documents imported.
+        """
+        pattern = re.compile(rf"{re.escape(document_type)}_v(\d+)\.md$")
+        imported = 0
+        for filename in sorted(os.listdir(folder)):
+            match = pattern.match(filename)
+            path = os.path.join(folder, filename)
+            if not match or self.get(path=path) is not None:
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read()
+            if content:
+                self.add(content, document_type, int(match.group(1)), path, created_at=os.path.getmtime(path))
+                imported += 1
+        return imported
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+
+def _float_env(name: str):
+    value = os.environ.get(name)
+    return float(value) if value else None
+
+
+def get_default_archive():
+    """
+    Returns the process-wide PRD archive, creating it on first use. Configured through:
+        PRECISIONAI_ARCHIVE                  - set to "0" to disable the archive.
+        PRECISIONAI_ARCHIVE_DIR              - directory for the SQLite file (default: '.cache').
+        PRECISIONAI_ARCHIVE_RETENTION_DAYS   - delete non-final documents older than this.
+        PRECISIONAI_ARCHIVE_MAX_DOCUMENTS    - keep at most this many documents.
+        PRECISIONAI_ARCHIVE_PRUNE_FILES_DAYS - delete markdown files older than this (content stays archived).
+
+    Returns:
+        PRDArchive | None: The shared archive, or None if it is disabled.
+    """
+    global _default_archive
+    if os.environ.get("PRECISIONAI_ARCHIVE", "1") == "0":
+        return None
+    with _default_archive_lock:
+        if _default_archive is None:
+            directory = os.environ.get("PRECISIONAI_ARCHIVE_DIR", DEFAULT_CACHE_DIR)
+            max_documents = _float_env("PRECISIONAI_ARCHIVE_MAX_DOCUMENTS")
+            _default_archive = PRDArchive(
+                os.path.join(directory, "archive.sqlite3"),
+                retention_days=_float_env("PRECISIONAI_ARCHIVE_RETENTION_DAYS"),
+                max_documents=int(max_documents) if max_documents is not None else None,
+                prune_files_days=_float_env("PRECISIONAI_ARCHIVE_PRUNE_FILES_DAYS"))
+        return _default_archive
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search and maintain the archive of generated PRDs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    search = commands.add_parser("search", help="Full-text search, best matches first.")
+    search.add_argument("query", help="Words that must all appear in the document.")
+    search.add_argument("--workflow", default=None, help="Only documents of this workflow ID.")
+    search.add_argument("--final", action="store_true", help="Only the PRDs workflows returned.")
+    search.add_argument("--limit", type=int, default=20, help="Maximum results (default: 20).")
+    show = commands.add_parser("show", help="Print an archived document.")
+    show.add_argument("doc_id", type=int, help="Archive ID, as listed by 'search'.")
+    importer = commands.add_parser("import", help="Archive existing PRD files of a folder.")
+    importer.add_argument("folder", nargs="?", default="output", help="Folder with PRD_vN.md files (default: output).")
+    retention = commands.add_parser("retention", help="Apply the retention policy now.")
+    retention.add_argument("--days", type=float, default=None, help="Delete non-final documents older than this.")
+    retention.add_argument("--max-documents", type=int, default=None, help="Keep at most this many documents.")
+    retention.add_argument("--prune-files-days", type=float, default=None,
+                           help="Delete markdown files older than this; their content stays archived.")
+    commands.add_parser("stats", help="Show document counts and compression.")
+    args = parser.parse_args(argv)
+
+    archive = get_default_archive()
+    if archive is None:
+        print("The PRD archive is disabled (PRECISIONAI_ARCHIVE=0).")
+        return
+    if args.command == "search":
+        for document in archive.search(args.query, workflow_id=args.workflow, final_only=args.final, limit=args.limit):
+            print(f"{document.doc_id:>8}  {time.strftime('%Y-%m-%d %H:%M', time.localtime(document.created_at))}  "
+                  f"{document.document_type}_v{document.version}  workflow={document.workflow_id} "
+                  f"iteration={document.iteration}{' final' if document.is_final else ''}  {document.path}")
+    elif args.command == "show":
+        document = archive.get(args.doc_id)
+        print(document.content if document else f"No archived document with ID {args.doc_id}.")
+    elif args.command == "import":
+        print(f"Imported {archive.import_folder(args.folder)} documents from {args.folder}.")
+    elif args.command == "retention":
+        archive.apply_retention(args.days, args.max_documents, args.prune_files_days)
+    else:
+        print(archive.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,185 @@
 # Agents/PRD_Creator_Agent.py
 
+import asyncio
+import contextvars
+import functools
 import os
-import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from Agents.Base_Agent  import BaseAgent
+from Agents.Document_Store import VersionedDocumentStore
+from Agents.Instrumentation import submit_in_context
+from Agents.PRD_Sections import (SECTION_HEADING_PATTERN, join_sections, map_feedback_to_sections, parse_prd_sections,
+                                 select_sections_to_revise)
+from Agents.Prompt_Builder import condense_document, condense_feedback
+from Agents.Review_Aspects import merge_aspect_reviews
+from Agents.Review_Verdict import verdict_from_aspect_reviews
+
+# Static instructions come first and never contain workflow data, so every PRD request
+# starts with the same prefix and benefits from provider-side prompt caching.
+PRD_INSTRUCTIONS = """
+You are an expert Product Manager tasked with creating a comprehensive and detailed Product Requirements Document (PRD). Your goal is to translate high-level technical specifications into a clear, actionable document for development teams and stakeholders.
+
+The user message provides the input specifications for the application and, when available, a starting draft or the reviewer feedback on the previous version to incorporate.
+
+**PRD Structure Requirements:**
+
+Your PRD must include, but not be limited to, the following sections. Ensure each section is thoroughly populated with relevant details based on the provided inputs and logical assumptions to create a complete product vision:
+
+1.  **Introduction/Overview:** Briefly describe the product, its purpose, and the problem it solves.
+2.  **Goals & Objectives:** What are the key business and user goals for this application?
+3.  **User Stories/Personas:** Define the primary user roles and at least 3-5 user stories (e.g., "As a [user role], I want to [action] so that [benefit]").
+4.  **Functional Requirements:** Detail what the system *must do* from a user's perspective, specifically broken down by Front End, Middleware, and Backend components.
+    * **Front End Features:** List user-facing functionalities and UI interactions.
+    * **Middleware Services:** Describe the logic, APIs, and data orchestration handled by middleware.
+    * **Backend Capabilities:** Outline database interactions, business logic, authentication, and external integrations.
+5.  **Non-Functional Requirements:** Cover aspects like performance, security, scalability, usability, and reliability.
+6.  **Scope & Exclusions:** Clearly define what is in scope for this version and what is explicitly out of scope.
+7.  **Assumptions & Constraints:** List any assumptions made and known limitations or constraints.
+8.  **Future Considerations/Phases (Optional):** Briefly mention potential future enhancements.
+
+Format the PRD clearly with headings and subheadings for readability. Ensure the language is precise and unambiguous.
+
+When a starting draft is provided, it is the final PRD of a near-identical earlier requirement set: adapt it to the given input specifications, keeping everything that still applies and changing whatever the inputs contradict or add.
+
+When reviewer feedback is provided, generate a *revised* PRD that directly addresses and incorporates all points from the feedback. Focus on improving clarity, completeness, consistency, and feasibility as per the suggestions. Do NOT just append the feedback; *integrate* the changes into the new PRD structure.
+"""
+
+SECTION_REVISION_INSTRUCTIONS = """
+You are an expert Product Manager revising one section of an existing Product Requirements Document (PRD).
+
+The user message provides the input specifications for the application, the current PRD for context, the section to revise and the reviewer feedback for that section.
+
+Rewrite ONLY that section so that it fully addresses the feedback while staying consistent with the rest of the PRD.
+Start your answer with the section's exact heading line and do not include any other section.
+Keep the same markdown heading levels. Ensure the language is precise and unambiguous.
+"""
+
+
+def _format_inputs(front_end_reqs: str, middleware_reqs: str, backend_reqs: str, other_details: str) -> str:
+    return (f"- Front End: {front_end_reqs}\n- Middleware: {middleware_reqs}\n"
+            f"- Backend: {backend_reqs}\n- Other Details: {other_details}")
+
+
+class SpeculativeRevision:
+    """
+    The next revision of a PRD, started while the PRD's pipelined review is still running.
+    Every section whose own review reports high or medium severity issues is rewritten as
+    soon as that review is in, concurrently with the remaining (e.g. cross-cutting) reviews,
+    provided the section reviews in so far make a section-level revision likely. Flagged sections
+    are held back until three quarters of the sections are reviewed, while more than
+    MAX_INCREMENTAL_FRACTION of the reviewed ones are flagged (a full regeneration would discard
+    them), and while revision_likely rejects the verdict estimated from those reviews (a PRD
+    about to be accepted needs no revision).
+
+    complete() then applies the final feedback like a section-level revision: speculative
+    sections are kept if the final plan targets them and no cross-cutting issue concerns
+    them, and the other targeted sections are revised at that point. Speculative work the
+    final plan does not need is dropped.
+
+    Created by PRDCreatorAgent.start_speculative_revision.
+    """
+
+    def __init__(self, creator: "PRDCreatorAgent", inputs: tuple, prd_document: str, review, revision_likely=None):
+        self.creator = creator
+        self.inputs = inputs
+        self.prd_document = prd_document
+        self.review = review
+        self.revision_likely = revision_likely
+        # Speculative calls run in the caller's context (run ID, usage tallies) at the time of creation
+        self._context = contextvars.copy_context()
+        _, self.sections = parse_prd_sections(prd_document)
+        self._executor = ThreadPoolExecutor(max_workers=creator._fan_out(max(1, len(self.sections))),
+                                            thread_name_prefix="prd-speculative")
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._completing = False  # complete() owns the executor from then on; cancel() leaves it alone
+        self._flagged = 0  # sections whose own review has high or medium severity issues
+        self._revisions = {}  # section number -> future of its revised text
+        self._section_reviews = []  # AspectReviews of the sections reviewed so far
+        self._held = []  # (section, AspectReview) flagged while speculation did not look worthwhile
+        futures = review.section_review_futures()
+        for section in self.sections:
+            if section.text in futures:
+                futures[section.text].add_done_callback(functools.partial(self._on_section_reviewed, section))
+
+    def _on_section_reviewed(self, section, future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        aspect_review = future.result()
+        flagged = any(severity in ("high", "medium") for severity, _ in aspect_review.issues)
+        with self._lock:
+            if self._cancelled:
+                return
+            self._section_reviews.append(aspect_review)
+            if flagged:
+                self._flagged += 1
+                self._held.append((section, aspect_review))
+            # Beyond this many flagged sections the revision is a full regeneration anyway
+            over_limit = self._flagged > self.creator.MAX_INCREMENTAL_FRACTION * len(self.sections)
+            if over_limit:
+                self._cancelled = True  # seen by complete() even before cancel() below runs
+            elif self._worth_speculating():
+                for held_section, held_review in self._held:
+                    self._revisions[held_section.number] = self._executor.submit(
+                        self._context.copy().run, self.creator._revise_section, self.inputs, self.prd_document,
+                        held_section, merge_aspect_reviews([held_review]))
+                self._held = []
+        if over_limit:
+            self.cancel()
+
+    def _worth_speculating(self) -> bool:
+        """Whether the section reviews in so far make a section-level revision likely. Called with the lock held."""
+        reviewed = len(self._section_reviews)
+        # Fewer reviews cannot tell a section-level revision from a full regeneration yet
+        if 4 * reviewed < 3 * len(self.sections) or self._flagged > self.creator.MAX_INCREMENTAL_FRACTION * reviewed:
+            return False
+        return self.revision_likely is None or self.revision_likely(verdict_from_aspect_reviews(self._section_reviews))
+
+    def complete(self, feedback: str):
+        """
+        Finishes the revision for the final review feedback.
+
+        Returns:
+            str | None: The revised PRD, or None if the feedback calls for a full regeneration
+                        (the speculative work is then discarded).
+        """
+        with self._lock:
+            cancelled, self._cancelled = self._cancelled, True  # no new speculative sections from here on
+            self._completing = True
+        try:
+            revision_plan = None if cancelled else self.creator._plan_section_revision(self.prd_document, feedback)
+            if revision_plan is None:
+                return None
+            preamble, sections, targets = revision_plan
+            cross_cutting_feedback = self.review.cross_cutting_feedback()
+            concerned = (set(map_feedback_to_sections(cross_cutting_feedback, sections))
+                         if cross_cutting_feedback else set())
+            with self._lock:
+                reused = {number: future for number, future in self._revisions.items()
+                          if number in targets and number not in concerned}
+            print(f"Revising {len(targets)} of {len(sections)} PRD sections ({len(reused)} speculatively): "
+                  f"{', '.join(section.title for section in sections if section.number in targets)}")
+            futures = dict(reused)
+            for section in sections:
+                if section.number in targets and section.number not in futures:
+                    futures[section.number] = submit_in_context(
+                        self._executor, self.creator._revise_section, self.inputs, self.prd_document, section,
+                        targets[section.number])
+            revised = {number: future.result() for number, future in futures.items()}
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        return join_sections(preamble, [
+            self.creator._splice_section(s, revised[s.number]) if s.number in revised else s for s in sections])
+
+    def cancel(self):
+        """Drops the speculative revision; calls not started yet are not made. No effect once complete() runs."""
+        with self._lock:
+            self._cancelled = True
+            if self._completing:
+                return
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
 
 class PRDCreatorAgent(BaseAgent):
     """
@@ -10,36 +187,41 @@ class PRDCreatorAgent(BaseAgent):
     Inherits from BaseAgent for OpenAI API interaction.
     """
 
-    def __init__(self, model: str = "gpt-4o", temperature: float = 0.7, max_tokens: int = 2500):
+    # Incremental revision is only used when at most this fraction of the sections is flagged;
+    # beyond that, a full regeneration is cheaper than many section calls with repeated context.
+    MAX_INCREMENTAL_FRACTION = 0.6
+    # Completion budget for regenerating a single section
+    SECTION_MAX_TOKENS = 1000
+
+    def __init__(self, model: str = "gpt-4o", temperature: float = 0.7, max_tokens: int = 2500, output_folder: str = None, **kwargs):
         """
         Initializes the PRDCreatorAgent.
         Sets a higher max_tokens default suitable for PRD generation.
+        Extra keyword arguments (e.g. cache, use_cache) are forwarded to BaseAgent.
+
+        Args:
+            output_folder (str, optional): Where PRDs are saved. Defaults to the project's 'output' folder.
         """
-        super().__init__(model=model, temperature=temperature, max_tokens=max_tokens)
+        super().__init__(model=model, temperature=temperature, max_tokens=max_tokens, **kwargs)
         self.agent_name = "PRD Creator Agent"
         self.project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-        self.output_folder = os.path.join(self.project_root, "output")
-        os.makedirs(self.output_folder, exist_ok=True) # Ensure output folder exists on init
+        self.output_folder = output_folder or os.path.join(self.project_root, "output")
+        # Ensures the output folder exists and keeps an O(1) version counter inside it
+        self.document_store = VersionedDocumentStore(self.output_folder)
 
     def _get_next_version_number(self, document_type: str) -> int:
         """
-        Determines the next sequential version number for a document type (e.g., 'PRD')
-        in the output folder. Looks for files like 'PRD_vX.md' and returns X + 1.
+        Allocates the next sequential version number for a document type (e.g., 'PRD')
+        in the output folder. The version's file is reserved immediately, so concurrent
+        workflows (threads or processes) never receive the same number.
         """
-        max_version = 0
-        for filename in os.listdir(self.output_folder):
-            if filename.startswith(f"{document_type}_v") and filename.endswith(".md"):
-                match = re.match(rf"{document_type}_v(\d+)\.md", filename)
-                if match:
-                    version = int(match.group(1))
-                    if version > max_version:
-                        max_version = version
-        return max_version + 1
+        return self.document_store.allocate_version(document_type)
 
     def _save_document(self, document_content: str, document_type: str, version: int) -> str:
         """
         Saves the generated document to the 'output' folder with versioning.
         The filename format will be '{document_type}_v{version}.md'.
+        The write is atomic (temporary file plus rename), so a reader never sees a partial PRD.
 
         Args:
             document_content (str): The content of the document to save.
@@ -49,18 +231,142 @@ class PRDCreatorAgent(BaseAgent):
         Returns:
             str: The full path to the saved file.
         """
-        filename = f"{document_type}_v{version}.md"
-        filepath = os.path.join(self.output_folder, filename)
-
+        filepath = self.document_store.document_path(document_type, version)
         try:
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(document_content)
-            return filepath
-        except IOError as e:
+            return self.document_store.write(document_content, document_type, version)
+        except OSError as e:
             raise IOError(f"Failed to save document to {filepath}: {e}")
 
+    def _build_prompt(self, front_end_reqs: str, middleware_reqs: str, backend_reqs: str, other_details: str, previous_feedback: str = None, draft_prd: str = None) -> tuple[str, str]:
+        """
+        Builds the (system, user) messages used to generate or revise a PRD.
+        Shared by the synchronous and asynchronous generation paths. The system message is
+        the same for every workflow, so the provider can reuse its cached prefix; the inputs,
+        an optional starting draft and the (possibly condensed) feedback go into the user message.
+        """
+        prompt = self._prompt_builder(PRD_INSTRUCTIONS)
+        prompt.add("Input Specifications for the Application",
+                   _format_inputs(front_end_reqs, middleware_reqs, backend_reqs, other_details), priority=3)
+        if previous_feedback:
+            prompt.add("Previous Reviewer Feedback to Incorporate", previous_feedback,
+                       compressor=condense_feedback, min_tokens=256)
+            prompt.add(None, "Generate the *revised* PRD, integrating all points from the feedback.", compressor=None)
+        elif draft_prd:
+            prompt.add("Starting Draft", draft_prd, priority=0, compressor=condense_document)
+            prompt.add(None, "Generate the PRD by adapting the starting draft to the input specifications.",
+                       compressor=None)
+        else:
+            prompt.add(None, "Generate the PRD.", compressor=None)
+        return prompt.build()
+
+    def _plan_section_revision(self, previous_prd: str, previous_feedback: str):
+        """
+        Decides whether a revision can be done section by section.
+
+        Returns:
+            tuple | None: (preamble, sections, {section number: feedback}) when only some
+                          sections need regenerating, or None if a full regeneration is needed
+                          (no previous PRD, unparseable structure, or too many sections flagged).
+        """
+        if not previous_prd or not previous_feedback:
+            return None
+        preamble, sections = parse_prd_sections(previous_prd)
+        if len(sections) < 2:
+            return None
+        targets = select_sections_to_revise(previous_feedback, sections)
+        if not targets or len(targets) > self.MAX_INCREMENTAL_FRACTION * len(sections):
+            return None
+        return preamble, sections, targets
+
+    def _build_section_revision_prompt(self, inputs: tuple, previous_prd: str, section, section_feedback: str) -> tuple[str, str]:
+        """
+        Builds the (system, user) messages that ask for a single revised PRD section. The
+        system message is shared by all section calls; when over the token budget, the
+        other sections of the context PRD are condensed first.
+        """
+        prompt = self._prompt_builder(SECTION_REVISION_INSTRUCTIONS)
+        prompt.add("Input Specifications for the Application", _format_inputs(*inputs), priority=3)
+        prompt.add("Current PRD (for context only)", previous_prd, priority=0, compressor=condense_document)
+        prompt.add("Section to Revise", section.text, compressor=None)
+        prompt.add("Reviewer Feedback for this Section", section_feedback, compressor=condense_feedback)
+        prompt.add(None, f'Rewrite ONLY the section "{section.title}". '
+                         f"Start your answer with the exact heading line `{section.heading.strip()}`.", compressor=None)
+        return prompt.build()
+
+    @staticmethod
+    def _splice_section(section, revised_text: str):
+        """
+        Returns a copy of section whose body is the revised text. The original heading
+        and trailing whitespace are kept so the reassembled document stays well-formed.
+        """
+        revised_text = revised_text.strip()
+        if revised_text.startswith("```"):
+            revised_text = revised_text.strip("`").split("\n", 1)[-1].strip()
+        first_line, _, rest = revised_text.partition("\n")
+        if SECTION_HEADING_PATTERN.match(first_line.strip()):
+            revised_text = rest.strip()
+        trailing = section.body[len(section.body.rstrip()):] or "\n\n"
+        return type(section)(section.number, section.title, section.heading, revised_text + trailing)
+
+    def _revise_sections(self, inputs: tuple, previous_prd: str, revision_plan: tuple) -> str:
+        """
+        Regenerates the flagged sections concurrently and splices them into the PRD.
+        Unflagged sections are reused verbatim.
+        """
+        preamble, sections, targets = revision_plan
+        flagged = [section for section in sections if section.number in targets]
+        print(f"Revising {len(flagged)} of {len(sections)} PRD sections: "
+              f"{', '.join(section.title for section in flagged)}")
+
+        with ThreadPoolExecutor(max_workers=self._fan_out(len(flagged))) as executor:
+            futures = [submit_in_context(executor, self._revise_section, inputs, previous_prd, section,
+                                         targets[section.number]) for section in flagged]
+            revised = {section.number: future.result() for section, future in zip(flagged, futures)}
+        return join_sections(preamble, [
+            self._splice_section(s, revised[s.number]) if s.number in revised else s for s in sections])
+
+    def _revise_section(self, inputs: tuple, previous_prd: str, section, section_feedback: str) -> str:
+        """Regenerates one section for its feedback and returns the model's text (see _splice_section)."""
+        return self._call_llm(*self._build_section_revision_prompt(inputs, previous_prd, section, section_feedback),
+                              max_tokens=self.SECTION_MAX_TOKENS, task="section_revision")
+
+    def start_speculative_revision(self, inputs: tuple, prd_document: str, review,
+                                   revision_likely=None) -> SpeculativeRevision:
+        """
+        Starts revising a PRD while its pipelined review (PRDReviewerAgent.start_pipelined_review)
+        is still running; call complete() with the final feedback. See SpeculativeRevision.
+
+        Args:
+            inputs (tuple): (front_end_reqs, middleware_reqs, backend_reqs, other_details).
+            prd_document (str): The PRD under review.
+            review (PipelinedReview): Its review, already finished (all reviews started).
+            revision_likely (callable, optional): revision_likely(verdict) -> bool, given the verdict of the
+                                                  section reviews in so far. Speculation waits until it
+                                                  returns True. Without it, only the share of flagged
+                                                  sections decides.
+        """
+        return SpeculativeRevision(self, inputs, prd_document, review, revision_likely)
+
+    async def _arevise_sections(self, inputs: tuple, previous_prd: str, revision_plan: tuple) -> str:
+        """Async version of _revise_sections; flagged sections are regenerated concurrently."""
+        preamble, sections, targets = revision_plan
+        flagged = [section for section in sections if section.number in targets]
+        results = await asyncio.gather(*(
+            self._acall_llm(
+                *self._build_section_revision_prompt(inputs, previous_prd, section, targets[section.number]),
+                max_tokens=self.SECTION_MAX_TOKENS, task="section_revision")
+            for section in flagged))
+        revised = dict(zip((s.number for s in flagged), results))
+        return join_sections(preamble, [
+            self._splice_section(s, revised[s.number]) if s.number in revised else s for s in sections])
+
+    def store_prd(self, generated_prd: str) -> str:
+        """Saves a generated PRD under the next free version number and returns its path."""
+        next_version = self._get_next_version_number("PRD")
+        return self._save_document(generated_prd, "PRD", next_version)
+
     # Modified generate method to accept optional previous_feedback
-    def generate(self, front_end_reqs: str, middleware_reqs: str, backend_reqs: str, other_details: str, previous_feedback: str = None) -> tuple[str, str]:
+    def generate(self, front_end_reqs: str, middleware_reqs: str, backend_reqs: str, other_details: str, previous_feedback: str = None, stream: bool = False, previous_prd: str = None, draft_prd: str = None):
         """
         Generates or revises a Product Requirements Document (PRD) based on input specifications
         and optional previous feedback. Saves it to the 'output' folder with automatic versioning.
@@ -71,57 +377,84 @@ class PRDCreatorAgent(BaseAgent):
             backend_reqs (str): Description of backend requirements.
             other_details (str): Any additional project details or requirements.
             previous_feedback (str, optional): Feedback from a previous review to incorporate. Defaults to None.
+            stream (bool): If True, return a generator of PRD text chunks (see _generate_stream).
+            previous_prd (str, optional): The PRD the feedback refers to. When given together with
+                                          previous_feedback, only the sections the feedback flags are
+                                          regenerated and the rest are reused verbatim.
+            draft_prd (str, optional): A PRD to start from instead of writing one from scratch, e.g. the
+                                       final PRD of a near-identical requirement set. Ignored when
+                                       previous_feedback is given.
 
         Returns:
             tuple[str, str]: A tuple containing the generated PRD document content
                              and the full path to the saved PRD file.
+                             When stream is True, a generator of chunks whose return value is that tuple.
         """
-        system_message = f"""
-You are an expert Product Manager tasked with creating a comprehensive and detailed Product Requirements Document (PRD). Your goal is to translate high-level technical specifications into a clear, actionable document for development teams and stakeholders.
+        inputs = (front_end_reqs, middleware_reqs, backend_reqs, other_details)
+        revision_plan = self._plan_section_revision(previous_prd, previous_feedback)
+        if stream:
+            return self._generate_stream(inputs, previous_feedback, revision_plan, previous_prd, draft_prd)
+        try:
+            if revision_plan is not None:
+                generated_prd = self._revise_sections(inputs, previous_prd, revision_plan)
+            else:
+                generated_prd = self._call_llm(*self._build_prompt(*inputs, previous_feedback, draft_prd), task="prd")
+            saved_filepath = self.store_prd(generated_prd)
+            return generated_prd, saved_filepath
+        except Exception as e:
+            raise Exception(f"Error from {self.agent_name}: {e}")
 
-**Input Specifications for the Application:**
-- Front End: {front_end_reqs}
-- Middleware: {middleware_reqs}
-- Backend: {backend_reqs}
-- Other Details: {other_details}
+    def _generate_stream(self, inputs: tuple, previous_feedback: str = None, revision_plan: tuple = None, previous_prd: str = None, draft_prd: str = None):
+        """
+        Streams the PRD as it is generated and saves it once the stream completes.
+        Section-level revisions are not streamed token by token; the revised PRD is
+        yielded as a single chunk once all flagged sections have been regenerated.
 
-**PRD Structure Requirements:**
+        Yields:
+            str: Successive chunks of the PRD text.
 
-Your PRD must include, but not be limited to, the following sections. Ensure each section is thoroughly populated with relevant details based on the provided inputs and logical assumptions to create a complete product vision:
+        Returns:
+            tuple[str, str]: The full PRD content and the saved file path, delivered as the
+                             generator's return value (e.g. via 'result = yield from ...').
+        """
+        try:
+            if revision_plan is not None:
+                generated_prd = self._revise_sections(inputs, previous_prd, revision_plan)
+                yield generated_prd
+            else:
+                generated_prd = yield from self._call_llm(
+                    *self._build_prompt(*inputs, previous_feedback, draft_prd), stream=True, task="prd")
+            saved_filepath = self.store_prd(generated_prd)
+            return generated_prd, saved_filepath
+        except Exception as e:
+            raise Exception(f"Error from {self.agent_name}: {e}")
 
-1.  **Introduction/Overview:** Briefly describe the product, its purpose, and the problem it solves.
-2.  **Goals & Objectives:** What are the key business and user goals for this application?
-3.  **User Stories/Personas:** Define the primary user roles and at least 3-5 user stories (e.g., "As a [user role], I want to [action] so that [benefit]").
-4.  **Functional Requirements:** Detail what the system *must do* from a user's perspective, specifically broken down by Front End, Middleware, and Backend components.
-    * **Front End Features:** List user-facing functionalities and UI interactions.
-    * **Middleware Services:** Describe the logic, APIs, and data orchestration handled by middleware.
-    * **Backend Capabilities:** Outline database interactions, business logic, authentication, and external integrations.
-5.  **Non-Functional Requirements:** Cover aspects like performance, security, scalability, usability, and reliability.
-6.  **Scope & Exclusions:** Clearly define what is in scope for this version and what is explicitly out of scope.
-7.  **Assumptions & Constraints:** List any assumptions made and known limitations or constraints.
-8.  **Future Considerations/Phases (Optional):** Briefly mention potential future enhancements.
-"""
-        # Append previous feedback to the system message if provided
-        if previous_feedback:
-            system_message += (
-                f"\n\n**Previous Reviewer Feedback to Incorporate:**\n"
-                f"{previous_feedback}\n\n"
-                f"Please carefully review the previous PRD and the feedback provided. "
-                f"Your task is to generate a *revised* PRD that directly addresses and "
-                f"incorporates all points from the feedback. Focus on improving clarity, "
-                f"completeness, consistency, and feasibility as per the suggestions. "
-                f"Do NOT just append the feedback; *integrate* the changes into the new PRD structure."
-            )
-        else:
-            system_message += (
-                f"\n\nFormat the PRD clearly with headings and subheadings for readability. "
-                f"Ensure the language is precise and unambiguous."
-            )
+    async def agenerate(self, front_end_reqs: str, middleware_reqs: str, backend_reqs: str, other_details: str, previous_feedback: str = None, previous_prd: str = None, draft_prd: str = None) -> tuple[str, str]:
+        """
+        Async version of generate. The LLM call is awaited on the event loop and the
+        file write runs in a worker thread, so many PRDs can be generated concurrently.
+
+        Args:
+            front_end_reqs (str): Description of front-end requirements.
+            middleware_reqs (str): Description of middleware requirements.
+            backend_reqs (str): Description of backend requirements.
+            other_details (str): Any additional project details or requirements.
+            previous_feedback (str, optional): Feedback from a previous review to incorporate. Defaults to None.
+            previous_prd (str, optional): The PRD the feedback refers to; enables section-level revision.
+            draft_prd (str, optional): A PRD to start from (see generate).
 
+        Returns:
+            tuple[str, str]: A tuple containing the generated PRD document content
+                             and the full path to the saved PRD file.
+        """
+        inputs = (front_end_reqs, middleware_reqs, backend_reqs, other_details)
+        revision_plan = self._plan_section_revision(previous_prd, previous_feedback)
         try:
-            generated_prd = self._call_llm(system_message=system_message)
-            next_version = self._get_next_version_number("PRD")
-            saved_filepath = self._save_document(generated_prd, "PRD", next_version)
+            if revision_plan is not None:
+                generated_prd = await self._arevise_sections(inputs, previous_prd, revision_plan)
+            else:
+                generated_prd = await self._acall_llm(*self._build_prompt(*inputs, previous_feedback, draft_prd), task="prd")
+            saved_filepath = await asyncio.to_thread(self.store_prd, generated_prd)
             return generated_prd, saved_filepath
         except Exception as e:
-            raise Exception(f"Error from {self.agent_name}: {e}")
\ No newline at end of file
+            raise Exception(f"Error from {self.agent_name}: {e}")
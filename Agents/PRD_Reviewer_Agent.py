@@ -1,7 +1,128 @@
 # Agents/PRD_Reviewer_Agent.py
 
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from Agents.Base_Agent import BaseAgent # Ensure this import path is correct
+from Agents.Instrumentation import submit_in_context
+from Agents.PRD_Sections import parse_prd_sections
+from Agents.Prompt_Builder import condense_document
+from Agents.Review_Aspects import build_aspect_tasks, merge_aspect_reviews, parse_aspect_review, section_review_task
+from Agents.Review_Verdict import (VERDICT_INSTRUCTIONS, VERDICT_MARKER, VERDICT_RESPONSE_FORMAT, format_sections_to_score,
+                                   parse_review_verdict, split_streamed_review, verdict_from_aspect_reviews)
+
+# Static review instructions; the PRD itself is sent as the user message so every review
+# request starts with the same, cacheable prefix.
+REVIEW_INSTRUCTIONS = """
+You are an expert and highly critical Product Requirements Document (PRD) reviewer. Your task is to meticulously evaluate the completeness, clarity, consistency, and feasibility of the PRD in the user message.
+
+**Your Review must provide detailed, actionable feedback for revision, structured as follows:**
+
+1.  **Overall Assessment:** A brief summary of the PRD's strengths and weaknesses.
+2.  **Section-Specific Feedback:** For each of the following sections, identify specific areas for improvement, suggest missing details, highlight ambiguities, or point out inconsistencies. If a section is missing or incomplete, explicitly state that.
+    * Introduction/Overview
+    * Goals & Objectives
+    * User Stories/Personas (Are they clear, complete, and sufficient?)
+    * Functional Requirements (Front End, Middleware, Backend - Are they clearly defined, exhaustive, and unambiguous for each layer?)
+    * Non-Functional Requirements (Are they adequately covered and measurable?)
+    * Scope & Exclusions (Is the scope clear and well-defined?)
+    * Assumptions & Constraints (Are all critical assumptions and constraints listed?)
+3.  **Cross-Cutting Issues:**
+    * **Clarity & Conciseness:** Are there any areas that are confusing, overly verbose, or vague?
+    * **Consistency:** Are there any contradictions or inconsistencies within the document?
+    * **Feasibility:** Are the requirements realistic and achievable given typical development constraints?
+    * **Testability:** Are the requirements clear enough to be tested?
+4.  **Prioritized Recommendations:** List the top 3-5 most critical changes that *must* be addressed in the next iteration, ordered by impact.
+
+Your feedback should be direct, constructive, and aimed at helping the PRD creator (Agent #2) produce a high-quality, finalized PRD within the next 2-3 iterations.
+"""
+
+# Streamed structured reviews: the readable review first, so it can be shown while it is written,
+# then the verdict after a marker line, parsed once the whole response is in
+STREAMED_VERDICT_INSTRUCTIONS = REVIEW_INSTRUCTIONS + f"""
+After the review, write a line containing only {VERDICT_MARKER} and then your verdict on the same PRD.
+For the verdict: {VERDICT_RESPONSE_FORMAT.strip()}
+"""
+
+
+class PipelinedReview:
+    """
+    A parallel-mode review that runs alongside PRD generation. Each section is reviewed as
+    soon as the streamed PRD has moved on to the next one; the cross-cutting aspects, which
+    need the whole document, start when finish() is called. Each section review is exposed
+    as a future (section_review_futures), so revising a section can start as soon as its
+    own review is in (see PRDCreatorAgent.start_speculative_revision).
+
+    Created by PRDReviewerAgent.start_pipelined_review.
+    """
+
+    def __init__(self, reviewer: "PRDReviewerAgent"):
+        self.reviewer = reviewer
+        self._tail = ""  # streamed text from the start of the section still being written
+        self._executor = ThreadPoolExecutor(max_workers=reviewer._fan_out(reviewer.max_parallel_aspects),
+                                            thread_name_prefix="prd-review")
+        self._section_futures = {}  # section text -> future of its review
+        self._tasks = None
+        self._futures = None
+
+    def feed(self, chunk: str):
+        """
+        Adds a chunk of the PRD being generated and starts reviews for the sections it completes.
+        Only the text after the last completed section is parsed again, so feeding stays linear
+        in the length of the PRD.
+        """
+        self._tail += chunk
+        preamble, sections = parse_prd_sections(self._tail)
+        if len(sections) < 2:
+            return
+        for section in sections[:-1]:  # the last section may still be growing
+            self._submit_section(section.text, section_review_task(section))
+        # A completed section's text is exactly the document text up to the next heading
+        self._tail = self._tail[len(preamble) + sum(len(section.text) for section in sections[:-1]):]
+
+    def _submit_section(self, text: str, task: tuple):
+        if text not in self._section_futures:
+            self._section_futures[text] = submit_in_context(self._executor, self.reviewer._run_aspect, task)
+        return self._section_futures[text]
+
+    def finish(self, prd_document: str):
+        """
+        Starts the remaining reviews for the complete PRD. Section reviews already started
+        are reused if the section's final text is unchanged, and redone otherwise.
+        """
+        self._tasks = build_aspect_tasks(prd_document)
+        self._futures = [self._submit_section(task[4], task) if task[1] else
+                         submit_in_context(self._executor, self.reviewer._run_aspect, task) for task in self._tasks]
+
+    def section_review_futures(self) -> dict:
+        """Section text -> future of its AspectReview, for the sections of the finished PRD."""
+        return {task[4]: future for task, future in zip(self._tasks, self._futures) if task[1]}
+
+    def cross_cutting_feedback(self, severities: tuple = ("high", "medium")):
+        """
+        Waits for the cross-cutting reviews.
+
+        Returns:
+            str | None: Their merged feedback if they found issues of one of these severities, otherwise None.
+        """
+        reviews = [future.result() for task, future in zip(self._tasks, self._futures) if not task[1]]
+        if not any(severity in severities for review in reviews for severity, _ in review.issues):
+            return None
+        return merge_aspect_reviews(reviews)
+
+    def result(self) -> tuple:
+        """Waits for every review and returns (feedback, verdict), like PRDReviewerAgent.assess."""
+        try:
+            reviews = [future.result() for future in self._futures]
+        except Exception as e:
+            raise Exception(f"Error from {self.reviewer.agent_name}: {e}")
+        finally:
+            self._executor.shutdown(wait=False)
+        return merge_aspect_reviews(reviews), verdict_from_aspect_reviews(reviews)
+
+    def cancel(self):
+        """Abandons the review; calls not started yet are dropped."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
 
 class PRDReviewerAgent(BaseAgent):
@@ -10,26 +131,51 @@ class PRDReviewerAgent(BaseAgent):
     Inherits from BaseAgent for OpenAI API interaction.
     """
 
-    def __init__(self, model: str = "gpt-4o", temperature: float = 0.5, max_tokens: int = 1500):
+    # Completion budget for a single aspect reviewer in parallel mode
+    ASPECT_MAX_TOKENS = 600
+
+    def __init__(self, model: str = "gpt-4o", temperature: float = 0.5, max_tokens: int = 1500,
+                 review_mode: str = "single", max_parallel_aspects: int = 12, structured_verdict: bool = True,
+                 **kwargs):
         """
         Initializes the PRDReviewerAgent.
         Sets a slightly lower temperature for more focused and critical feedback.
         Sets max_tokens suitable for a detailed review.
+        Extra keyword arguments (e.g. cache, use_cache) are forwarded to BaseAgent.
+
+        Args:
+            review_mode (str): "single" reviews the whole PRD in one long call; "parallel" splits
+                               the review into per-section, consistency, feasibility and testability
+                               aspects that run concurrently and are merged into one feedback document.
+            max_parallel_aspects (int): Maximum aspect reviews in flight at once in parallel mode.
+            structured_verdict (bool): In single mode, ask for a JSON verdict (scores and ranked issues,
+                                       see Agents/Review_Verdict.py) instead of free-text feedback. Streamed
+                                       reviews ask for the free-text review followed by the verdict, so the
+                                       review is still readable while it is generated.
         """
-        super().__init__(model=model, temperature=temperature, max_tokens=max_tokens)
+        if review_mode not in ("single", "parallel"):
+            raise ValueError(f"Unknown review_mode '{review_mode}'. Use 'single' or 'parallel'.")
+        super().__init__(model=model, temperature=temperature, max_tokens=max_tokens, **kwargs)
         self.agent_name = "PRD Reviewer Agent"
+        self.review_mode = review_mode
+        self.max_parallel_aspects = max_parallel_aspects
+        self.structured_verdict = structured_verdict
 
-    def generate(self, prd_document: str) -> str:
+    def generate(self, prd_document: str, stream: bool = False):
         """
         Public method to initiate the PRD review process.
         Acts as a wrapper around the internal _review_prd method.
 
         Args:
             prd_document (str): The content of the PRD document to be reviewed.
+            stream (bool): If True, return a generator of feedback chunks whose
+                           return value is the full feedback.
 
         Returns:
             str: The structured feedback for revision.
         """
+        if stream:
+            return self._review_stream(prd_document)
         try:
             # Call the internal method that contains the actual review logic
             feedback = self.review_prd(prd_document)
@@ -39,6 +185,86 @@ class PRDReviewerAgent(BaseAgent):
             raise Exception(f"Error during PRD review generation by {self.agent_name}: {e}")
 
 
+    def _review_stream(self, prd_document: str):
+        """
+        Streams review feedback chunks; the generator's return value is the full feedback.
+        See _assess_stream.
+        """
+        feedback, _ = yield from self._assess_stream(prd_document)
+        return feedback
+
+    def _assess_stream(self, prd_document: str):
+        """
+        Streams review feedback chunks; the generator's return value is (feedback, verdict).
+        Parallel reviews are not readable while they are generated, so their merged feedback
+        is yielded as a single chunk once complete. A single review with structured_verdict
+        streams its free-text review and parses the verdict that follows it (see
+        STREAMED_VERDICT_INSTRUCTIONS); only the review text is yielded.
+        """
+        try:
+            if self.review_mode == "parallel":
+                feedback, verdict = self.assess(prd_document)
+                yield feedback
+                return feedback, verdict
+            if self.structured_verdict:
+                return (yield from self._stream_review_with_verdict(prd_document))
+            feedback = yield from self._call_llm(*self._build_prompt(prd_document), stream=True, task="review")
+            return feedback, None
+        except Exception as e:
+            raise Exception(f"Error during PRD review generation by {self.agent_name}: {e}")
+
+    def _stream_review_with_verdict(self, prd_document: str):
+        """
+        Yields the review text of a streamed structured review as it arrives, holding back
+        anything that could be the start of VERDICT_MARKER; returns (feedback, verdict).
+        """
+        text, shown = "", 0
+        marker_at = -1
+        for chunk in self._call_llm(*self._build_streamed_verdict_prompt(prd_document), stream=True, task="review"):
+            text += chunk
+            if marker_at < 0:
+                # The marker cannot start before text already shown (that text was held back otherwise)
+                marker_at = text.find(VERDICT_MARKER, shown)
+                visible = marker_at if marker_at >= 0 else len(text) - len(VERDICT_MARKER) + 1
+                if visible > shown:
+                    yield text[shown:visible]
+                    shown = visible
+        if marker_at < 0 and len(text) > shown:
+            yield text[shown:]
+        feedback, verdict = split_streamed_review(text)
+        if verdict is None:
+            print(f"Warning: {self.agent_name} streamed no readable verdict; using its review as free text.")
+        return feedback, verdict
+
+    def _build_prompt(self, prd_document: str) -> tuple[str, str]:
+        """
+        Builds the (system, user) messages used to review a PRD as free text.
+        Shared by the synchronous and asynchronous review paths. The static review
+        instructions form the system message and the PRD is the user message.
+        """
+        prompt = self._prompt_builder(REVIEW_INSTRUCTIONS)
+        prompt.add("PRD Document for Review", prd_document, compressor=condense_document, min_tokens=1024)
+        return prompt.build()
+
+    def _build_verdict_prompt(self, prd_document: str) -> tuple[str, str]:
+        """Builds the (system, user) messages asking for a JSON verdict on a PRD."""
+        prompt = self._prompt_builder(VERDICT_INSTRUCTIONS)
+        prompt.add("PRD Document for Review", prd_document, compressor=condense_document, min_tokens=1024)
+        prompt.add("Sections to score", format_sections_to_score(prd_document), compressor=None)
+        return prompt.build()
+
+    def _build_streamed_verdict_prompt(self, prd_document: str) -> tuple[str, str]:
+        """Builds the (system, user) messages of a streamed review followed by a JSON verdict."""
+        prompt = self._prompt_builder(STREAMED_VERDICT_INSTRUCTIONS)
+        prompt.add("PRD Document for Review", prd_document, compressor=condense_document, min_tokens=1024)
+        prompt.add("Sections to score", format_sections_to_score(prd_document), compressor=None)
+        return prompt.build()
+
+    def _build_aspect_prompt(self, task: tuple) -> tuple[str, str]:
+        """Builds the (system, user) messages of one aspect review (see build_aspect_tasks)."""
+        _, _, instructions, label, content = task
+        return self._prompt_builder(instructions).add(label, content, compressor=condense_document).build()
+
     def review_prd(self, prd_document: str) -> str:
         """
         Reviews a provided PRD document and generates detailed, actionable feedback.
@@ -49,37 +275,119 @@ class PRDReviewerAgent(BaseAgent):
         Returns:
             str: The structured feedback for revision.
         """
-        system_message = f"""
-You are an expert and highly critical Product Requirements Document (PRD) reviewer. Your task is to meticulously evaluate the completeness, clarity, consistency, and feasibility of the provided PRD.
-
-**PRD Document for Review:**
-{prd_document}
+        return self.assess(prd_document)[0]
 
-**Your Review must provide detailed, actionable feedback for revision, structured as follows:**
+    def assess(self, prd_document: str, stream: bool = False):
+        """
+        Reviews a PRD and returns both the feedback and, when available, the machine-readable verdict.
 
-1.  **Overall Assessment:** A brief summary of the PRD's strengths and weaknesses.
-2.  **Section-Specific Feedback:** For each of the following sections, identify specific areas for improvement, suggest missing details, highlight ambiguities, or point out inconsistencies. If a section is missing or incomplete, explicitly state that.
-    * Introduction/Overview
-    * Goals & Objectives
-    * User Stories/Personas (Are they clear, complete, and sufficient?)
-    * Functional Requirements (Front End, Middleware, Backend - Are they clearly defined, exhaustive, and unambiguous for each layer?)
-    * Non-Functional Requirements (Are they adequately covered and measurable?)
-    * Scope & Exclusions (Is the scope clear and well-defined?)
-    * Assumptions & Constraints (Are all critical assumptions and constraints listed?)
-3.  **Cross-Cutting Issues:**
-    * **Clarity & Conciseness:** Are there any areas that are confusing, overly verbose, or vague?
-    * **Consistency:** Are there any contradictions or inconsistencies within the document?
-    * **Feasibility:** Are the requirements realistic and achievable given typical development constraints?
-    * **Testability:** Are the requirements clear enough to be tested?
-4.  **Prioritized Recommendations:** List the top 3-5 most critical changes that *must* be addressed in the next iteration, ordered by impact.
+        Args:
+            prd_document (str): The content of the PRD document to be reviewed.
+            stream (bool): If True, return a generator of feedback chunks whose
+                           return value is (feedback, verdict).
 
-Your feedback should be direct, constructive, and aimed at helping the PRD creator (Agent #2) produce a high-quality, finalized PRD within the next 2-3 iterations.
-"""
+        Returns:
+            tuple[str, ReviewVerdict | None]: The feedback for revision and the verdict. The verdict is
+                                              None for free-text reviews or an unparseable JSON answer.
+        """
+        if stream:
+            return self._assess_stream(prd_document)
         try:
+            if self.review_mode == "parallel":
+                return self._review_parallel(prd_document)
+            if self.structured_verdict:
+                return self._parse_verdict_response(self._call_llm(
+                    *self._build_verdict_prompt(prd_document), response_format={"type": "json_object"}, task="review"))
             # Call the LLM using the inherited method from BaseAgent
-            # For a review, a user message might not be strictly necessary,
-            # as the system message fully defines the task.
-            review_feedback = self._call_llm(system_message=system_message)
-            return review_feedback
+            review_feedback = self._call_llm(*self._build_prompt(prd_document), task="review")
+            return review_feedback, None
+        except Exception as e:
+            raise Exception(f"Error from {self.agent_name}: {e}")
+
+    def _parse_verdict_response(self, response: str) -> tuple:
+        """Turns a JSON verdict into (rendered feedback, verdict); falls back to the raw text if it is invalid."""
+        try:
+            verdict = parse_review_verdict(response)
+        except ValueError as e:
+            print(f"Warning: {self.agent_name} returned an unreadable verdict ({e}); using it as free text.")
+            return response, None
+        return verdict.to_feedback(), verdict
+
+    async def agenerate(self, prd_document: str) -> str:
+        """
+        Async version of generate.
+
+        Args:
+            prd_document (str): The content of the PRD document to be reviewed.
+
+        Returns:
+            str: The structured feedback for revision.
+        """
+        try:
+            return await self.areview_prd(prd_document)
+        except Exception as e:
+            raise Exception(f"Error during PRD review generation by {self.agent_name}: {e}")
+
+    async def areview_prd(self, prd_document: str) -> str:
+        """
+        Async version of review_prd, backed by the AsyncOpenAI client.
+
+        Args:
+            prd_document (str): The content of the PRD document to be reviewed.
+
+        Returns:
+            str: The structured feedback for revision.
+        """
+        return (await self.aassess(prd_document))[0]
+
+    async def aassess(self, prd_document: str) -> tuple:
+        """Async version of assess; returns (feedback, verdict)."""
+        try:
+            if self.review_mode == "parallel":
+                return await self._areview_parallel(prd_document)
+            if self.structured_verdict:
+                return self._parse_verdict_response(await self._acall_llm(
+                    *self._build_verdict_prompt(prd_document), response_format={"type": "json_object"}, task="review"))
+            return await self._acall_llm(*self._build_prompt(prd_document), task="review"), None
         except Exception as e:
             raise Exception(f"Error from {self.agent_name}: {e}")
+
+    def _run_aspect(self, task: tuple):
+        """Runs one aspect review (see build_aspect_tasks) and returns its AspectReview."""
+        aspect, section_title = task[:2]
+        response = self._call_llm(*self._build_aspect_prompt(task), max_tokens=self.ASPECT_MAX_TOKENS,
+                                  task="aspect_review")
+        return parse_aspect_review(aspect, response, section_title)
+
+    def _review_parallel(self, prd_document: str) -> tuple:
+        """
+        Runs every review aspect concurrently in a thread pool and merges the results
+        into (feedback, verdict). Wall-clock time is set by the slowest aspect rather
+        than the sum of all of them.
+        """
+        tasks = build_aspect_tasks(prd_document)
+        with ThreadPoolExecutor(max_workers=self._fan_out(min(len(tasks), self.max_parallel_aspects))) as executor:
+            reviews = [future.result() for future in [submit_in_context(executor, self._run_aspect, task)
+                                                      for task in tasks]]
+        return merge_aspect_reviews(reviews), verdict_from_aspect_reviews(reviews)
+
+    def start_pipelined_review(self) -> PipelinedReview:
+        """
+        Starts a review that is fed the PRD while it is generated (see PipelinedReview).
+        It always reviews by aspect, as in parallel mode, whatever review_mode is set.
+        """
+        return PipelinedReview(self)
+
+    async def _areview_parallel(self, prd_document: str) -> tuple:
+        """Async version of _review_parallel; aspects are awaited concurrently."""
+        semaphore = asyncio.Semaphore(self._fan_out(self.max_parallel_aspects))
+
+        async def run(task):
+            aspect, section_title = task[:2]
+            async with semaphore:
+                response = await self._acall_llm(*self._build_aspect_prompt(task), max_tokens=self.ASPECT_MAX_TOKENS,
+                                                 task="aspect_review")
+            return parse_aspect_review(aspect, response, section_title)
+
+        reviews = await asyncio.gather(*(run(task) for task in build_aspect_tasks(prd_document)))
+        return merge_aspect_reviews(reviews), verdict_from_aspect_reviews(reviews)
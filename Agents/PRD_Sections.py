@@ -0,0 +1,152 @@
+# Agents/PRD_Sections.py
+
+import re
+
+# Top-level numbered headings such as '## 4. Functional Requirements' or '# 1. Introduction/Overview'.
+# Sub-headings like '### 4.1 Front End Features' do not match because the number must be
+# followed by '.' and whitespace.
+SECTION_HEADING_PATTERN = re.compile(r"^(#{1,4})\s*(?:\*\*)?\s*(\d+)\.\s+(.+?)\s*(?:\*\*)?\s*$", re.MULTILINE)
+
+# Words too generic to identify a section on their own when matching feedback to sections
+_GENERIC_ALIAS_WORDS = {"requirements", "considerations", "phases", "optional", "and", "the"}
+
+
+class PRDSection:
+    """A numbered top-level section of a PRD: its heading line and the text below it."""
+
+    def __init__(self, number: int, title: str, heading: str, body: str):
+        self.number = number
+        self.title = title
+        self.heading = heading
+        self.body = body
+
+    @property
+    def text(self) -> str:
+        """The full section text, heading included."""
+        return f"{self.heading}\n{self.body}"
+
+    def aliases(self) -> list:
+        """
+        Lower-case phrases that identify this section in reviewer feedback, e.g.
+        'User Stories/Personas' -> ['user stories/personas', 'user stories', 'personas'].
+        """
+        title = re.sub(r"[*_`]", "", self.title).strip().lower()
+        title = re.sub(r"\s*\(.*?\)\s*", " ", title).strip()
+        aliases = [title]
+        for part in re.split(r"\s*(?:/|&|\band\b)\s*", title):
+            part = part.strip(" :.-")
+            if part and part not in _GENERIC_ALIAS_WORDS and part not in aliases:
+                aliases.append(part)
+        return aliases
+
+    def __repr__(self):
+        return f"PRDSection({self.number}, {self.title!r})"
+
+
+def parse_prd_sections(prd_document: str) -> tuple[str, list]:
+    """
+    Splits a PRD into the text before the first numbered section (title, preamble)
+    and its numbered top-level sections.
+
+    Args:
+        prd_document (str): The PRD markdown.
+
+    Returns:
+        tuple[str, list[PRDSection]]: The preamble and the sections in document order.
+                                      The list is empty if no numbered headings were found.
+    """
+    matches = list(SECTION_HEADING_PATTERN.finditer(prd_document))
+    if not matches:
+        return prd_document, []
+
+    # Only split on headings at the level of the first numbered heading, so numbered
+    # sub-headings inside a section stay part of that section.
+    level = len(matches[0].group(1))
+    matches = [m for m in matches if len(m.group(1)) == level]
+
+    preamble = prd_document[:matches[0].start()]
+    sections = []
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(prd_document)
+        body = prd_document[match.end():end]
+        sections.append(PRDSection(
+            number=int(match.group(2)),
+            title=match.group(3).strip(),
+            heading=match.group(0),
+            body=body[1:] if body.startswith("\n") else body,
+        ))
+    return preamble, sections
+
+
+def join_sections(preamble: str, sections: list) -> str:
+    """Reassembles a PRD from its preamble and sections (the inverse of parse_prd_sections)."""
+    return preamble + "".join(section.text for section in sections)
+
+
+def _alias_pattern(alias: str):
+    # 'functional requirements' must not match inside 'non-functional requirements'
+    return re.compile(rf"(?<![\w-]){re.escape(alias)}(?!\w)")
+
+
+def map_feedback_to_sections(feedback: str, sections: list) -> dict:
+    """
+    Assigns the lines of a review to the PRD sections they talk about.
+    A line that names one or more sections (by title, title part, or 'Section N')
+    starts a new block for those sections; the following lines are attached to the
+    same sections until another section is named or a new top-level heading begins.
+
+    Args:
+        feedback (str): The reviewer's feedback.
+        sections (list[PRDSection]): Sections parsed from the reviewed PRD.
+
+    Returns:
+        dict[int, str]: Section number -> the feedback lines that concern it.
+                        Sections that are not mentioned are absent.
+    """
+    patterns = {s.number: [_alias_pattern(a) for a in s.aliases()] for s in sections}
+    section_numbers = set(patterns)
+    mapped = {}
+    current = []
+
+    for line in feedback.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        lowered = stripped.lower()
+        mentioned = [n for n, pats in patterns.items() if any(p.search(lowered) for p in pats)]
+        mentioned += [int(n) for n in re.findall(r"\bsection\s+(\d+)\b", lowered)
+                      if int(n) in section_numbers and int(n) not in mentioned]
+        if mentioned:
+            current = mentioned
+        elif re.match(r"^(#{1,4}\s|\d+\.\s|\*\*\d+\.)", stripped) and not line.startswith((" ", "\t")):
+            # A new unindented top-level heading that names no section ends the current block
+            current = []
+        for number in current:
+            mapped.setdefault(number, []).append(stripped)
+
+    return {number: "\n".join(lines) for number, lines in mapped.items()}
+
+
+def select_sections_to_revise(feedback: str, sections: list) -> dict:
+    """
+    Picks the sections a revision should regenerate, with the feedback for each.
+    Reviews comment on every section, so when the feedback has a 'Prioritized
+    Recommendations' block only the sections named there are selected; each still
+    receives all feedback lines that mention it. Without such a block, every
+    section mentioned anywhere in the feedback is selected.
+
+    Args:
+        feedback (str): The reviewer's feedback.
+        sections (list[PRDSection]): Sections parsed from the reviewed PRD.
+
+    Returns:
+        dict[int, str]: Section number -> feedback to address in that section.
+    """
+    section_feedback = map_feedback_to_sections(feedback, sections)
+    # Use the last mention, which is the block heading rather than a forward reference
+    matches = list(re.finditer(r"prioriti[sz]ed recommendations", feedback, re.IGNORECASE))
+    if matches:
+        prioritized = map_feedback_to_sections(feedback[matches[-1].end():], sections)
+        if prioritized:
+            return {number: section_feedback.get(number, text) for number, text in prioritized.items()}
+    return section_feedback
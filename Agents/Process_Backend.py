@@ -0,0 +1,167 @@
+# Agents/Process_Backend.py
+
+import json
+import multiprocessing
+import os
+import threading
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Seconds start() waits for every worker process to come up before giving up on a full warm-up
+WARM_UP_TIMEOUT_S = 120.0
+
+# The Orchestrator of this worker process, built once by _init_worker and reused for every job
+_worker_orchestrator = None
+# Barrier shared by all workers of a pool; start() parks one warm-up task on it per worker
+_worker_warm_barrier = None
+
+
+def encode_result(result: dict) -> bytes:
+    """Packs a workflow result dictionary into the compact form sent back from a worker."""
+    return zlib.compress(json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_result(data: bytes) -> dict:
+    """Unpacks a result produced by encode_result."""
+    return json.loads(zlib.decompress(data).decode("utf-8"))
+
+
+def _init_worker(orchestrator_config: dict, agent_kwargs_factory, warm_barrier=None):
+    """
+    Runs once in each worker process: builds the worker's Orchestrator and constructs
+    its agents (and their pooled clients) up front, so every job starts warm.
+    """
+    global _worker_orchestrator, _worker_warm_barrier
+    _worker_warm_barrier = warm_barrier
+    from Agents.Checkpoint_Store import WorkflowCheckpointStore
+    from Agents.Orchestrator_Agent import Orchestrator  # imported here: Orchestrator_Agent imports this module
+    from Agents.PRD_Archive import PRDArchive
+    from Agents.Similarity_Index import SimilarityIndex
+
+    config = dict(orchestrator_config)
+    checkpoint_db_path = config.pop("checkpoint_db_path", None)
+    if checkpoint_db_path:
+        config["checkpoint_store"] = WorkflowCheckpointStore(checkpoint_db_path)
+    similarity_db_path = config.pop("similarity_db_path", None)
+    if similarity_db_path:
+        config["similarity_index"] = SimilarityIndex(similarity_db_path)
+    archive_db_path = config.pop("archive_db_path", None)
+    if archive_db_path:
+        config["archive"] = PRDArchive(archive_db_path)
+    agent_kwargs = agent_kwargs_factory() if agent_kwargs_factory else {}
+    _worker_orchestrator = Orchestrator(agent_kwargs=agent_kwargs, **config)
+    _worker_orchestrator.get_all_agents()
+
+
+def _await_warm_up(timeout: float) -> int:
+    """
+    Warm-up task: blocks on the pool's barrier until one such task runs in every worker,
+    so no worker can take two of them. Returns the worker's pid.
+    """
+    try:
+        _worker_warm_barrier.wait(timeout)
+    except threading.BrokenBarrierError:
+        pass  # start() reports the workers that did come up
+    return os.getpid()
+
+
+def _run_job(index: int, inputs: tuple, include_content: bool) -> bytes:
+    """Runs one workflow on the worker's Orchestrator and returns its encoded result."""
+    result = {"index": index, "pid": os.getpid()}
+    try:
+        content, path = _worker_orchestrator.run_prd_workflow(*inputs)
+        result.update(status="ok", prd_path=path)
+        if include_content:
+            result["prd"] = content
+    except Exception as e:
+        result.update(status="error", error=str(e))
+    return encode_result(result)
+
+
+class ProcessPoolBackend:
+    """
+    Shards PRD workflows across worker processes, so the CPU-bound parts of many
+    workflows (prompt assembly, review parsing, markdown handling, file I/O) run in
+    parallel instead of contending for one interpreter's GIL.
+
+    Every worker keeps one warm Orchestrator for its lifetime. Jobs carry only their
+    inputs, and results return as zlib-compressed JSON (see encode_result).
+    """
+
+    def __init__(self, orchestrator_config: dict, max_workers: int = None, agent_kwargs_factory=None,
+                 include_content: bool = True):
+        """
+        Args:
+            orchestrator_config (dict): Picklable Orchestrator keyword arguments for the workers.
+            max_workers (int, optional): Worker processes. Defaults to the number of CPU cores.
+            agent_kwargs_factory (callable, optional): Picklable zero-argument callable run in each worker
+                                                       to build its agent_kwargs. Clients, caches and locks
+                                                       cannot be sent to another process, so they must be
+                                                       created there.
+            include_content (bool): If False, results carry only the saved PRD path, not its text.
+        """
+        self.orchestrator_config = orchestrator_config
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.agent_kwargs_factory = agent_kwargs_factory
+        self.include_content = include_content
+        self._executor = None
+        self._warm_barrier = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._warm_barrier = multiprocessing.Barrier(self.max_workers)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=_init_worker,
+                initargs=(self.orchestrator_config, self.agent_kwargs_factory, self._warm_barrier))
+        return self._executor
+
+    def start(self, timeout: float = WARM_UP_TIMEOUT_S) -> int:
+        """
+        Starts every worker process and waits until all of them are warm. One warm-up task
+        per worker waits on a shared barrier, so the tasks cannot all be served by whichever
+        workers happen to start first.
+
+        Args:
+            timeout (float): Seconds to wait for all workers before settling for the ones that are up.
+
+        Returns:
+            int: The number of distinct workers that finished warming up.
+        """
+        executor = self._get_executor()
+        futures = [executor.submit(_await_warm_up, timeout) for _ in range(self.max_workers)]
+        warm = len({future.result() for future in futures})
+        self._warm_barrier.reset()  # a timed-out wait leaves the barrier broken
+        if warm < self.max_workers:
+            print(f"Warning: Only {warm} of {self.max_workers} worker processes warmed up within {timeout:.0f}s.")
+        return warm
+
+    def map(self, requirement_sets):
+        """
+        Runs a workflow for every requirement set. Sets are pulled from the iterable only
+        when a worker can take them (at most two per worker are queued), so arbitrarily
+        many can be processed without loading them all.
+
+        Args:
+            requirement_sets (Iterable[tuple]): (front_end_reqs, middleware_reqs, backend_reqs, other_details).
+
+        Yields:
+            dict: One result per set, as each finishes: 'index' (position in the input), 'status'
+                  ('ok' or 'error'), 'prd_path' and 'prd', or 'error'.
+        """
+        executor = self._get_executor()
+        pending = set()
+        for index, inputs in enumerate(requirement_sets):
+            pending.add(executor.submit(_run_job, index, tuple(inputs), self.include_content))
+            if len(pending) >= 2 * self.max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from (decode_result(future.result()) for future in done)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from (decode_result(future.result()) for future in done)
+
+    def shutdown(self, wait: bool = True):
+        """Stops the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+            self._warm_barrier = None
@@ -0,0 +1,210 @@
+# Agents/Prompt_Builder.py
+
+import functools
+import os
+import re
+
+try:
+    import tiktoken  # Optional: exact token counts. Without it a ~4 characters/token estimate is used.
+except ImportError:
+    tiktoken = None
+
+from Agents.PRD_Sections import PRDSection, join_sections, parse_prd_sections
+
+# Default input-token budget per prompt; override with PRECISIONAI_PROMPT_TOKEN_BUDGET
+DEFAULT_PROMPT_TOKEN_BUDGET = 16000
+
+CHARS_PER_TOKEN = 4
+
+OMISSION_MARKER = "\n[... {count} tokens omitted ...]\n"
+
+
+@functools.lru_cache(maxsize=16)
+def _get_encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Counts the tokens of a text with tiktoken if installed, or estimates them (~4 characters per token)."""
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _head(text: str, max_tokens: int, model: str) -> str:
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+def _tail(text: str, max_tokens: int, model: str) -> str:
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return text[-max_tokens * CHARS_PER_TOKEN:]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[-max_tokens:])
+
+
+def trim_middle(text: str, max_tokens: int, model: str = "gpt-4o") -> str:
+    """
+    Shortens a text to about max_tokens by cutting from the middle, keeping its beginning
+    (usually the most important part) and its end, with a marker where text was removed.
+    """
+    total = count_tokens(text, model)
+    if total <= max_tokens:
+        return text
+    keep = max(0, max_tokens - 12)  # room for the omission marker
+    head = _head(text, keep * 2 // 3, model)
+    tail = _tail(text, keep - keep * 2 // 3, model)
+    return head + OMISSION_MARKER.format(count=total - keep) + tail
+
+
+def condense_feedback(feedback: str, max_tokens: int, model: str = "gpt-4o") -> str:
+    """
+    Shortens review feedback to about max_tokens. The 'Prioritized Recommendations'
+    block and high/medium-severity lines are kept first, then the remaining lines in
+    document order; whatever still does not fit is trimmed.
+    """
+    if count_tokens(feedback, model) <= max_tokens:
+        return feedback
+    lines = feedback.splitlines()
+    match = None
+    for index, line in enumerate(lines):
+        if re.search(r"prioriti[sz]ed recommendations", line, re.IGNORECASE):
+            match = index  # the last mention is the block heading
+    essential = set(range(match, len(lines))) if match is not None else set()
+    essential |= {i for i, line in enumerate(lines) if re.search(r"\[(high|medium)\]", line, re.IGNORECASE)}
+    kept, used = set(), 0
+    for group in (sorted(essential), [i for i in range(len(lines)) if i not in essential]):
+        for index in group:
+            cost = count_tokens(lines[index], model) + 1
+            if used + cost > max_tokens:
+                continue
+            kept.add(index)
+            used += cost
+    condensed = "\n".join(lines[i] for i in sorted(kept))
+    return trim_middle(condensed, max_tokens, model)
+
+
+def condense_document(document: str, max_tokens: int, model: str = "gpt-4o", keep_sections: tuple = ()) -> str:
+    """
+    Shortens a PRD used as context to about max_tokens. Sections named in keep_sections
+    stay intact; the others are cut down to their heading and opening lines, with the
+    space shared evenly among them. Falls back to trim_middle for unstructured text.
+    """
+    if count_tokens(document, model) <= max_tokens:
+        return document
+    preamble, sections = parse_prd_sections(document)
+    if not sections:
+        return trim_middle(document, max_tokens, model)
+    kept = [s for s in sections if s.number in keep_sections]
+    others = [s for s in sections if s.number not in keep_sections]
+    fixed = count_tokens(preamble, model) + sum(count_tokens(s.text, model) for s in kept)
+    share = max(8, (max_tokens - fixed) // max(1, len(others)))
+    condensed = []
+    for section in sections:
+        if section in kept or count_tokens(section.text, model) <= share:
+            condensed.append(section)
+            continue
+        body = _head(section.body, max(0, share - count_tokens(section.heading, model) - 4), model).rstrip()
+        condensed.append(PRDSection(section.number, section.title, section.heading, body + " [...]\n\n"))
+    return trim_middle(join_sections(preamble, condensed), max_tokens, model)
+
+
+class PromptPart:
+    """
+    A piece of variable prompt content.
+
+    Args:
+        label (str): Heading shown above the content (e.g. 'Reviewer Feedback'); None for none.
+        content (str): The content.
+        priority (int): Parts with lower priority are shortened first when over budget.
+        compressor (callable, optional): compressor(text, max_tokens, model) -> str used to shorten
+                                         the part. None means the part is never shortened.
+        min_tokens (int): The part is never shortened below this.
+    """
+
+    def __init__(self, label: str, content: str, priority: int = 1, compressor=trim_middle, min_tokens: int = 64):
+        self.label = label
+        self.content = content or ""
+        self.priority = priority
+        self.compressor = compressor
+        self.min_tokens = min_tokens
+
+    def render(self) -> str:
+        return f"**{self.label}:**\n{self.content}" if self.label else self.content
+
+
+class PromptBuilder:
+    """
+    Lays out a prompt for prefix caching and a token budget. Static instructions, which are
+    identical across calls of the same kind, form the system message, so the provider can
+    reuse the cached prefix; all variable content goes into the user message after them.
+    When the prompt exceeds the budget, compressible parts are shortened, lowest priority first.
+    """
+
+    def __init__(self, instructions: str, model: str = "gpt-4o", budget_tokens: int = None):
+        self.instructions = instructions.strip()
+        self.model = model
+        self.budget_tokens = budget_tokens or get_prompt_token_budget()
+        self.parts = []
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.shortened = []
+
+    def add(self, label: str, content: str, priority: int = 1, compressor=trim_middle, min_tokens: int = 64):
+        """Appends a variable part (see PromptPart). Empty content is skipped. Returns the builder."""
+        if content:
+            self.parts.append(PromptPart(label, content, priority, compressor, min_tokens))
+        return self
+
+    def _total(self, sizes: list) -> int:
+        # Two newlines between parts, counted generously as one token each
+        return count_tokens(self.instructions, self.model) + sum(sizes) + len(sizes)
+
+    def build(self) -> tuple:
+        """
+        Returns:
+            tuple[str, str]: (system message, user message), fitted to the budget as far as the
+                             compressible parts allow.
+        """
+        sizes = [count_tokens(part.render(), self.model) for part in self.parts]
+        self.tokens_before = self._total(sizes)
+        excess = self.tokens_before - self.budget_tokens
+        candidates = sorted((i for i, part in enumerate(self.parts) if part.compressor is not None),
+                            key=lambda i: (self.parts[i].priority, -sizes[i]))
+        for index in candidates:
+            if excess <= 0:
+                break
+            part = self.parts[index]
+            content_tokens = count_tokens(part.content, self.model)
+            target = max(part.min_tokens, content_tokens - excess)
+            if target >= content_tokens:
+                continue
+            part.content = part.compressor(part.content, target, self.model)
+            new_size = count_tokens(part.render(), self.model)
+            excess -= sizes[index] - new_size
+            sizes[index] = new_size
+            self.shortened.append(part.label)
+        self.tokens_after = self._total(sizes)
+        if self.shortened:
+            print(f"Prompt shortened from {self.tokens_before} to {self.tokens_after} tokens "
+                  f"(budget {self.budget_tokens}): {', '.join(str(label) for label in self.shortened)}")
+        if excess > 0:
+            print(f"Warning: Prompt is {self.tokens_after} tokens, over the budget of {self.budget_tokens}.")
+        return self.instructions, "\n\n".join(part.render() for part in self.parts)
+
+
+def get_prompt_token_budget() -> int:
+    """The input-token budget per prompt, from PRECISIONAI_PROMPT_TOKEN_BUDGET (default: 16000)."""
+    return int(os.environ.get("PRECISIONAI_PROMPT_TOKEN_BUDGET", DEFAULT_PROMPT_TOKEN_BUDGET))
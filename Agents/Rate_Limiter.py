@@ -0,0 +1,107 @@
+# Agents/Rate_Limiter.py
+
+import asyncio
+import threading
+import time
+
+
+def estimate_request_tokens(messages: list, max_tokens: int) -> int:
+    """
+    Cheap upper-bound estimate of the tokens a request will consume, used to
+    reserve tokens-per-minute budget before the request is sent.
+    Uses the common ~4 characters per token heuristic for the prompt plus the
+    full completion allowance.
+    """
+    prompt_chars = sum(len(m.get("content") or "") for m in messages)
+    return prompt_chars // 4 + max_tokens
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at a per-minute rate.
+    Callers reserve capacity up front and are told how long to wait; the bucket
+    may go into debt, which keeps waiting callers in FIFO order.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        """
+        Args:
+            rate_per_minute (float): Refill rate in units per minute.
+            capacity (float, optional): Burst size. Defaults to one minute's worth.
+        """
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate_per_second)
+        self._last_refill = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Reserves amount units and returns the number of seconds the caller must
+        wait before using them. Requests larger than the capacity are clamped.
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate_per_second
+
+    def refund(self, amount: float):
+        """Returns over-reserved units to the bucket (e.g. when actual usage was lower)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class RateLimiter:
+    """
+    Combines a requests-per-minute and a tokens-per-minute bucket.
+    Attach one instance to every agent sharing an API quota (BaseAgent.rate_limiter)
+    and each LLM call will wait for budget before it is sent.
+    """
+
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None):
+        """
+        Args:
+            requests_per_minute (float, optional): RPM budget. None means unlimited.
+            tokens_per_minute (float, optional): TPM budget. None means unlimited.
+        """
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        delays = [0.0]
+        if self.request_bucket is not None:
+            delays.append(self.request_bucket.reserve(1))
+        if self.token_bucket is not None:
+            delays.append(self.token_bucket.reserve(estimated_tokens))
+        return max(delays)
+
+    def acquire(self, estimated_tokens: int):
+        """Blocks the calling thread until the request fits in both budgets."""
+        delay = self._reserve(estimated_tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def aacquire(self, estimated_tokens: int):
+        """Waits, without blocking the event loop, until the request fits in both budgets."""
+        delay = self._reserve(estimated_tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """Refunds the difference between the reserved estimate and the tokens actually used."""
+        if self.token_bucket is not None and actual_tokens is not None and actual_tokens < estimated_tokens:
+            self.token_bucket.refund(estimated_tokens - actual_tokens)
+
+    def refund(self, estimated_tokens: int):
+        """Returns the whole token reservation of an attempt that failed without producing a completion."""
+        if self.token_bucket is not None and estimated_tokens:
+            self.token_bucket.refund(estimated_tokens)
@@ -0,0 +1,455 @@
+# Agents/Resilience.py
+
+import asyncio
+import email.utils
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from openai import APIConnectionError, APIStatusError
+
+from Agents.Instrumentation import submit_in_context
+
+# HTTP status codes worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+_default_resilience = None
+_default_lock = threading.Lock()
+_hedge_executor = None
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit breaker is open."""
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when a call's overall deadline (including retries) has passed."""
+
+
+def is_retryable(error: Exception) -> bool:
+    """Returns True for transient API errors: connection problems, timeouts, 408/409/429 and 5xx."""
+    if isinstance(error, APIConnectionError):  # includes APITimeoutError
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+def retry_after_seconds(error: Exception):
+    """
+    Reads the server's requested wait from an API error's 'retry-after-ms' or
+    'retry-after' header (seconds or an HTTP date).
+
+    Returns:
+        float | None: Seconds to wait, or None if the server did not say.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return max(0.0, float(headers["retry-after-ms"]) / 1000.0)
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            retry_at = email.utils.parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter: the n-th retry waits a random time between
+    0 and min(max_delay, base_delay * 2**n), unless the server sent Retry-After, which
+    is honored (capped at max_retry_after).
+    """
+
+    def __init__(self, max_retries: int = 4, base_delay: float = 0.5, max_delay: float = 30.0,
+                 max_retry_after: float = 60.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def delay(self, retry_number: int, error: Exception) -> float:
+        """Seconds to wait before retry number retry_number (0-based) after error."""
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** retry_number)))
+
+
+class CircuitBreaker:
+    """
+    Stops calling an endpoint after failure_threshold consecutive transient failures.
+    After reset_timeout seconds one probe call is let through (half-open); its success
+    closes the circuit, its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a probe call through."""
+        with self._lock:
+            return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """Returns True if a call may be made now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """Ends a probe call that finished without an outcome (e.g. cancelled), so another may be sent."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    print(f"Circuit breaker opened after {self._failures} consecutive failures.")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies, used to pick the hedging delay."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, fraction: float):
+        """Returns the latency quantile, or None until min_samples calls have been seen."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class CallAttempts:
+    """What happened during one resilient call; readable even when the call finally fails."""
+
+    def __init__(self):
+        self.retries = 0
+        self.hedged = False
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _default_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+    return _hedge_executor
+
+
+class ResilientCaller:
+    """
+    Runs LLM requests with retries, an overall per-call deadline, a circuit breaker per
+    endpoint key, and optional hedging. With hedging on, a second identical request is
+    sent when the first has not answered within the hedge_quantile (e.g. p95) of recent
+    latencies for the same kind of call, and whichever answers first wins. Hedging only
+    starts once enough latencies have been observed, and never waits less than
+    min_hedge_delay. A synchronous hedge loser cannot be cancelled and runs to completion.
+
+    Args:
+        retry_policy (RetryPolicy, optional): Backoff settings. Defaults to RetryPolicy().
+        deadline_s (float, optional): Overall time budget per call, retries included. None disables it.
+        failure_threshold (int): Consecutive transient failures that open an endpoint's circuit.
+        reset_timeout (float): Seconds an open circuit waits before letting a probe through.
+        hedge (bool): Send hedged requests for slow non-streaming calls.
+        hedge_quantile (float): Latency quantile after which the hedge is sent.
+        min_hedge_delay (float): Lower bound for the hedging delay in seconds.
+    """
+
+    def __init__(self, retry_policy: RetryPolicy = None, deadline_s: float = 180.0, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, hedge: bool = False, hedge_quantile: float = 0.95,
+                 min_hedge_delay: float = 1.0):
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.deadline_s = deadline_s
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self._lock = threading.Lock()
+        self._breakers = {}
+        self._trackers = {}
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    def breaker(self, key: str) -> CircuitBreaker:
+        """The circuit breaker for an endpoint key (e.g. a model name)."""
+        with self._lock:
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[key]
+
+    def tracker(self, key: str) -> LatencyTracker:
+        """The latency tracker for a kind of call (e.g. model and max_tokens)."""
+        with self._lock:
+            if key not in self._trackers:
+                self._trackers[key] = LatencyTracker()
+            return self._trackers[key]
+
+    def hedge_delay(self, latency_key: str):
+        """Seconds after which a hedged request is sent, or None if hedging is off or not yet calibrated."""
+        if not self.hedge:
+            return None
+        threshold = self.tracker(latency_key).quantile(self.hedge_quantile)
+        return None if threshold is None else max(threshold, self.min_hedge_delay)
+
+    def _remaining(self, deadline):
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceededError(f"LLM call exceeded its {self.deadline_s:g}s deadline.")
+        return remaining
+
+    def _check_circuit(self, breaker: CircuitBreaker, key: str):
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit for '{key}' is open after repeated failures; "
+                                   f"retry in {breaker.retry_in():.1f}s.")
+
+    def _next_delay(self, error: Exception, retry_number: int, deadline) -> float:
+        """Returns the backoff before the next retry, or None if the error must be raised."""
+        if not is_retryable(error) or retry_number >= self.retry_policy.max_retries:
+            return None
+        delay = self.retry_policy.delay(retry_number, error)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        print(f"Retrying LLM call after {error.__class__.__name__} in {delay:.1f}s "
+              f"(retry {retry_number + 1} of {self.retry_policy.max_retries}).")
+        return delay
+
+    def _record_outcome(self, breaker: CircuitBreaker, error: Exception = None):
+        # Non-transient errors (e.g. 400 Bad Request) mean the endpoint is up, so they do not trip the breaker
+        if error is not None and is_retryable(error):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def call(self, fn, key: str = "default", latency_key: str = None, hedge: bool = True,
+             attempts: CallAttempts = None):
+        """
+        Calls fn(timeout) until it succeeds, a non-retryable error occurs, retries run
+        out or the deadline passes. timeout is the remaining deadline in seconds (None
+        without a deadline) and should be passed on to the HTTP request.
+
+        Args:
+            fn (callable): Performs one attempt.
+            key (str): Circuit breaker key (the endpoint or model).
+            latency_key (str, optional): Latency tracker key; defaults to key.
+            hedge (bool): Allow hedging for this call (streams must not be hedged).
+            attempts (CallAttempts, optional): Receives the retry count and whether a hedge was sent.
+
+        Returns:
+            The result of fn.
+
+        Raises:
+            CircuitOpenError: If the endpoint's circuit is open.
+            DeadlineExceededError: If the deadline passed before an attempt could start.
+            Exception: The last error raised by fn.
+        """
+        attempts = attempts or CallAttempts()
+        latency_key = latency_key or key
+        breaker = self.breaker(key)
+        deadline = time.monotonic() + self.deadline_s if self.deadline_s else None
+        while True:
+            # Checked before the circuit, which may hand this attempt the half-open probe
+            remaining = self._remaining(deadline)
+            self._check_circuit(breaker, key)
+            started = time.monotonic()
+            recorded = False
+            try:
+                hedge_delay = self.hedge_delay(latency_key) if hedge else None
+                if hedge_delay is not None and (remaining is None or hedge_delay < remaining):
+                    result = self._hedged_call(fn, hedge_delay, remaining, attempts)
+                else:
+                    result = fn(remaining)
+                self._record_outcome(breaker)
+                recorded = True
+            except Exception as e:
+                self._record_outcome(breaker, e)
+                recorded = True
+                delay = self._next_delay(e, attempts.retries, deadline)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempts.retries += 1
+                continue
+            finally:
+                # An interrupted attempt has no outcome; it must not keep the half-open probe forever
+                if not recorded:
+                    breaker.release_probe()
+            self.tracker(latency_key).record(time.monotonic() - started)
+            return result
+
+    def _hedged_call(self, fn, hedge_delay: float, remaining, attempts: CallAttempts):
+        executor = _get_hedge_executor()
+        primary = submit_in_context(executor, fn, remaining)
+        done, _ = wait([primary], timeout=hedge_delay)
+        if done:
+            return primary.result()
+        attempts.hedged = True
+        with self._lock:
+            self.hedges_sent += 1
+        backup = submit_in_context(executor, fn, None if remaining is None else remaining - hedge_delay)
+        pending = {primary, backup}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        with self._lock:
+                            self.hedges_won += 1
+                    return future.result()
+        return primary.result()  # both failed: raise the primary's error
+
+    async def acall(self, fn, key: str = "default", latency_key: str = None, hedge: bool = True,
+                    attempts: CallAttempts = None):
+        """
+        Async version of call. fn(timeout) must return an awaitable; attempts are bounded
+        by the remaining deadline, and a hedge loser is cancelled.
+        """
+        attempts = attempts or CallAttempts()
+        latency_key = latency_key or key
+        breaker = self.breaker(key)
+        deadline = time.monotonic() + self.deadline_s if self.deadline_s else None
+        while True:
+            remaining = self._remaining(deadline)
+            self._check_circuit(breaker, key)
+            started = time.monotonic()
+            recorded = False
+            try:
+                hedge_delay = self.hedge_delay(latency_key) if hedge else None
+                if hedge_delay is not None and (remaining is None or hedge_delay < remaining):
+                    attempt = self._ahedged_call(fn, hedge_delay, remaining, attempts)
+                else:
+                    attempt = fn(remaining)
+                try:
+                    result = await asyncio.wait_for(attempt, remaining)
+                except asyncio.TimeoutError:
+                    raise DeadlineExceededError(f"LLM call exceeded its {self.deadline_s:g}s deadline.")
+                self._record_outcome(breaker)
+                recorded = True
+            except DeadlineExceededError:
+                breaker.record_failure()
+                recorded = True
+                raise
+            except Exception as e:
+                self._record_outcome(breaker, e)
+                recorded = True
+                delay = self._next_delay(e, attempts.retries, deadline)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempts.retries += 1
+                continue
+            finally:
+                # A cancelled attempt (CancelledError is not an Exception) has no outcome
+                if not recorded:
+                    breaker.release_probe()
+            self.tracker(latency_key).record(time.monotonic() - started)
+            return result
+
+    async def _ahedged_call(self, fn, hedge_delay: float, remaining, attempts: CallAttempts):
+        primary = asyncio.ensure_future(fn(remaining))
+        done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+        if done:
+            return primary.result()
+        attempts.hedged = True
+        with self._lock:
+            self.hedges_sent += 1
+        backup = asyncio.ensure_future(fn(None if remaining is None else remaining - hedge_delay))
+        pending = {primary, backup}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            with self._lock:
+                                self.hedges_won += 1
+                        return task.result()
+            return primary.result()  # both failed: raise the primary's error
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def get_default_resilience() -> ResilientCaller:
+    """
+    Returns the process-wide ResilientCaller shared by all agents, so circuit breakers
+    and latency statistics are per endpoint rather than per agent. Configured through:
+        PRECISIONAI_LLM_MAX_RETRIES  - retries per call (default: 4).
+        PRECISIONAI_LLM_DEADLINE     - overall seconds per call including retries; 0 disables (default: 180).
+        PRECISIONAI_LLM_HEDGE        - set to "1" to enable hedged requests (default: off).
+        PRECISIONAI_LLM_HEDGE_QUANTILE - latency quantile that triggers the hedge (default: 0.95).
+        PRECISIONAI_CIRCUIT_FAILURES - consecutive failures that open the circuit (default: 5).
+        PRECISIONAI_CIRCUIT_RESET    - seconds before an open circuit is probed again (default: 30).
+    """
+    global _default_resilience
+    if _default_resilience is None:
+        with _default_lock:
+            if _default_resilience is None:
+                deadline = float(os.environ.get("PRECISIONAI_LLM_DEADLINE", 180))
+                _default_resilience = ResilientCaller(
+                    retry_policy=RetryPolicy(max_retries=int(os.environ.get("PRECISIONAI_LLM_MAX_RETRIES", 4))),
+                    deadline_s=deadline or None,
+                    failure_threshold=int(os.environ.get("PRECISIONAI_CIRCUIT_FAILURES", 5)),
+                    reset_timeout=float(os.environ.get("PRECISIONAI_CIRCUIT_RESET", 30)),
+                    hedge=os.environ.get("PRECISIONAI_LLM_HEDGE", "0") == "1",
+                    hedge_quantile=float(os.environ.get("PRECISIONAI_LLM_HEDGE_QUANTILE", 0.95)),
+                )
+    return _default_resilience
@@ -0,0 +1,152 @@
+# Agents/Review_Aspects.py
+
+import re
+
+from Agents.PRD_Sections import parse_prd_sections
+
+# Cross-cutting concerns reviewed independently of each other in parallel review mode.
+# Each entry maps the aspect name to the focus given to its reviewer.
+CROSS_CUTTING_ASPECTS = {
+    "Consistency": "contradictions or inconsistencies between sections (e.g. goals vs. scope, "
+                   "user stories vs. functional requirements, terminology, numbers and limits).",
+    "Feasibility": "whether the requirements are realistic and achievable given typical development "
+                   "constraints, the stated architecture, and the assumptions made.",
+    "Testability": "whether each requirement is specific and measurable enough to be verified by a test; "
+                   "flag vague wording such as 'fast', 'secure' or 'user-friendly' without criteria.",
+}
+
+SEVERITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+ASPECT_RESPONSE_FORMAT = """
+Respond using exactly this format and nothing else:
+ASSESSMENT: <one or two sentences>
+ISSUES:
+- [high|medium|low] <specific issue and where it occurs>
+RECOMMENDATIONS:
+- <specific, actionable change>
+Write 'ISSUES:' followed by '- none' if you found no issues.
+"""
+
+
+class AspectReview:
+    """The parsed result of one aspect reviewer: an assessment, ranked issues and recommendations."""
+
+    def __init__(self, aspect: str, assessment: str = "", issues: list = None, recommendations: list = None,
+                 section_title: str = None):
+        self.aspect = aspect
+        self.assessment = assessment
+        self.issues = issues or []  # list of (severity, text)
+        self.recommendations = recommendations or []
+        self.section_title = section_title  # set for per-section reviews
+
+
+def section_review_task(section) -> tuple:
+    """The aspect task reviewing a single PRD section (see build_aspect_tasks)."""
+    return (f"Section: {section.title}", section.title, f"""
+You are an expert and highly critical Product Requirements Document (PRD) reviewer.
+Review ONLY the PRD section in the user message for completeness, clarity and missing details.
+{ASPECT_RESPONSE_FORMAT}""", "Section for Review", section.text)
+
+
+def build_aspect_tasks(prd_document: str) -> list:
+    """
+    Splits a PRD review into independent aspect prompts: one per numbered PRD section
+    plus one per cross-cutting concern. If the PRD has no numbered sections, a single
+    whole-document section check is used instead of per-section ones. The instructions
+    contain no PRD text, so all per-section reviews share the same cacheable prefix.
+
+    Returns:
+        list[tuple[str, str, str, str, str]]: (aspect name, section title or None, static instructions,
+                                               label of the reviewed content, reviewed content).
+    """
+    _, sections = parse_prd_sections(prd_document)
+    tasks = [section_review_task(section) for section in sections]
+    if not sections:
+        tasks.append(("Section-Specific Review", None, f"""
+You are an expert and highly critical Product Requirements Document (PRD) reviewer.
+Review each section of the PRD in the user message for completeness, clarity and missing details.
+{ASPECT_RESPONSE_FORMAT}""", "PRD Document for Review", prd_document))
+    for aspect, focus in CROSS_CUTTING_ASPECTS.items():
+        tasks.append((aspect, None, f"""
+You are an expert and highly critical Product Requirements Document (PRD) reviewer.
+Review the PRD in the user message for a single concern only: {focus}
+{ASPECT_RESPONSE_FORMAT}""", "PRD Document for Review", prd_document))
+    return tasks
+
+
+def parse_aspect_review(aspect: str, response: str, section_title: str = None) -> AspectReview:
+    """
+    Parses an aspect reviewer's response (see ASPECT_RESPONSE_FORMAT). Lenient: issues
+    without a severity tag are treated as medium, and unparseable text becomes the assessment.
+    """
+    review = AspectReview(aspect, section_title=section_title)
+    block = None
+    for line in response.splitlines():
+        stripped = line.strip()
+        upper = stripped.upper()
+        if upper.startswith("ASSESSMENT:"):
+            review.assessment = stripped[len("ASSESSMENT:"):].strip()
+            block = "assessment"
+        elif upper.startswith("ISSUES:"):
+            block = "issues"
+        elif upper.startswith("RECOMMENDATIONS:"):
+            block = "recommendations"
+        elif stripped.startswith(("-", "*")):
+            item = stripped.lstrip("-* ").strip()
+            if not item or item.lower() in ("none", "none.", "n/a"):
+                continue
+            if block == "issues":
+                match = re.match(r"\[(high|medium|low)\]\s*(.*)", item, re.IGNORECASE)
+                severity, text = (match.group(1).lower(), match.group(2)) if match else ("medium", item)
+                review.issues.append((severity, text))
+            elif block == "recommendations":
+                review.recommendations.append(item)
+        elif stripped and block == "assessment":
+            review.assessment += " " + stripped
+    if not review.assessment and not review.issues and not review.recommendations:
+        review.assessment = response.strip()
+    return review
+
+
+def merge_aspect_reviews(reviews: list, max_recommendations: int = 5) -> str:
+    """
+    Merges aspect reviews into one feedback document with the same structure as a
+    single-pass review (Overall Assessment, Section-Specific Feedback, Cross-Cutting
+    Issues, Prioritized Recommendations), so downstream consumers work unchanged.
+    """
+    section_reviews = [r for r in reviews if r.section_title or r.aspect == "Section-Specific Review"]
+    cross_cutting = [r for r in reviews if r not in section_reviews]
+    all_issues = [(severity, review, text) for review in reviews for severity, text in review.issues]
+    major = [issue for issue in all_issues if issue[0] in ("high", "medium")]
+
+    lines = ["1.  **Overall Assessment:**"]
+    if major:
+        high = sum(1 for issue in major if issue[0] == "high")
+        lines.append(f"    The review found {len(major)} significant issue(s) ({high} high severity) "
+                     f"across {len({issue[1].aspect for issue in major})} aspect(s).")
+    else:
+        lines.append("    The PRD looks good and is satisfactory; only minor adjustments are suggested.")
+
+    def describe(review, indent):
+        out = [f"{indent}{review.assessment}"] if review.assessment else []
+        out += [f"{indent}- [{severity.capitalize()}] {text}" for severity, text in review.issues]
+        return out
+
+    lines.append("2.  **Section-Specific Feedback:**")
+    for review in section_reviews:
+        lines.append(f"    * **{review.section_title or review.aspect}:**")
+        lines += describe(review, "        ")
+    lines.append("3.  **Cross-Cutting Issues:**")
+    for review in cross_cutting:
+        lines.append(f"    * **{review.aspect}:**")
+        lines += describe(review, "        ")
+
+    lines.append("4.  **Prioritized Recommendations:**")
+    ranked = sorted(major, key=lambda issue: SEVERITY_ORDER[issue[0]])[:max_recommendations]
+    for rank, (severity, review, text) in enumerate(ranked, start=1):
+        where = review.section_title or review.aspect
+        fix = f" Recommendation: {review.recommendations[0]}" if review.recommendations else ""
+        lines.append(f"    {rank}. [{severity.capitalize()}] {where}: {text}{fix}")
+    if not ranked:
+        lines.append("    No critical changes required.")
+    return "\n".join(lines)
@@ -0,0 +1,198 @@
+# Agents/Review_Verdict.py
+
+import json
+import re
+
+from Agents.PRD_Sections import parse_prd_sections
+from Agents.Review_Aspects import SEVERITY_ORDER
+
+# Scores are on a 0-10 scale
+MAX_SCORE = 10.0
+
+# Score deducted from a section per issue of each severity when scores are derived from issues
+SEVERITY_PENALTY = {"high": 3.0, "medium": 1.5, "low": 0.5}
+
+VERDICT_RESPONSE_FORMAT = """
+Respond with a single JSON object and nothing else, using exactly these keys:
+{
+  "summary": "<one or two sentences on the PRD's main strengths and weaknesses>",
+  "overall_score": <number from 0 to 10; 8 or more means ready for development>,
+  "ready_for_development": <true or false>,
+  "section_scores": [
+    {"section": "<section title as written in the PRD>", "score": <0-10>, "feedback": "<specific improvements>"}
+  ],
+  "issues": [
+    {"severity": "high|medium|low", "section": "<section title, or Cross-Cutting>",
+     "issue": "<specific problem>", "recommendation": "<specific, actionable change>"}
+  ]
+}
+Score every section listed in the user message. List issues from most to least severe; use an empty list if there are none.
+"""
+
+
+class ReviewVerdict:
+    """
+    A machine-readable review: an overall score, per-section scores and a
+    severity-ranked issue list. to_feedback() renders it in the same four-part
+    structure as a free-text review, so the creator's revision prompts and
+    section targeting work unchanged.
+    """
+
+    def __init__(self, overall_score: float, section_scores: dict = None, issues: list = None,
+                 summary: str = "", ready: bool = False, section_feedback: dict = None):
+        self.overall_score = max(0.0, min(MAX_SCORE, float(overall_score)))
+        self.section_scores = section_scores or {}  # section title -> score
+        self.section_feedback = section_feedback or {}  # section title -> feedback text
+        # (severity, section, issue, recommendation), most severe first
+        self.issues = sorted(issues or [], key=lambda issue: SEVERITY_ORDER.get(issue[0], 1))
+        self.summary = summary
+        self.ready = ready
+
+    @property
+    def high_severity_count(self) -> int:
+        return sum(1 for issue in self.issues if issue[0] == "high")
+
+    def is_satisfactory(self, target_score: float) -> bool:
+        """True if the PRD reaches target_score and has no high-severity issues."""
+        return self.overall_score >= target_score and self.high_severity_count == 0
+
+    def to_dict(self) -> dict:
+        return {
+            "summary": self.summary,
+            "overall_score": self.overall_score,
+            "ready_for_development": self.ready,
+            "section_scores": [{"section": title, "score": score, "feedback": self.section_feedback.get(title, "")}
+                               for title, score in self.section_scores.items()],
+            "issues": [{"severity": s, "section": section, "issue": issue, "recommendation": rec}
+                       for s, section, issue, rec in self.issues],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ReviewVerdict":
+        """
+        Builds a verdict from the reviewer's JSON object. Lenient about missing keys;
+        the overall score defaults to the mean section score.
+
+        Raises:
+            ValueError: If the object has neither an overall score nor section scores.
+        """
+        section_scores, section_feedback = {}, {}
+        for entry in data.get("section_scores") or []:
+            if isinstance(entry, dict) and entry.get("section") is not None and entry.get("score") is not None:
+                title = str(entry["section"]).strip()
+                section_scores[title] = max(0.0, min(MAX_SCORE, float(entry["score"])))
+                if entry.get("feedback"):
+                    section_feedback[title] = str(entry["feedback"]).strip()
+        issues = []
+        for entry in data.get("issues") or []:
+            if not isinstance(entry, dict) or not entry.get("issue"):
+                continue
+            severity = str(entry.get("severity", "medium")).lower()
+            issues.append((severity if severity in SEVERITY_ORDER else "medium",
+                           str(entry.get("section") or "Cross-Cutting").strip(),
+                           str(entry["issue"]).strip(), str(entry.get("recommendation") or "").strip()))
+        overall = data.get("overall_score")
+        if overall is None:
+            if not section_scores:
+                raise ValueError("Review verdict has neither an overall score nor section scores.")
+            overall = sum(section_scores.values()) / len(section_scores)
+        return cls(overall, section_scores, issues, summary=str(data.get("summary") or "").strip(),
+                   ready=bool(data.get("ready_for_development")), section_feedback=section_feedback)
+
+    def to_feedback(self, max_recommendations: int = 5) -> str:
+        """Renders the verdict as a four-part review (see PRDReviewerAgent._build_prompt)."""
+        lines = ["1.  **Overall Assessment:**",
+                 f"    Score: {self.overall_score:.1f}/10. {self.summary}".rstrip()]
+        lines.append("2.  **Section-Specific Feedback:**")
+        for title, score in self.section_scores.items():
+            lines.append(f"    * **{title} ({score:.1f}/10):** {self.section_feedback.get(title, '')}".rstrip())
+            lines += [f"        - [{s.capitalize()}] {issue}" for s, section, issue, _ in self.issues
+                      if section == title]
+        lines.append("3.  **Cross-Cutting Issues:**")
+        cross_cutting = [issue for issue in self.issues if issue[1] not in self.section_scores]
+        lines += [f"    * [{s.capitalize()}] {section}: {issue}" for s, section, issue, _ in cross_cutting]
+        if not cross_cutting:
+            lines.append("    None found.")
+        lines.append("4.  **Prioritized Recommendations:**")
+        ranked = [issue for issue in self.issues if issue[0] in ("high", "medium")][:max_recommendations]
+        for rank, (severity, section, issue, recommendation) in enumerate(ranked, start=1):
+            fix = f" Recommendation: {recommendation}" if recommendation else ""
+            lines.append(f"    {rank}. [{severity.capitalize()}] {section}: {issue}{fix}")
+        if not ranked:
+            lines.append("    No critical changes required.")
+        return "\n".join(lines)
+
+
+# Separates the readable review from the JSON verdict in a streamed structured review
+VERDICT_MARKER = "=== VERDICT JSON ==="
+
+VERDICT_INSTRUCTIONS = f"""
+You are an expert and highly critical Product Requirements Document (PRD) reviewer. Your task is to meticulously evaluate the completeness, clarity, consistency, feasibility and testability of the PRD in the user message, and return your verdict as JSON.
+{VERDICT_RESPONSE_FORMAT}"""
+
+
+def format_sections_to_score(prd_document: str, section_titles: list = None) -> str:
+    """Lists the sections the verdict must score (by default, the PRD's numbered sections)."""
+    if section_titles is None:
+        section_titles = [section.title for section in parse_prd_sections(prd_document)[1]]
+    return "\n".join(f"    * {title}" for title in section_titles) or "    * (each top-level section of the PRD)"
+
+
+def split_streamed_review(response: str) -> tuple:
+    """
+    Splits a streamed structured review (free-text review, VERDICT_MARKER line, JSON verdict)
+    into (review text, verdict). The verdict is None if the marker is missing or the JSON invalid.
+    """
+    review, marker, verdict_text = response.partition(VERDICT_MARKER)
+    if not marker:
+        return response.strip(), None
+    try:
+        return review.strip(), parse_review_verdict(verdict_text)
+    except ValueError:
+        return review.strip(), None
+
+
+def parse_review_verdict(response: str) -> ReviewVerdict:
+    """
+    Parses the reviewer's JSON verdict. Tolerates code fences and text around the object.
+
+    Raises:
+        ValueError: If no valid verdict object can be found.
+    """
+    text = response.strip()
+    if not text.startswith("{"):
+        match = re.search(r"\{.*\}", text, re.DOTALL)
+        if not match:
+            raise ValueError("Review response contains no JSON object.")
+        text = match.group(0)
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Review response is not valid JSON: {e}")
+    if not isinstance(data, dict):
+        raise ValueError("Review response is not a JSON object.")
+    return ReviewVerdict.from_dict(data)
+
+
+def verdict_from_aspect_reviews(reviews: list) -> ReviewVerdict:
+    """
+    Derives a verdict from parallel aspect reviews (see Review_Aspects): each section
+    starts at 10 and loses points per issue by severity; cross-cutting issues count
+    against the overall score.
+    """
+    section_scores, section_feedback, issues = {}, {}, []
+    cross_cutting_penalty = 0.0
+    for review in reviews:
+        penalty = sum(SEVERITY_PENALTY.get(severity, 1.5) for severity, _ in review.issues)
+        where = review.section_title or review.aspect
+        if review.section_title:
+            section_scores[where] = max(0.0, MAX_SCORE - penalty)
+            section_feedback[where] = review.assessment
+        else:
+            cross_cutting_penalty += penalty
+        fix = review.recommendations[0] if review.recommendations else ""
+        issues += [(severity, where, text, fix) for severity, text in review.issues]
+    base = sum(section_scores.values()) / len(section_scores) if section_scores else MAX_SCORE
+    overall = max(0.0, base - cross_cutting_penalty / max(1, len(reviews)))
+    return ReviewVerdict(overall, section_scores, issues, section_feedback=section_feedback,
+                         ready=not any(severity == "high" for severity, *_ in issues))
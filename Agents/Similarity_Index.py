@@ -0,0 +1,194 @@
+# Agents/Similarity_Index.py
+
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from array import array
+
+from Agents.Checkpoint_Store import hash_workflow_inputs
+from Agents.LLM_Cache import DEFAULT_CACHE_DIR
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+# MinHash permutations are h(x) = (a * x + b) mod MERSENNE_PRIME, truncated to 32 bits
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+# Words per shingle; near-duplicates share most of their word 3-grams
+SHINGLE_SIZE = 3
+
+
+def normalize_text(text: str) -> str:
+    """Lower-cases a requirement text and drops markdown, punctuation and whitespace differences."""
+    text = re.sub(r"[*_`#>|]+", " ", (text or "").lower())
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def input_shingles(inputs: tuple) -> set:
+    """
+    The word 3-grams of each normalized input field, tagged with the field's position so
+    the same words in different fields (e.g. front end vs. backend) do not match.
+    """
+    shingles = set()
+    for field, text in enumerate(inputs):
+        words = normalize_text(text).split()
+        if len(words) < SHINGLE_SIZE:
+            if words:
+                shingles.add(f"{field}:{' '.join(words)}")
+            continue
+        for start in range(len(words) - SHINGLE_SIZE + 1):
+            shingles.add(f"{field}:{' '.join(words[start:start + SHINGLE_SIZE])}")
+    return shingles
+
+
+class SimilarMatch:
+    """A previously indexed requirement set that is near-identical to a query."""
+
+    def __init__(self, similarity: float, inputs: tuple, prd: str, prd_path: str, score: float = None):
+        self.similarity = similarity  # estimated Jaccard similarity of the shingle sets, 0.0-1.0
+        self.inputs = inputs
+        self.prd = prd
+        self.prd_path = prd_path
+        self.score = score
+
+    def __repr__(self):
+        return f"SimilarMatch(similarity={self.similarity:.3f}, prd_path={self.prd_path!r})"
+
+
+class SimilarityIndex:
+    """
+    A local near-duplicate index of requirement sets and their final PRDs, persisted in
+    SQLite. Each set is summarized by a MinHash signature of its word shingles; locality-
+    sensitive hashing (bands of signature rows) finds candidate matches without comparing
+    against every entry, and candidates are ranked by estimated Jaccard similarity.
+    """
+
+    def __init__(self, db_path: str, num_perm: int = 128, bands: int = 32, seed: int = 1):
+        """
+        Args:
+            db_path (str): Path of the SQLite file. Created if it does not exist.
+            num_perm (int): MinHash signature length; more permutations give finer estimates.
+            bands (int): LSH bands; num_perm must be divisible by it. With 32 bands of 4 rows,
+                         sets with a similarity above ~0.5 are almost always found as candidates.
+            seed (int): Seed of the permutations. Signatures from different seeds are not comparable.
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands.")
+        self.db_path = db_path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self._permutations = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+                              for _ in range(num_perm)]
+        self._lock = threading.RLock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " entry_id INTEGER PRIMARY KEY, inputs_hash TEXT UNIQUE NOT NULL, inputs TEXT NOT NULL,"
+            " signature BLOB NOT NULL, prd TEXT NOT NULL, prd_path TEXT, score REAL, created_at REAL NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS lsh_buckets ("
+            " band INTEGER NOT NULL, bucket TEXT NOT NULL, entry_id INTEGER NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_lsh_buckets ON lsh_buckets(band, bucket)")
+        self._conn.commit()
+
+    def signature(self, inputs: tuple) -> array:
+        """The MinHash signature of a requirement set (all MAX_HASH for empty inputs)."""
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+                  for s in input_shingles(inputs)]
+        if not hashes:
+            return array("I", [MAX_HASH] * self.num_perm)
+        return array("I", (min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes)
+                           for a, b in self._permutations))
+
+    def _buckets(self, signature: array) -> list:
+        return [hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8).hexdigest()
+                for band in range(self.bands)]
+
+    @staticmethod
+    def _similarity(first: array, second: array) -> float:
+        return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+    def add(self, inputs: tuple, prd: str, prd_path: str = None, score: float = None):
+        """Indexes a requirement set with its final PRD, replacing an earlier entry for identical inputs."""
+        if not prd or not input_shingles(inputs):
+            return
+        signature = self.signature(inputs)
+        inputs_hash = hash_workflow_inputs(inputs)
+        with self._lock:
+            row = self._conn.execute("SELECT entry_id FROM entries WHERE inputs_hash = ?", (inputs_hash,)).fetchone()
+            if row is not None:
+                self._conn.execute("DELETE FROM lsh_buckets WHERE entry_id = ?", (row[0],))
+                self._conn.execute("DELETE FROM entries WHERE entry_id = ?", (row[0],))
+            entry_id = self._conn.execute(
+                "INSERT INTO entries (inputs_hash, inputs, signature, prd, prd_path, score, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (inputs_hash, json.dumps(list(inputs), ensure_ascii=False), signature.tobytes(), prd, prd_path,
+                 score, time.time())).lastrowid
+            self._conn.executemany(
+                "INSERT INTO lsh_buckets (band, bucket, entry_id) VALUES (?, ?, ?)",
+                [(band, bucket, entry_id) for band, bucket in enumerate(self._buckets(signature))])
+            self._conn.commit()
+
+    def find_similar(self, inputs: tuple, threshold: float = 0.8):
+        """
+        Returns:
+            SimilarMatch | None: The most similar indexed requirement set whose estimated
+                                 similarity is at least threshold, or None.
+        """
+        if not input_shingles(inputs):
+            return None
+        signature = self.signature(inputs)
+        with self._lock:
+            candidates = set()
+            for band, bucket in enumerate(self._buckets(signature)):
+                candidates.update(row[0] for row in self._conn.execute(
+                    "SELECT entry_id FROM lsh_buckets WHERE band = ? AND bucket = ?", (band, bucket)))
+            best, best_similarity = None, threshold
+            for entry_id in candidates:
+                row = self._conn.execute("SELECT signature FROM entries WHERE entry_id = ?", (entry_id,)).fetchone()
+                if row is None:
+                    continue
+                candidate = array("I")
+                candidate.frombytes(row[0])
+                similarity = self._similarity(signature, candidate)
+                if similarity >= best_similarity:
+                    best, best_similarity = entry_id, similarity
+            if best is None:
+                return None
+            inputs_json, prd, prd_path, score = self._conn.execute(
+                "SELECT inputs, prd, prd_path, score FROM entries WHERE entry_id = ?", (best,)).fetchone()
+        return SimilarMatch(best_similarity, tuple(json.loads(inputs_json)), prd, prd_path, score)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+def get_default_similarity_index():
+    """
+    Returns the process-wide similarity index, creating it on first use. Configured through:
+        PRECISIONAI_SIMILARITY      - set to "0" to disable the near-duplicate index.
+        PRECISIONAI_SIMILARITY_DIR  - directory for the SQLite file (default: '.cache').
+
+    Returns:
+        SimilarityIndex | None: The shared index, or None if it is disabled.
+    """
+    global _default_index
+    if os.environ.get("PRECISIONAI_SIMILARITY", "1") == "0":
+        return None
+    with _default_index_lock:
+        if _default_index is None:
+            directory = os.environ.get("PRECISIONAI_SIMILARITY_DIR", DEFAULT_CACHE_DIR)
+            _default_index = SimilarityIndex(os.path.join(directory, "similarity.sqlite3"))
+        return _default_index
@@ -0,0 +1,28 @@
+# Agents/Test_Plan_Agent.py
+
+from Agents.Artifact_Agent import PRDArtifactAgent
+
+TEST_PLAN_INSTRUCTIONS = """
+You are an experienced QA Lead. The user message provides a Product Requirements Document (PRD). Write the test plan that verifies the product meets it.
+
+**Test Plan Requirements:**
+
+1.  **Scope & Approach:** What is tested at the unit, integration, end-to-end, performance and security level, and what is out of scope.
+2.  **Test Cases:** For each functional requirement (Front End, Middleware, Backend), test cases with an ID, the requirement they verify, preconditions, steps and expected results, including negative and edge cases.
+3.  **Non-Functional Tests:** How each non-functional requirement (performance, security, scalability, reliability, usability) is measured, with pass criteria.
+4.  **Environments & Data:** Test environments, test data and tooling needed.
+5.  **Entry & Exit Criteria:** When testing starts, and when the product is ready for release.
+
+Format the test plan as markdown with headings and tables. Every test case must trace back to a PRD requirement.
+"""
+
+
+class TestPlanAgent(PRDArtifactAgent):
+    """Derives a test plan from a finished PRD."""
+
+    __test__ = False  # not a pytest test class, despite its name
+
+    DOCUMENT_TYPE = "TestPlan"
+    DOCUMENT_TITLE = "Test Plan"
+    TASK = "test_plan"
+    INSTRUCTIONS = TEST_PLAN_INSTRUCTIONS
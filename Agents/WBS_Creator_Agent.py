@@ -0,0 +1,25 @@
+# Agents/WBS_Creator_Agent.py
+
+from Agents.Artifact_Agent import PRDArtifactAgent
+
+WBS_INSTRUCTIONS = """
+You are an experienced Technical Project Manager. The user message provides a Product Requirements Document (PRD). Break the work needed to deliver it down into a Work Breakdown Structure (WBS).
+
+**WBS Structure Requirements:**
+
+1.  **Deliverables:** Organize the work into numbered phases and deliverables (1, 1.1, 1.1.1, ...), covering Front End, Middleware, Backend, infrastructure, testing and release.
+2.  **Work Packages:** For each lowest-level item, give a short description, the PRD requirement(s) it implements, an effort estimate in person-days and the required skills.
+3.  **Dependencies:** List the work packages each item depends on, by number.
+4.  **Milestones:** Name the milestones and the work packages that complete them.
+
+Format the WBS as markdown with headings and tables. Do not invent scope that the PRD does not support; list open points instead.
+"""
+
+
+class WBSCreatorAgent(PRDArtifactAgent):
+    """Derives a Work Breakdown Structure from a finished PRD."""
+
+    DOCUMENT_TYPE = "WBS"
+    DOCUMENT_TITLE = "Work Breakdown Structure"
+    TASK = "wbs"
+    INSTRUCTIONS = WBS_INSTRUCTIONS
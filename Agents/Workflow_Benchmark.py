@@ -0,0 +1,286 @@
+# Agents/Workflow_Benchmark.py
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# Add the project root to the Python path so 'python Agents/Workflow_Benchmark.py' works too
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Agents.Fake_LLM import FakeLLMBackend, FakeLLMConfig, fake_agent_kwargs
+from Agents.Instrumentation import submit_in_context
+from Agents.Model_Router import DEFAULT_SMALL_MODEL, ModelRouter
+from Agents.Orchestrator_Agent import Orchestrator
+
+SAMPLE_INPUTS = (
+    "React.js based single-page application with user authentication, dashboard, and data visualization.",
+    "Node.js with Express.js for REST API, handling request routing and business logic.",
+    "PostgreSQL database for user data and application settings; MongoDB for logging.",
+    "Target audience: small businesses. Focus on ease of use and scalability.",
+)
+
+# Metrics compared against a baseline, and whether higher values are better
+REGRESSION_METRICS = {"workflows_per_sec": True, "p50_s": False, "p99_s": False}
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Nearest-rank percentile of a list of numbers (0.0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _routed_agent_kwargs(config: FakeLLMConfig, cascade: bool) -> dict:
+    # Worker processes build their fake backend and router here (see Orchestrator's agent_kwargs_factory)
+    agent_kwargs = fake_agent_kwargs(config)
+    if cascade:
+        agent_kwargs["router"] = ModelRouter(cascade=True)
+    return agent_kwargs
+
+
+def _workflow_inputs(index: int) -> tuple:
+    # Vary the inputs per workflow so no two workflows send identical prompts
+    front_end, middleware, backend, other = SAMPLE_INPUTS
+    return front_end, middleware, backend, f"{other} (benchmark workflow {index})"
+
+
+async def _run_async(orchestrator: Orchestrator, workflows: int, concurrency: int) -> tuple:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(index):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await orchestrator.run_prd_workflow_async(*_workflow_inputs(index))
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                errors += 1
+
+    await asyncio.gather(*(one(index) for index in range(workflows)))
+    return latencies, errors
+
+
+def _run_threads(orchestrator: Orchestrator, workflows: int, concurrency: int) -> tuple:
+    def one(index):
+        started = time.perf_counter()
+        orchestrator.run_prd_workflow(*_workflow_inputs(index))
+        return time.perf_counter() - started
+
+    latencies, errors = [], 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [submit_in_context(executor, one, index) for index in range(workflows)]:
+            try:
+                latencies.append(future.result())
+            except Exception:
+                errors += 1
+    return latencies, errors
+
+
+def _run_processes(orchestrator: Orchestrator, workflows: int) -> tuple:
+    # Latency is measured inside the pool: submission to result, queueing included
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for result in orchestrator.run_prd_workflows((_workflow_inputs(i) for i in range(workflows)),
+                                                 include_content=False):
+        if result["status"] == "ok":
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+    return latencies, errors
+
+
+def run_benchmark_case(config: FakeLLMConfig, concurrency: int, iterations: int, workflows: int,
+                       mode: str = "async", review_mode: str = "single", early_stop: bool = False,
+                       cascade: bool = False, verbose: bool = False) -> dict:
+    """
+    Runs a number of complete PRD workflows against the fake LLM backend and measures
+    throughput, latency percentiles and peak Python memory.
+
+    Args:
+        config (FakeLLMConfig): Behaviour of the fake backend.
+        concurrency (int): Workflows in flight at once.
+        iterations (int): max_review_iterations of the orchestrator.
+        workflows (int): Number of workflows to run.
+        mode (str): 'async' (run_prd_workflow_async on one event loop), 'threads'
+                    (run_prd_workflow in a thread pool) or 'processes' (run_prd_workflows on the
+                    process execution backend, one worker process per concurrency slot).
+        review_mode (str): The orchestrator's review mode ('single', 'parallel' or 'pipelined';
+                           pipelining only applies to the 'threads' and 'processes' modes).
+        early_stop (bool): Let workflows stop when review scores converge; off by default so
+                           every workflow runs exactly the requested number of iterations.
+        cascade (bool): Route calls through a cascading ModelRouter: drafts use the small model and
+                        the final (or a low-scoring) iteration the large one. Give the small model a
+                        speed factor in config.model_speed to simulate a faster model.
+        verbose (bool): Keep the agents' console output instead of discarding it.
+
+    Returns:
+        dict: The case parameters and its measurements.
+    """
+    backend = FakeLLMBackend(config)
+    agent_kwargs = backend.agent_kwargs()
+    if cascade:
+        agent_kwargs["router"] = ModelRouter(cascade=True)
+    with tempfile.TemporaryDirectory(prefix="prd_benchmark_") as output_folder:
+        orchestrator = Orchestrator(max_review_iterations=iterations, review_mode=review_mode,
+                                    agent_kwargs=agent_kwargs, output_folder=output_folder,
+                                    use_checkpoints=False, near_duplicates="off", use_archive=False,
+                                    min_score_improvement=0.5 if early_stop else None,
+                                    execution_backend="process" if mode == "processes" else "thread",
+                                    max_workers=concurrency,
+                                    agent_kwargs_factory=partial(_routed_agent_kwargs, config, cascade))
+        with open(os.devnull, "w") as devnull, \
+                (contextlib.nullcontext() if verbose else contextlib.redirect_stdout(devnull)):
+            orchestrator.warm_up()  # construct agents (and worker processes) outside the measured window
+            tracemalloc.start()
+            started = time.perf_counter()
+            try:
+                with orchestrator.instrumentation.usage_tally() as usage:
+                    if mode == "async":
+                        latencies, errors = asyncio.run(_run_async(orchestrator, workflows, concurrency))
+                    elif mode == "processes":
+                        latencies, errors = _run_processes(orchestrator, workflows)
+                    else:
+                        latencies, errors = _run_threads(orchestrator, workflows, concurrency)
+                elapsed = time.perf_counter() - started
+                _, peak_bytes = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+                orchestrator.shutdown()
+
+    return {
+        "mode": mode,
+        "review_mode": review_mode,
+        "routing": "cascade" if cascade else "off",
+        "concurrency": concurrency,
+        "iterations": iterations,
+        "workflows": workflows,
+        "errors": errors,
+        "llm_calls": backend.calls if mode != "processes" else None,  # counted in the workers
+        "cost_usd": round(usage.cost_usd, 4) if mode != "processes" else None,
+        "elapsed_s": round(elapsed, 4),
+        "workflows_per_sec": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        "p50_s": round(percentile(latencies, 0.50), 4),
+        "p99_s": round(percentile(latencies, 0.99), 4),
+        "peak_memory_mb": round(peak_bytes / (1024 * 1024), 2),
+    }
+
+
+def _case_key(result: dict) -> tuple:
+    return (result["mode"], result["review_mode"], result.get("routing", "off"), result["concurrency"],
+            result["iterations"])
+
+
+def compare_to_baseline(results: list, baseline: list, tolerance: float) -> list:
+    """
+    Compares results with a previous run of the same cases.
+
+    Returns:
+        list[str]: One message per metric that regressed by more than the tolerance
+                   (a fraction, e.g. 0.2 for 20%). Empty if nothing regressed.
+    """
+    previous = {_case_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(_case_key(result))
+        if not before:
+            continue
+        for metric, higher_is_better in REGRESSION_METRICS.items():
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                regressions.append(f"{metric} for concurrency={result['concurrency']}, "
+                                   f"iterations={result['iterations']}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def print_results(results: list):
+    """Prints the results as a table."""
+    header = (f"{'mode':<10}{'conc':>6}{'iters':>7}{'wf/s':>10}{'p50 s':>10}{'p99 s':>10}{'peak MB':>10}"
+              f"{'calls':>8}{'cost $':>10}{'errors':>8}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        calls = "-" if r["llm_calls"] is None else r["llm_calls"]
+        cost = "-" if r.get("cost_usd") is None else f"{r['cost_usd']:.4f}"
+        print(f"{r['mode']:<10}{r['concurrency']:>6}{r['iterations']:>7}{r['workflows_per_sec']:>10.2f}"
+              f"{r['p50_s']:>10.3f}{r['p99_s']:>10.3f}{r['peak_memory_mb']:>10.2f}{calls:>8}{cost:>10}{r['errors']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the PRD workflow offline against a deterministic fake LLM backend.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16],
+                        help="Concurrency levels to measure (default: 1 4 16).")
+    parser.add_argument("--iterations", type=int, nargs="+", default=[1, 3],
+                        help="Review iteration counts to measure (default: 1 3).")
+    parser.add_argument("--workflows", type=int, default=32, help="Workflows per case (default: 32).")
+    parser.add_argument("--mode", choices=["async", "threads", "processes"], default="async",
+                        help="How workflows run concurrently; 'processes' uses one worker process per concurrency slot.")
+    parser.add_argument("--review-mode", choices=["single", "parallel", "pipelined"], default="single")
+    parser.add_argument("--latency", type=float, default=0.5, help="Median time to first token in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Log-normal sigma of the latency.")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--time-scale", type=float, default=0.01,
+                        help="Multiplier for all simulated delays (default: 0.01, i.e. 100x real time).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of LLM calls that fail.")
+    parser.add_argument("--satisfaction-rate", type=float, default=0.0,
+                        help="Probability a review is satisfactory (default: 0, so every iteration runs).")
+    parser.add_argument("--early-stop", action="store_true",
+                        help="Stop workflows when review scores converge instead of running every iteration.")
+    parser.add_argument("--cascade", action="store_true",
+                        help="Draft with a small model and escalate to the large one (see Agents/Model_Router.py).")
+    parser.add_argument("--small-model-speed", type=float, default=2.5,
+                        help="How much faster the simulated small model is (default: 2.5).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative regression against the baseline (default: 0.2).")
+    parser.add_argument("--verbose", action="store_true", help="Show the agents' console output.")
+    args = parser.parse_args()
+
+    results = []
+    for iterations in args.iterations:
+        for concurrency in args.concurrency:
+            config = FakeLLMConfig(seed=args.seed, latency_s=args.latency, latency_jitter=args.jitter,
+                                   tokens_per_second=args.tokens_per_second, time_scale=args.time_scale,
+                                   error_rate=args.error_rate, satisfaction_rate=args.satisfaction_rate,
+                                   model_speed={DEFAULT_SMALL_MODEL: args.small_model_speed})
+            results.append(run_benchmark_case(config, concurrency, iterations, args.workflows,
+                                              mode=args.mode, review_mode=args.review_mode,
+                                              early_stop=args.early_stop, cascade=args.cascade,
+                                              verbose=args.verbose))
+    print_results(results)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nPerformance regressions against the baseline:")
+            for message in regressions:
+                print(f"  - {message}")
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+# Agents/Workflow_DAG.py
+
+import asyncio
+import hashlib
+import inspect
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from Agents.Instrumentation import submit_in_context
+from Agents.LLM_Cache import LLMCache
+
+
+class DAGNode:
+    """
+    One step of a WorkflowDAG: fn is called with the named input artifacts as keyword
+    arguments and produces the named output artifacts. With a single output, fn returns
+    its value; with several, a dict of them. fn may be a coroutine function.
+    """
+
+    def __init__(self, name: str, fn, inputs=(), outputs=None, version: str = "1", memoize: bool = True):
+        """
+        Args:
+            name (str): Unique node name.
+            fn (callable): fn(**inputs) -> output value, or dict of outputs.
+            inputs (Iterable[str]): Artifacts the node needs: outputs of other nodes or workflow inputs.
+            outputs (Iterable[str], optional): Artifacts it produces. Defaults to one named after the node.
+            version (str): Part of the memo key; change it when fn changes so stale results are not reused.
+            memoize (bool): Reuse the node's earlier outputs for identical inputs. Outputs must be JSON-serializable.
+        """
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs) if outputs else (name,)
+        self.version = version
+        self.memoize = memoize
+
+    def memo_key(self, values: dict):
+        """Key of the node's outputs for these input values, or None if they are not JSON-serializable."""
+        try:
+            payload = json.dumps({"node": self.name, "version": self.version, "inputs": values},
+                                 sort_keys=True, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return None
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _outputs(self, result) -> dict:
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        missing = set(self.outputs) - set(result or {})
+        if missing:
+            raise ValueError(f"Node '{self.name}' did not produce {sorted(missing)}.")
+        return {output: result[output] for output in self.outputs}
+
+    def __repr__(self):
+        return f"DAGNode({self.name!r}, inputs={self.inputs!r}, outputs={self.outputs!r})"
+
+
+class DAGRun:
+    """
+    The outcome of WorkflowDAG.run: every artifact, and per node its wall time, whether
+    it was memoized, and when it finished relative to the start of the run.
+    """
+
+    def __init__(self, artifacts: dict, durations: dict, finished_at: dict, memoized: set, wall_time_s: float,
+                 nodes: dict):
+        self.artifacts = artifacts
+        self.durations = durations
+        self.finished_at = finished_at
+        self.memoized = memoized
+        self.wall_time_s = wall_time_s
+        self._nodes = nodes
+
+    @property
+    def sequential_time_s(self) -> float:
+        """Time the same nodes would have taken one after another."""
+        return sum(self.durations.values())
+
+    def critical_path(self) -> list:
+        """
+        Returns:
+            list[str]: The chain of nodes that determined the run's wall time, first to last:
+                       starting from the last node to finish, each step goes to the input
+                       producer that finished latest.
+        """
+        producers = {output: node for node in self._nodes.values() for output in node.outputs}
+        path = []
+        current = max(self.finished_at, key=self.finished_at.get, default=None)
+        while current is not None:
+            path.append(current)
+            upstream = [producers[name].name for name in self._nodes[current].inputs if name in producers]
+            current = max(upstream, key=lambda name: self.finished_at.get(name, 0.0), default=None)
+        return path[::-1]
+
+    def to_dict(self) -> dict:
+        return {"wall_time_s": self.wall_time_s, "sequential_time_s": self.sequential_time_s,
+                "durations": dict(self.durations), "memoized": sorted(self.memoized),
+                "critical_path": self.critical_path()}
+
+
+class WorkflowDAG:
+    """
+    A small dataflow executor for multi-agent workflows. Nodes declare the artifacts they
+    read and write; a node starts as soon as all its inputs exist, so independent nodes
+    (e.g. a WBS, a risk analysis and a test plan derived from the same PRD) run
+    concurrently and the run takes critical-path time instead of the sum of all steps.
+
+    Node outputs are memoized on the node's name, version and input values: when a
+    workflow is run again, nodes whose upstream artifacts did not change are skipped.
+    """
+
+    def __init__(self, memo: LLMCache = None, max_workers: int = 8):
+        """
+        Args:
+            memo (LLMCache, optional): Where node outputs are memoized. Defaults to an in-memory cache of
+                                       this DAG; pass one with a disk tier to reuse results across processes.
+            max_workers (int): Nodes running at once (threads for synchronous nodes).
+        """
+        self.nodes = {}
+        self.memo = memo if memo is not None else LLMCache(max_memory_entries=256, ttl_seconds=None)
+        self.max_workers = max_workers
+
+    def add_node(self, name: str, fn, inputs=(), outputs=None, version: str = "1", memoize: bool = True) -> DAGNode:
+        """Adds a node (see DAGNode); returns it."""
+        if name in self.nodes:
+            raise ValueError(f"Node '{name}' already exists.")
+        node = DAGNode(name, fn, inputs, outputs, version, memoize)
+        produced = {output for other in self.nodes.values() for output in other.outputs}
+        clashing = produced & set(node.outputs)
+        if clashing:
+            raise ValueError(f"Artifacts {sorted(clashing)} of node '{name}' are already produced by another node.")
+        self.nodes[name] = node
+        return node
+
+    def plan(self, available, targets=None) -> list:
+        """
+        Returns the nodes needed to produce the targets from the available inputs, in a
+        valid execution order.
+
+        Args:
+            available (Iterable[str]): Names of the workflow inputs.
+            targets (Iterable[str], optional): Artifacts or node names wanted. Defaults to every node.
+
+        Raises:
+            ValueError: For an unknown target, a missing input or a cycle.
+        """
+        available = set(available)
+        producers = {output: node for node in self.nodes.values() for output in node.outputs}
+        wanted = list(self.nodes) if targets is None else list(targets)
+        order, state = [], {}  # state: node name -> "visiting" or "done"
+
+        def visit(node, chain):
+            if state.get(node.name) == "done":
+                return
+            if state.get(node.name) == "visiting":
+                raise ValueError(f"Cycle in workflow: {' -> '.join(chain + [node.name])}")
+            state[node.name] = "visiting"
+            for name in node.inputs:
+                if name in producers:
+                    visit(producers[name], chain + [node.name])
+                elif name not in available:
+                    raise ValueError(f"Input '{name}' of node '{node.name}' is neither a workflow input nor produced by a node.")
+            state[node.name] = "done"
+            order.append(node)
+
+        for target in wanted:
+            node = self.nodes.get(target) or producers.get(target)
+            if node is None:
+                raise ValueError(f"Unknown target '{target}'.")
+            visit(node, [])
+        return order
+
+    def _lookup(self, node: DAGNode, artifacts: dict):
+        """Returns (memo_key, memoized outputs or None)."""
+        if not node.memoize:
+            return None, None
+        key = node.memo_key({name: artifacts[name] for name in node.inputs})
+        cached = self.memo.get(key) if key is not None else None
+        return key, json.loads(cached) if cached is not None else None
+
+    def _store(self, key, outputs: dict):
+        if key is None:
+            return
+        try:
+            self.memo.set(key, json.dumps(outputs, ensure_ascii=False))
+        except (TypeError, ValueError):
+            pass  # outputs that cannot be serialized are simply not memoized
+
+    def run(self, inputs: dict, targets=None) -> DAGRun:
+        """
+        Runs the nodes needed for the targets, each on a worker thread as soon as its inputs
+        are ready. Coroutine nodes run on their own event loop in that thread.
+
+        Args:
+            inputs (dict): Workflow inputs by name.
+            targets (Iterable[str], optional): Artifacts or node names wanted. Defaults to every node.
+
+        Returns:
+            DAGRun: All artifacts and per-node timings.
+
+        Raises:
+            Exception: The first node error, naming the node; nodes not started yet are skipped.
+        """
+        order = self.plan(inputs, targets)
+        artifacts = dict(inputs)
+        started = time.perf_counter()
+        durations, finished_at, memoized = {}, {}, set()
+        remaining = list(order)
+        lock = threading.Lock()
+
+        def execute(node, values):
+            node_started = time.perf_counter()
+            key, outputs = self._lookup(node, values)
+            if outputs is not None:
+                with lock:
+                    memoized.add(node.name)
+            else:
+                result = node.fn(**values)
+                if inspect.isawaitable(result):
+                    result = asyncio.run(result)
+                outputs = node._outputs(result)
+                self._store(key, outputs)
+            return outputs, time.perf_counter() - node_started
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="workflow-dag") as executor:
+            running = {}
+            while remaining or running:
+                for node in [n for n in remaining if all(name in artifacts for name in n.inputs)]:
+                    remaining.remove(node)
+                    values = {name: artifacts[name] for name in node.inputs}
+                    running[submit_in_context(executor, execute, node, values)] = node
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    try:
+                        outputs, duration = future.result()
+                    except Exception as e:
+                        for other in running:
+                            other.cancel()
+                        raise Exception(f"Error in workflow node '{node.name}': {e}")
+                    artifacts.update(outputs)
+                    durations[node.name] = duration
+                    finished_at[node.name] = time.perf_counter() - started
+        return DAGRun(artifacts, durations, finished_at, memoized, time.perf_counter() - started, self.nodes)
+
+    async def arun(self, inputs: dict, targets=None) -> DAGRun:
+        """
+        Async version of run: coroutine nodes are awaited on the running event loop and
+        synchronous nodes run in worker threads.
+        """
+        order = self.plan(inputs, targets)
+        artifacts = dict(inputs)
+        started = time.perf_counter()
+        durations, finished_at, memoized = {}, {}, set()
+        semaphore = asyncio.Semaphore(self.max_workers)
+        ready = {node.name: asyncio.Event() for node in order}
+        producers = {output: node.name for node in order for output in node.outputs}
+
+        async def execute(node):
+            for name in node.inputs:
+                if name in producers:
+                    await ready[producers[name]].wait()
+            values = {name: artifacts[name] for name in node.inputs}
+            async with semaphore:
+                node_started = time.perf_counter()
+                key, outputs = self._lookup(node, values)
+                if outputs is not None:
+                    memoized.add(node.name)
+                else:
+                    if inspect.iscoroutinefunction(node.fn):
+                        result = await node.fn(**values)
+                    else:
+                        result = await asyncio.to_thread(node.fn, **values)
+                    outputs = node._outputs(result)
+                    self._store(key, outputs)
+            artifacts.update(outputs)
+            durations[node.name] = time.perf_counter() - node_started
+            finished_at[node.name] = time.perf_counter() - started
+            ready[node.name].set()
+
+        async def guarded(node):
+            try:
+                await execute(node)
+            except Exception as e:
+                raise Exception(f"Error in workflow node '{node.name}': {e}")
+
+        tasks = [asyncio.ensure_future(guarded(node)) for node in order]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return DAGRun(artifacts, durations, finished_at, memoized, time.perf_counter() - started, self.nodes)
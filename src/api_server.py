@@ -0,0 +1,181 @@
+# src/api_server.py
+
+import argparse
+import json
+import os
+import re
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# --- Add the project root to the Python path ---
+project_root = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.pardir))
+sys.path.append(project_root)
+# --- End of path adjustment ---
+
+from Agents.Batch_Runner import INPUT_FIELD_ALIASES
+from Agents.Job_Runner import JobQueueFullError, JobRunner
+from Agents.Orchestrator_Agent import Orchestrator
+
+# Largest accepted request body, in bytes
+MAX_BODY_BYTES = 1024 * 1024
+# Upper bound for the '?wait=' long-poll parameter, in seconds
+MAX_WAIT_S = 60.0
+# Seconds a client is asked to wait before retrying when the queue is full
+RETRY_AFTER_S = 5
+
+JOB_PATH = re.compile(r"^/workflows/(?P<job_id>[0-9a-f]+)(?P<result>/result)?/?$")
+
+
+def job_status(job) -> dict:
+    """The JSON status document of a job."""
+    snapshot = job.snapshot()
+    return {
+        "job_id": job.job_id,
+        "status": snapshot["status"],
+        "progress": round(snapshot["progress"], 3),
+        "iterations": sum(1 for event in snapshot["events"] if event["event"] == "iteration_started"),
+        "elapsed_s": round(snapshot["elapsed_s"], 3),
+        "submissions": job.submissions,
+        "error": str(snapshot["error"]) if snapshot["error"] else None,
+        "status_url": f"/workflows/{job.job_id}",
+        "result_url": f"/workflows/{job.job_id}/result",
+    }
+
+
+class PRDApiHandler(BaseHTTPRequestHandler):
+    """
+    JSON endpoints for PRD workflows, backed by the server's JobRunner:
+
+        POST /workflows                   - submit {front_end, middleware, backend, other}; 202 with the
+                                            job status (200 if an identical job already finished), 429 if
+                                            the queue is full
+        GET  /workflows/<job_id>          - job status and progress
+        GET  /workflows/<job_id>/result   - 200 with the PRD when completed, 202 while pending, 409 if failed
+        GET  /health                      - job counts per status
+
+    GET requests accept '?wait=<seconds>' to block until the job finishes (long polling).
+    """
+
+    server_version = "PrecisionAI/1.0"
+
+    @property
+    def runner(self) -> JobRunner:
+        return self.server.runner
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {"error": "Content-Length must be a non-negative integer."})
+            return None
+        if length > MAX_BODY_BYTES:
+            self._send_json(413, {"error": f"Request body exceeds {MAX_BODY_BYTES} bytes."})
+            return None
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            self._send_json(400, {"error": f"Request body is not valid JSON: {e}"})
+            return None
+        if not isinstance(data, dict):
+            self._send_json(400, {"error": "Request body must be a JSON object."})
+            return None
+        return data
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip("/") != "/workflows":
+            self._send_json(404, {"error": "Not found."})
+            return
+        data = self._read_json()
+        if data is None:
+            return
+        inputs = [next((data[a] for a in aliases if a in data), "") for aliases in INPUT_FIELD_ALIASES.values()]
+        if not all(isinstance(value, str) for value in inputs):
+            self._send_json(400, {"error": "front_end, middleware, backend and other must be strings."})
+            return
+        if not any(value.strip() for value in inputs):
+            self._send_json(400, {"error": "Provide at least one of front_end, middleware, backend, other."})
+            return
+        try:
+            job = self.runner.submit(*inputs)
+        except JobQueueFullError as e:
+            self._send_json(429, {"error": str(e)}, {"Retry-After": str(RETRY_AFTER_S)})
+            return
+        status = job_status(job)
+        self._send_json(200 if job.status == "completed" else 202, status, {"Location": status["status_url"]})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") == "/health":
+            self._send_json(200, {"status": "ok", "jobs": self.runner.stats()})
+            return
+        match = JOB_PATH.match(url.path)
+        job = self.runner.get(match.group("job_id")) if match else None
+        if job is None:
+            self._send_json(404, {"error": "Unknown job."})
+            return
+        try:
+            wait = float(parse_qs(url.query).get("wait", ["0"])[0])
+        except ValueError:
+            self._send_json(400, {"error": "'wait' must be a number of seconds."})
+            return
+        if wait > 0:
+            job.wait(min(wait, MAX_WAIT_S))
+
+        status = job_status(job)
+        if not match.group("result"):
+            self._send_json(200, status)
+        elif job.status == "completed":
+            self._send_json(200, dict(status, content=job.content, path=job.path))
+        elif job.status == "failed":
+            self._send_json(409, status)
+        else:
+            self._send_json(202, status)
+
+
+def create_server(runner: JobRunner, host: str = "127.0.0.1", port: int = 8000) -> ThreadingHTTPServer:
+    """Creates (but does not start) the HTTP server; each request is handled on its own thread."""
+    server = ThreadingHTTPServer((host, port), PRDApiHandler)
+    server.daemon_threads = True
+    server.runner = runner
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve PRD workflows over a local HTTP/JSON API.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000).")
+    parser.add_argument("--workers", type=int, default=4, help="Workflows running at once (default: 4).")
+    parser.add_argument("--max-pending", type=int, default=32,
+                        help="Queued plus running jobs before submissions get 429 (default: 32).")
+    parser.add_argument("--max-iterations", type=int, default=3, help="Maximum review iterations per PRD.")
+    args = parser.parse_args(argv)
+
+    runner = JobRunner(Orchestrator(max_review_iterations=args.max_iterations),
+                       max_workers=args.workers, max_pending=args.max_pending)
+    server = create_server(runner, args.host, args.port)
+    print(f"PrecisionAI API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down; waiting for running workflows to finish...")
+    finally:
+        server.server_close()
+        runner.shutdown()
+
+
+if __name__ == '__main__':
+    main()
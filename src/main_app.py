@@ -3,6 +3,7 @@
 import streamlit as st
 import os
 import sys
+import time
 
 # --- Add the project root to the Python path ---
 project_root = os.path.abspath(os.path.join(
@@ -11,6 +12,8 @@ sys.path.append(project_root)
 # --- End of path adjustment ---
 
 from Agents.Orchestrator_Agent import Orchestrator
+from Agents.Job_Runner import JobRunner
+from Agents.Instrumentation import InMemoryAggregateSink, get_instrumentation
 from openai import OpenAIError
 
 # --- Configuration ---
@@ -18,6 +21,162 @@ from openai import OpenAIError
 # Define the maximum rounds of iteration for PRD generation/review
 MAX_ITERATIONS = 3
 
+@st.cache_resource
+def get_orchestrator(max_review_iterations: int) -> Orchestrator:
+    """
+    Returns an Orchestrator shared across reruns and sessions of this Streamlit process.
+    Its agents (and their pooled OpenAI client) are built once, on the first workflow,
+    instead of on every button press.
+    """
+    return Orchestrator(max_review_iterations=max_review_iterations)
+
+
+@st.cache_resource
+def get_job_runner(max_review_iterations: int) -> JobRunner:
+    """
+    Returns the background job runner shared across reruns and sessions. Workflows run
+    on its thread pool, so a rerun (widget change, refresh) never interrupts or discards
+    them, and identical inputs are answered from its memoized results.
+    """
+    return JobRunner(get_orchestrator(max_review_iterations))
+
+
+# Seconds between progress polls of a running job
+POLL_INTERVAL_S = 1.0
+
+
+def render_job_progress(snapshot: dict):
+    """
+    Renders a job snapshot (see Job.snapshot): one expander per iteration with its PRD
+    and review, the running iteration showing the text generated so far.
+    """
+    iterations = {}
+    for event in snapshot["events"]:
+        kind = event["event"]
+        if kind == "workflow_resumed":
+            st.info(f"Resumed an unfinished run from its checkpoint after iteration {event['iteration']}.")
+            with st.expander(f"Iteration {event['iteration']} (checkpointed)", expanded=False):
+                st.markdown(event["content"] or "")
+                if event["feedback"]:
+                    st.markdown("**Review Feedback:**")
+                    st.markdown(event["feedback"])
+        elif kind == "near_duplicate_found":
+            if event["reused"]:
+                st.info(f"These requirements are near-identical (similarity {event['similarity']:.0%}) to an "
+                        f"earlier submission; reusing its PRD (`{event['path']}`).")
+            else:
+                st.info(f"Starting from the PRD of a similar earlier submission "
+                        f"(similarity {event['similarity']:.0%}) as the first draft.")
+        elif kind == "duplicate_in_progress" and snapshot["status"] == "running":
+            st.info("The same requirements are already being processed in another session; waiting for its PRD.")
+        elif kind == "workflow_shared":
+            st.info(f"Reusing the PRD generated for the same requirements in another session (`{event['path']}`).")
+        elif kind == "iteration_started":
+            iterations[event["iteration"]] = {"prd": None, "review": None}
+        elif kind == "prd_saved":
+            iterations[event["iteration"]]["prd"] = event["content"]
+        elif kind == "review_completed":
+            iterations[event["iteration"]]["review"] = event["feedback"]
+            if event.get("stop_reason") == "converged":
+                st.info(f"Review scores stopped improving (score {event['score']:.1f}/10); "
+                        "keeping the best-scored PRD instead of revising again.")
+
+    running = snapshot["status"] == "running"
+    for number, iteration in iterations.items():
+        current = running and number == max(iterations)
+        with st.expander(f"Iteration {number}", expanded=current):
+            st.markdown("**PRD Draft:**")
+            prd = iteration["prd"] or (snapshot["partial"]["prd_chunk"] + " ▌" if current else "")
+            st.markdown(prd)
+            st.markdown("**Review Feedback:**")
+            review = iteration["review"] or (snapshot["partial"]["review_chunk"] + " ▌" if current else "")
+            st.markdown(review)
+
+
+def render_job_error(error: Exception):
+    """Shows why a background workflow failed."""
+    if isinstance(error, ValueError):
+        st.error(f"Configuration Error during orchestration: {error}. Please ensure OPENAI_API_KEY is set correctly.")
+    elif isinstance(error, OpenAIError):
+        st.error(f"OpenAI API Error during orchestration: {error}.")
+    elif isinstance(error, IOError):
+        st.error(f"File Saving Error during orchestration: {error}.")
+    else:
+        st.error(f"An unexpected error occurred during orchestration: {error}.")
+
+
+def watch_job(runner: JobRunner, job_id: str):
+    """
+    Polls a background job and re-renders its progress until it finishes, then shows
+    the final summary. A rerun interrupts only this polling loop, never the job itself;
+    the next run picks the job up again from st.session_state.
+    """
+    job = runner.get(job_id)
+    if job is None:
+        st.warning("The previous blueprint job is no longer available. Please generate it again.")
+        del st.session_state["job_id"]
+        return
+
+    progress_bar = st.progress(0.0)
+    body = st.empty()
+    while True:
+        snapshot = job.snapshot()
+        progress_bar.progress(snapshot["progress"],
+                              text=f"Job `{job_id}`: {snapshot['status']} ({snapshot['elapsed_s']:.0f}s)")
+        with body.container():
+            render_job_progress(snapshot)
+        if snapshot["status"] in ("completed", "failed"):
+            break
+        time.sleep(POLL_INTERVAL_S)
+
+    if snapshot["status"] == "completed":
+        st.success('✅ Orchestration Complete!')
+        render_performance_breakdown(snapshot["run_id"])
+    else:
+        render_job_error(snapshot["error"])
+
+    st.markdown("---")
+    st.subheader("Final Orchestration Summary:")
+
+    if snapshot["content"]:
+        st.markdown(
+            f"**Final PRD (Saved to: `{snapshot['path']}`):**")
+        st.markdown(snapshot["content"])
+    else:
+        st.warning(
+            "No PRD was successfully generated by the Orchestrator.")
+
+    st.markdown("---")
+    st.subheader("Your Original Input Summary:")
+    st.json(dict(zip(("Front End", "Middleware", "Backend", "Other Details"), job.inputs)))
+
+
+def render_performance_breakdown(run_id: str):
+    """
+    Shows where the time and money of one workflow run went: totals, per-iteration
+    timings and every LLM call with its latency, tokens, cost and cache status.
+    """
+    sink = get_instrumentation().find_sink(InMemoryAggregateSink)
+    if sink is None:
+        return
+    breakdown = sink.run_breakdown(run_id)
+    totals = breakdown["totals"]
+    with st.expander("⏱️ Performance Breakdown", expanded=False):
+        col_a, col_b, col_c, col_d = st.columns(4)
+        col_a.metric("Workflow Time", f"{totals['workflow_time_s']:.1f}s")
+        col_b.metric("LLM Calls", f"{totals['llm_calls']} ({totals['cache_hits']} cached)")
+        col_c.metric("Tokens", f"{totals['prompt_tokens'] + totals['completion_tokens']:,}")
+        col_d.metric("Est. Cost", f"${totals['cost_usd']:.4f}")
+        if breakdown["iterations"]:
+            st.markdown("**Iterations:**")
+            st.dataframe([{k: i[k] for k in ("iteration", "wall_time_s", "creator_s", "reviewer_s", "score", "satisfactory")}
+                          for i in breakdown["iterations"]])
+        if breakdown["calls"]:
+            st.markdown("**LLM Calls:**")
+            st.dataframe([{k: c[k] for k in ("agent", "model", "wall_time_s", "ttft_s", "prompt_tokens",
+                                             "completion_tokens", "cost_usd", "cache_status", "retries", "error")}
+                          for c in breakdown["calls"]])
+
 
 def main():
     # --- Page Configuration ---
@@ -143,61 +302,29 @@ def main():
                     "Please provide at least some details in the input fields.")
                 return  # Exit if no input
 
-            st.success(
-                '🎉 Requirements Submitted Successfully! PrecisionAI is now initiating multi-agent collaboration for your blueprint.')
-            st.info(
-                f"Starting iterative PRD generation and review for up to {MAX_ITERATIONS} rounds (handled by Orchestrator)...")
-
-            # Initialize the Orchestrator
+            # Initialize the background job runner (and its Orchestrator)
             try:
-                orchestrator = Orchestrator(
-                    max_review_iterations=MAX_ITERATIONS)
+                runner = get_job_runner(MAX_ITERATIONS)
             except Exception as e:
                 st.error(
                     f"Failed to initialize Orchestrator: {e}. Please check your environment setup (e.g., OPENAI_API_KEY).")
                 return
 
-            current_prd_content = None
-            saved_prd_filepath = None
-
-            try:
-                # Run the PRD workflow using the Orchestrator
-                with st.spinner('Orchestrating PRD generation and review... This may take a few moments.'):
-                    final_prd_content, final_prd_path = orchestrator.run_prd_workflow(
-                        front_end_reqs=user_input["Front End"],
-                        middleware_reqs=user_input["Middleware"],
-                        backend_reqs=user_input["Backend"],
-                        other_details=user_input["Other Details"]
-                    )
-                st.success('✅ Orchestration Complete!')
-                current_prd_content = final_prd_content
-                saved_prd_filepath = final_prd_path
-
-            except ValueError as ve:
-                st.error(
-                    f"Configuration Error during orchestration: {ve}. Please ensure OPENAI_API_KEY is set correctly.")
-            except OpenAIError as oe:
-                st.error(f"OpenAI API Error during orchestration: {oe}.")
-            except IOError as ioe:
-                st.error(f"File Saving Error during orchestration: {ioe}.")
-            except Exception as e:
-                st.error(
-                    f"An unexpected error occurred during orchestration: {e}.")
-
-            st.markdown("---")
-            st.subheader("Final Orchestration Summary:")
-
-            if current_prd_content:
-                st.markdown(
-                    f"**Final PRD (Saved to: `{saved_prd_filepath}`):**")
-                st.markdown(current_prd_content)
+            job = runner.submit(user_input["Front End"], user_input["Middleware"],
+                                user_input["Backend"], user_input["Other Details"])
+            st.session_state["job_id"] = job.job_id
+            if job.status == "completed":
+                st.success('⚡ These requirements were already blueprinted; showing the earlier result.')
             else:
-                st.warning(
-                    "No PRD was successfully generated by the Orchestrator.")
-
-            st.markdown("---")
-            st.subheader("Your Original Input Summary:")
-            st.json(user_input)
+                st.success(
+                    '🎉 Requirements Submitted Successfully! PrecisionAI is now initiating multi-agent collaboration for your blueprint.')
+                st.info(
+                    f"Starting iterative PRD generation and review for up to {MAX_ITERATIONS} rounds in the background. "
+                    "You can keep editing; the job continues and its progress is shown below.")
+
+    # Reruns keep showing the session's latest job instead of discarding it
+    if "job_id" in st.session_state:
+        watch_job(get_job_runner(MAX_ITERATIONS), st.session_state["job_id"])
 
 
 if __name__ == '__main__':
@@ -0,0 +1,7 @@
+# tests/conftest.py
+
+import os
+import sys
+
+# Make the Agents and src packages importable when pytest is run from anywhere
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
@@ -0,0 +1,89 @@
+# tests/test_api_server.py
+
+import http.client
+import json
+import threading
+
+import pytest
+
+from Agents.Fake_LLM import FakeLLMConfig, fake_agent_kwargs
+from Agents.Job_Runner import JobRunner
+from Agents.Orchestrator_Agent import Orchestrator
+from src.api_server import MAX_BODY_BYTES, create_server
+
+
+@pytest.fixture
+def server(tmp_path):
+    orchestrator = Orchestrator(max_review_iterations=1, agent_kwargs=fake_agent_kwargs(FakeLLMConfig(time_scale=0.0)),
+                                output_folder=str(tmp_path), use_checkpoints=False, near_duplicates="off",
+                                use_archive=False)
+    runner = JobRunner(orchestrator, max_workers=1)
+    server = create_server(runner, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    runner.shutdown()
+
+
+def _request(server, method: str, path: str, body: bytes = None, headers: dict = None) -> tuple:
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize("length", ["abc", "-5"])
+def test_malformed_content_length_is_rejected(server, length):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    try:
+        connection.putrequest("POST", "/workflows")
+        connection.putheader("Content-Length", length)
+        connection.endheaders()
+        response = connection.getresponse()
+        assert response.status == 400
+        assert "Content-Length" in json.loads(response.read())["error"]
+    finally:
+        connection.close()
+
+
+def test_oversized_body_is_rejected_unread(server):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+    try:
+        connection.putrequest("POST", "/workflows")
+        connection.putheader("Content-Length", str(MAX_BODY_BYTES + 1))
+        connection.endheaders()
+        assert connection.getresponse().status == 413
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize("body, message", [
+    (b"{not json", "not valid JSON"),
+    (b"\xff\xfe", "not valid JSON"),
+    (b'["React"]', "must be a JSON object"),
+    (b'{"front_end": 42}', "must be strings"),
+    (b'{"front_end": " ", "other": ""}', "at least one of"),
+    (b"", "at least one of"),
+])
+def test_invalid_submissions_are_rejected(server, body, message):
+    status, payload = _request(server, "POST", "/workflows", body, {"Content-Type": "application/json"})
+    assert status == 400
+    assert message in payload["error"]
+
+
+def test_non_numeric_wait_is_rejected(server):
+    status, job = _request(server, "POST", "/workflows", json.dumps({"front_end": "React"}).encode())
+    assert status in (200, 202)
+    assert _request(server, "GET", f"{job['status_url']}?wait=abc")[0] == 400
+    status, result = _request(server, "GET", f"{job['result_url']}?wait=30")
+    assert status == 200 and result["content"]
+
+
+def test_unknown_routes_are_not_found(server):
+    assert _request(server, "POST", "/jobs", b"{}")[0] == 404
+    assert _request(server, "GET", "/workflows/abc123")[0] == 404
@@ -0,0 +1,148 @@
+# tests/test_batch_api.py
+
+import json
+
+import pytest
+from openai import APIStatusError
+
+from Agents.Batch_API import BatchAPIBackend, BatchRequestError, batch_request_id
+from Agents.Fake_LLM import FakeBatchAPI, FakeLLMBackend, FakeLLMConfig
+
+MODEL = "gpt-4o-mini"
+
+
+def _echo(messages):
+    return f"answer to {messages[-1]['content']}"
+
+
+@pytest.fixture
+def api():
+    # time_scale 0 finishes every batch at its first status check
+    return FakeBatchAPI(FakeLLMBackend(FakeLLMConfig(time_scale=0, responder=_echo)), turnaround_s=1)
+
+
+def _backend(api, tmp_path, **options):
+    # Long collection and poll intervals: the tests drive flush() and poll() themselves
+    options.setdefault("max_resubmissions", 1)
+    return BatchAPIBackend(client=api, collect_window_s=3600, poll_interval_s=3600,
+                           db_path=str(tmp_path / "batch.sqlite3"), **options)
+
+
+def _submit(backend, prompt):
+    return backend.submit(model=MODEL, messages=[{"role": "user", "content": prompt}], max_tokens=50)
+
+
+def _request_id(prompt):
+    return batch_request_id({"model": MODEL, "messages": [{"role": "user", "content": prompt}], "max_tokens": 50})
+
+
+def _only_batch(api):
+    (batch_id,) = api._batches
+    return batch_id
+
+
+def _rewrite_output(api, batch_id, rewrite):
+    """Finishes a batch and replaces its output file lines with rewrite(lines)."""
+    file_id = api.retrieve_batch(batch_id).output_file_id
+    lines = api._files[file_id].decode("utf-8").splitlines()
+    api._files[file_id] = "".join(line + "\n" for line in rewrite(lines)).encode("utf-8")
+
+
+def test_submit_poll_and_settle(api, tmp_path):
+    backend = _backend(api, tmp_path)
+    futures = {prompt: _submit(backend, prompt) for prompt in ("one", "two", "three")}
+    _submit(backend, "one")  # an identical request shares its batch line
+    backend.flush()
+    assert backend.batches_submitted == 1 and backend.requests_submitted == 3
+    assert not any(future.done() for future in futures.values())
+
+    backend.poll()
+    for prompt, future in futures.items():
+        assert future.result(timeout=1).choices[0].message.content == f"answer to {prompt}"
+    assert backend.store.open_batches() == []
+    assert backend.store.counts()["requests"] == {}
+
+
+def test_expired_batch_resubmits_unanswered_requests(api, tmp_path):
+    api.expire_rate = 1.0  # the batch expires after answering the first half of its requests
+    backend = _backend(api, tmp_path)
+    futures = [_submit(backend, f"prompt {n}") for n in range(4)]
+    backend.flush()
+    backend.poll()
+    assert [future.done() for future in futures] == [True, True, False, False]
+
+    api.expire_rate = 0.0
+    backend.flush()
+    assert backend.batches_submitted == 2 and backend.requests_submitted == 6
+    backend.poll()
+    assert [future.result(timeout=1).choices[0].message.content for future in futures] == [
+        f"answer to prompt {n}" for n in range(4)]
+
+
+def test_failed_batch_fails_requests_after_max_resubmissions(api, tmp_path):
+    backend = _backend(api, tmp_path, max_resubmissions=0)
+    future = _submit(backend, "doomed")
+    backend.flush()
+    # The batch failed as a whole, without answering any of its requests
+    api._batches[_only_batch(api)].update(status="failed", output_file_id=None, error_file_id=None)
+    backend.poll()
+    with pytest.raises(BatchRequestError, match="'failed'"):
+        future.result(timeout=1)
+    assert backend.store.get_request(_request_id("doomed")) is None
+
+
+def test_malformed_result_lines_fail_only_their_requests(api, tmp_path):
+    backend = _backend(api, tmp_path, max_resubmissions=0)
+    futures = {prompt: _submit(backend, prompt) for prompt in ("good", "garbled", "no-id", "bad-response")}
+    backend.flush()
+
+    def corrupt(lines):
+        records = {json.loads(line)["custom_id"]: json.loads(line) for line in lines}
+        records[_request_id("bad-response")]["response"] = "not an object"
+        del records[_request_id("no-id")]["custom_id"]
+        good, bad_response, no_id = (records[_request_id(p)] for p in ("good", "bad-response", "no-id"))
+        return [json.dumps(good), "{ not json", json.dumps(no_id), json.dumps(bad_response)]
+
+    _rewrite_output(api, _only_batch(api), corrupt)
+    backend.poll()
+
+    assert futures["good"].result(timeout=1).choices[0].message.content == "answer to good"
+    with pytest.raises(APIStatusError) as error:
+        futures["bad-response"].result(timeout=1)
+    assert error.value.status_code == 500
+    # Lines without a readable custom_id leave their requests unanswered
+    for prompt in ("garbled", "no-id"):
+        with pytest.raises(BatchRequestError):
+            futures[prompt].result(timeout=1)
+
+
+def test_cancelled_batch_requeues_its_requests(api, tmp_path):
+    backend = _backend(api, tmp_path)
+    api.turnaround_s = 3600
+    api.backend.config.time_scale = 1
+    future = _submit(backend, "cancel me")
+    backend.flush()
+    api.batches.cancel(_only_batch(api))
+    backend.poll()
+    assert not future.done()
+    assert backend.store.get_request(_request_id("cancel me"))[0] == "queued"
+
+    api.backend.config.time_scale = 0
+    backend.flush()
+    backend.poll()
+    assert future.result(timeout=1).choices[0].message.content == "answer to cancel me"
+
+
+def test_answer_for_a_cancelled_call_is_kept_for_the_next_caller(api, tmp_path):
+    backend = _backend(api, tmp_path)
+    assert _submit(backend, "abandoned").cancel()
+    backend.flush()
+    backend.poll()
+    assert backend.store.get_request(_request_id("abandoned"))[0] == "completed"
+
+    # A restarted run is served from the store without submitting another batch
+    restarted = _backend(api, tmp_path)
+    future = _submit(restarted, "abandoned")
+    assert future.done() and future.result().choices[0].message.content == "answer to abandoned"
+    assert restarted.batches_submitted == 0
+    assert restarted.store.get_request(_request_id("abandoned")) is None
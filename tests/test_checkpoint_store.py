@@ -0,0 +1,110 @@
+# tests/test_checkpoint_store.py
+
+import contextlib
+import io
+
+import pytest
+
+from Agents.Checkpoint_Store import WorkflowCheckpointStore
+from Agents.Fake_LLM import FakeLLMBackend, FakeLLMConfig
+from Agents.Orchestrator_Agent import Orchestrator
+from Agents.Review_Verdict import ReviewVerdict
+
+INPUTS = ("React front end", "REST middleware", "Postgres backend", "Ship in Q3")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return WorkflowCheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+
+
+def _verdict(score: float) -> dict:
+    return ReviewVerdict(score, {"Introduction/Overview": score}, [("high", "Cross-Cutting", "Gap", "Fix it")]).to_dict()
+
+
+def _orchestrator(store, tmp_path, backend, max_review_iterations):
+    return Orchestrator(max_review_iterations=max_review_iterations, agent_kwargs=backend.agent_kwargs(),
+                        output_folder=str(tmp_path / "output"), checkpoint_store=store, near_duplicates="off",
+                        use_archive=False)
+
+
+def _backend():
+    return FakeLLMBackend(FakeLLMConfig(latency_s=0.0, latency_jitter=0.0, time_scale=0.0, satisfaction_rate=0.0))
+
+
+def test_state_tracks_the_last_step(store):
+    state = store.start_workflow("w", INPUTS)
+    assert (state.iteration, state.step, state.next_iteration) == (0, None, 1)
+
+    store.save_prd("w", 1, "PRD v1", "PRD_v1.md")
+    state = store.load("w")
+    assert (state.step, state.next_iteration, state.prd, state.previous_feedback) == ("prd", 1, "PRD v1", None)
+
+    store.save_review("w", 1, "Needs work", False, _verdict(6.0))
+    state = store.load("w")
+    assert (state.step, state.next_iteration, state.previous_feedback) == ("review", 2, "Needs work")
+    assert state.verdict["overall_score"] == 6.0
+    assert not state.is_finished(3) and state.is_finished(1)
+    assert store.find_resumable(INPUTS) == "w"
+
+
+def test_restarting_with_other_inputs_is_rejected(store):
+    store.start_workflow("w", INPUTS)
+    with pytest.raises(ValueError, match="different inputs"):
+        store.start_workflow("w", INPUTS[:3] + ("Ship in Q4",))
+
+
+def test_best_scored_iteration_is_restored(store):
+    store.start_workflow("w", INPUTS)
+    for iteration, score in ((1, 7.0), (2, 5.0), (3, 7.0)):
+        store.save_prd("w", iteration, f"PRD v{iteration}", f"PRD_v{iteration}.md")
+        store.save_review("w", iteration, "feedback", False, _verdict(score))
+    store.save_prd("w", 4, "PRD v4", "PRD_v4.md")
+    assert store.load("w").best == (7.0, 3, "PRD v3", "PRD_v3.md")  # the latest of equal scores
+
+
+def test_completed_workflow_returns_its_result_iteration(store):
+    store.start_workflow("w", INPUTS)
+    for iteration in (1, 2):
+        store.save_prd("w", iteration, f"PRD v{iteration}", f"PRD_v{iteration}.md")
+        store.save_review("w", iteration, "feedback", False)
+    store.mark_completed("w", result_iteration=1)
+    state = store.load("w")
+    assert (state.status, state.prd, state.prd_path) == ("completed", "PRD v1", "PRD_v1.md")
+    assert store.find_resumable(INPUTS) is None
+    assert store.find_completed(INPUTS).workflow_id == "w"
+
+
+def test_workflow_resumes_after_a_reviewed_iteration(store, tmp_path):
+    store.start_workflow("w", INPUTS)
+    store.save_prd("w", 1, "# PRD\n\n## 1. Introduction/Overview\nDraft.\n", "PRD_v1.md")
+    store.save_review("w", 1, "The introduction needs more detail.", False, _verdict(4.0))
+
+    backend = _backend()
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        _orchestrator(store, tmp_path, backend, 2).run_prd_workflow(*INPUTS, workflow_id="w")
+    assert "Resuming workflow w at iteration 2" in output.getvalue()
+    assert backend.calls == 2  # one revision and its review; iteration 1 is not redone
+    assert store.load("w").next_iteration == 3
+
+
+def test_checkpointed_prd_is_reviewed_without_regenerating_it(store, tmp_path):
+    store.start_workflow("w", INPUTS)
+    store.save_prd("w", 1, "# PRD\n\n## 1. Introduction/Overview\nDraft.\n", "PRD_v1.md")
+
+    backend = _backend()
+    with contextlib.redirect_stdout(io.StringIO()):
+        content, path = _orchestrator(store, tmp_path, backend, 1).run_prd_workflow(*INPUTS, workflow_id="w")
+    assert backend.calls == 1  # the review only
+    assert path == "PRD_v1.md" and "Draft." in content
+    assert store.load("w").status == "completed"
+
+
+def test_resumed_workflow_keeps_a_better_earlier_draft(store, tmp_path):
+    store.start_workflow("w", INPUTS)
+    store.save_prd("w", 1, "# PRD\n\n## 1. Introduction/Overview\nStrong draft.\n", "PRD_v1.md")
+    store.save_review("w", 1, "Nearly there.", False, _verdict(9.5))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        content, path = _orchestrator(store, tmp_path, _backend(), 2).run_prd_workflow(*INPUTS, workflow_id="w")
+    assert path == "PRD_v1.md" and "Strong draft." in content
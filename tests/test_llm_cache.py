@@ -0,0 +1,107 @@
+# tests/test_llm_cache.py
+
+import pytest
+
+from Agents import LLM_Cache
+from Agents.LLM_Cache import LLMCache, make_cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls time.time() as seen by the cache."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(LLM_Cache.time, "time", lambda: now[0])
+    return now
+
+
+def _disk_cache(tmp_path, **options) -> LLMCache:
+    return LLMCache(disk_path=str(tmp_path / "cache.sqlite3"), **options)
+
+
+def _disk_total(cache: LLMCache) -> int:
+    return cache._conn.execute("SELECT total FROM llm_cache_size").fetchone()[0]
+
+
+def _disk_keys(cache: LLMCache) -> set:
+    return {row[0] for row in cache._conn.execute("SELECT key FROM llm_cache")}
+
+
+def test_cache_key_covers_every_request_parameter():
+    messages = [{"role": "user", "content": "hi"}]
+    key = make_cache_key("gpt-4o", 0.7, 100, messages)
+    assert key == make_cache_key("gpt-4o", 0.7, 100, [dict(m) for m in messages])
+    assert key == make_cache_key("gpt-4o", 0.7, 100, messages, response_format=None)
+    assert len({key, make_cache_key("gpt-4o-mini", 0.7, 100, messages), make_cache_key("gpt-4o", 0.5, 100, messages),
+                make_cache_key("gpt-4o", 0.7, 200, messages),
+                make_cache_key("gpt-4o", 0.7, 100, messages, response_format={"type": "json_object"})}) == 5
+
+
+def test_entries_expire_after_the_ttl_in_both_tiers(tmp_path, clock):
+    cache = _disk_cache(tmp_path, ttl_seconds=60)
+    cache.set("k", "value")
+    clock[0] += 59
+    assert cache.get("k") == "value"
+
+    clock[0] += 2
+    assert cache.get("k") is None
+    assert _disk_keys(cache) == set()  # the expired row is purged on read
+
+    restarted = _disk_cache(tmp_path, ttl_seconds=60)
+    assert restarted.get("k") is None
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    _disk_cache(tmp_path).set("k", "value")
+    restarted = _disk_cache(tmp_path)
+    assert restarted.get("k") == "value"
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_memory_tier_evicts_least_recently_used(tmp_path):
+    cache = LLMCache(max_memory_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # 'b' is now the least recently used
+    cache.set("c", "3")
+    assert cache.get("b") is None and cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_tier_evicts_least_recently_accessed_beyond_max_bytes(tmp_path, clock):
+    cache = _disk_cache(tmp_path, max_memory_entries=1, max_disk_bytes=25)
+    for key in ("a", "b"):
+        cache.set(key, key * 10)
+        clock[0] += 1
+    assert cache.get("a") == "a" * 10  # read from disk: 'b' is now the least recently accessed
+    clock[0] += 1
+    cache.set("c", "c" * 10)
+    assert _disk_keys(cache) == {"a", "c"}
+    assert _disk_total(cache) == 20
+
+
+def test_running_disk_total_tracks_inserts_replacements_and_deletes(tmp_path, clock):
+    cache = _disk_cache(tmp_path, ttl_seconds=60)
+    cache.set("a", "x" * 10)
+    cache.set("b", "y" * 5)
+    cache.set("a", "z" * 3)  # replacement
+    assert _disk_total(cache) == 8
+    clock[0] += 61
+    cache.set("c", "w" * 4)  # purges the expired rows first
+    assert _disk_total(cache) == 4
+    cache.clear()
+    assert _disk_total(cache) == 0
+
+    # A file written without the running total is summed once on open
+    cache._conn.execute("INSERT INTO llm_cache VALUES ('d', 'dddd', 4, ?, ?)", (clock[0], clock[0]))
+    cache._conn.execute("UPDATE llm_cache_size SET total = 0")
+    cache._conn.commit()
+    assert _disk_total(_disk_cache(tmp_path, ttl_seconds=60)) == 4
+
+
+def test_peek_does_not_count_as_a_lookup(tmp_path):
+    cache = _disk_cache(tmp_path)
+    assert cache.peek("k") is None
+    cache.set("k", "value")
+    assert cache.peek("k") == "value"
+    stats = cache.stats()
+    assert stats["misses"] == stats["memory_hits"] == stats["disk_hits"] == 0 and stats["hit_rate"] == 0.0
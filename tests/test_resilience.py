@@ -0,0 +1,90 @@
+# tests/test_resilience.py
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from openai import APITimeoutError
+
+from Agents.Resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, RetryPolicy
+
+
+def _timeout_error():
+    return APITimeoutError(request=httpx.Request("POST", "https://example.invalid/v1/chat/completions"))
+
+
+def _tripped_caller() -> ResilientCaller:
+    """A caller whose 'model' circuit is open and lets a probe through immediately."""
+    caller = ResilientCaller(retry_policy=RetryPolicy(max_retries=0), failure_threshold=1, reset_timeout=0.0)
+
+    def fail(timeout):
+        raise _timeout_error()
+
+    with pytest.raises(APITimeoutError):
+        caller.call(fail, key="model", hedge=False)
+    return caller
+
+
+def test_breaker_lets_one_probe_through_after_the_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens_and_released_probe_frees_the_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.HALF_OPEN  # reset_timeout 0: open only for an instant
+    assert breaker.allow() and not breaker.allow()
+    breaker.release_probe()
+    assert breaker.allow()
+
+
+def test_interrupted_sync_probe_is_released():
+    caller = _tripped_caller()
+
+    def interrupted(timeout):
+        raise KeyboardInterrupt  # not an Exception: the attempt has no outcome
+
+    with pytest.raises(KeyboardInterrupt):
+        caller.call(interrupted, key="model", hedge=False)
+    assert caller.call(lambda timeout: "ok", key="model", hedge=False) == "ok"
+
+
+def test_cancelled_async_probe_is_released():
+    caller = _tripped_caller()
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def hang(timeout):
+            started.set()
+            await asyncio.sleep(3600)
+
+        async def answer(timeout):
+            return "ok"
+
+        probe = asyncio.create_task(caller.acall(hang, key="model", hedge=False))
+        await started.wait()
+        with pytest.raises(CircuitOpenError):
+            await caller.acall(answer, key="model", hedge=False)  # the probe is in flight
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        return await caller.acall(answer, key="model", hedge=False)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert caller.breaker("model").state == CircuitBreaker.CLOSED
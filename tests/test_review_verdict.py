@@ -0,0 +1,85 @@
+# tests/test_review_verdict.py
+
+import json
+
+import pytest
+
+from Agents.Review_Aspects import AspectReview
+from Agents.Review_Verdict import (VERDICT_MARKER, ReviewVerdict, parse_review_verdict, split_streamed_review,
+                                   verdict_from_aspect_reviews)
+
+VERDICT = {
+    "summary": "Solid overall.",
+    "overall_score": 8.5,
+    "ready_for_development": True,
+    "section_scores": [{"section": "Goals", "score": 9, "feedback": "Clear."},
+                       {"section": "Non-Goals", "score": 8}],
+    "issues": [{"severity": "low", "section": "Goals", "issue": "Wording", "recommendation": "Tighten it"},
+               {"severity": "medium", "section": "Cross-Cutting", "issue": "No metrics"}],
+}
+
+
+@pytest.mark.parametrize("response", [
+    json.dumps(VERDICT),
+    f"```json\n{json.dumps(VERDICT, indent=2)}\n```",
+    f"Here is my verdict:\n{json.dumps(VERDICT)}\nThanks!",
+])
+def test_verdict_is_found_in_the_response(response):
+    verdict = parse_review_verdict(response)
+    assert verdict.overall_score == 8.5 and verdict.ready
+    assert verdict.section_scores == {"Goals": 9.0, "Non-Goals": 8.0}
+    assert verdict.section_feedback == {"Goals": "Clear."}
+    assert [issue[0] for issue in verdict.issues] == ["medium", "low"]  # most severe first
+
+
+@pytest.mark.parametrize("response, message", [
+    ("The PRD looks fine.", "no JSON object"),
+    ("{'overall_score': 8}", "not valid JSON"),
+    ("[1, 2]", "no JSON object"),
+    ('{"summary": "No scores"}', "neither an overall score"),
+])
+def test_unusable_responses_raise(response, message):
+    with pytest.raises(ValueError, match=message):
+        parse_review_verdict(response)
+
+
+def test_from_dict_is_lenient():
+    verdict = ReviewVerdict.from_dict({
+        "section_scores": [{"section": "A", "score": 12}, {"section": "B", "score": 4}, {"section": "C"}, "junk"],
+        "issues": [{"severity": "Critical", "issue": "Vague"}, {"severity": "high"}, {"severity": "HIGH", "issue": "Gap"}],
+    })
+    assert verdict.section_scores == {"A": 10.0, "B": 4.0}  # clamped; entries without a score skipped
+    assert verdict.overall_score == 7.0  # mean of the section scores
+    assert verdict.issues == [("high", "Cross-Cutting", "Gap", ""), ("medium", "Cross-Cutting", "Vague", "")]
+    assert verdict.high_severity_count == 1
+    assert ReviewVerdict.from_dict({"overall_score": -3}).overall_score == 0.0
+
+
+def test_round_trip_and_satisfaction():
+    verdict = parse_review_verdict(json.dumps(VERDICT))
+    again = ReviewVerdict.from_dict(verdict.to_dict())
+    assert again.to_dict() == verdict.to_dict()
+    assert verdict.is_satisfactory(8.0) and not verdict.is_satisfactory(9.0)
+    blocked = ReviewVerdict(9.5, issues=[("high", "Goals", "Missing", "Add it")])
+    assert not blocked.is_satisfactory(8.0)
+
+
+def test_streamed_review_is_split_at_the_marker():
+    review, verdict = split_streamed_review(f"Review text.\n{VERDICT_MARKER}\n{json.dumps(VERDICT)}")
+    assert review == "Review text." and verdict.overall_score == 8.5
+    assert split_streamed_review("  Review only.  ") == ("Review only.", None)
+    assert split_streamed_review(f"Review text.\n{VERDICT_MARKER}\n{{truncated") == ("Review text.", None)
+
+
+def test_verdict_from_aspect_reviews_deducts_per_issue():
+    verdict = verdict_from_aspect_reviews([
+        AspectReview("completeness", "Mostly there.", issues=[("high", "No rollout plan"), ("low", "Typo")],
+                     recommendations=["Add a rollout plan"], section_title="Goals"),
+        AspectReview("clarity", "Clear.", section_title="Non-Goals"),
+        AspectReview("consistency", issues=[("medium", "Terms differ")]),
+    ])
+    assert verdict.section_scores == {"Goals": 6.5, "Non-Goals": 10.0}
+    assert verdict.overall_score == pytest.approx(8.25 - 1.5 / 3)
+    assert verdict.issues[0] == ("high", "Goals", "No rollout plan", "Add a rollout plan")
+    assert not verdict.ready
+    assert verdict_from_aspect_reviews([AspectReview("clarity")]).overall_score == 10.0
@@ -0,0 +1,63 @@
+# tests/test_workflow_benchmark.py
+
+import json
+import sys
+
+import pytest
+
+from Agents import Workflow_Benchmark
+from Agents.Fake_LLM import FakeLLMConfig
+from Agents.Workflow_Benchmark import compare_to_baseline, run_benchmark_case
+
+FAST = FakeLLMConfig(latency_s=0.05, latency_jitter=0.0, time_scale=0.01, satisfaction_rate=0.0)
+
+
+@pytest.fixture(scope="module")
+def result():
+    return run_benchmark_case(FAST, concurrency=2, iterations=1, workflows=2)
+
+
+def _scaled(result, throughput: float, latency: float) -> dict:
+    """A copy of result as if throughput and latency had been the given multiples of it."""
+    return dict(result, workflows_per_sec=result["workflows_per_sec"] * throughput,
+                p50_s=result["p50_s"] * latency, p99_s=result["p99_s"] * latency)
+
+
+def test_benchmark_case_runs_against_the_fake_backend(result):
+    assert result["errors"] == 0
+    assert result["llm_calls"] == 4  # one creator and one reviewer call per workflow
+    assert result["workflows_per_sec"] > 0 and result["p99_s"] >= result["p50_s"] > 0
+
+
+def test_compare_to_baseline_flags_only_regressions_beyond_the_tolerance(result):
+    assert compare_to_baseline([result], [result], 0.2) == []
+    assert compare_to_baseline([result], [_scaled(result, 0.5, 2.0)], 0.2) == []  # the run got faster
+
+    regressions = compare_to_baseline([result], [_scaled(result, 2.0, 0.5)], 0.2)
+    assert [message.split(" ")[0] for message in regressions] == ["workflows_per_sec", "p50_s", "p99_s"]
+    assert compare_to_baseline([result], [_scaled(result, 2.0, 0.5)], 1.5) == []
+
+    other_case = dict(_scaled(result, 2.0, 0.5), concurrency=result["concurrency"] + 1)
+    assert compare_to_baseline([result], [other_case], 0.2) == []  # no baseline for this case
+
+
+@pytest.mark.parametrize("throughput, latency, tolerance, regressed", [
+    (0.01, 100.0, 0.2, False),   # the baseline was far slower
+    (100.0, 0.01, 0.2, True),    # the baseline was far faster
+    (100.0, 0.01, 1000.0, False),  # ... but within a generous tolerance
+])
+def test_cli_baseline_check(result, tmp_path, monkeypatch, capsys, throughput, latency, tolerance, regressed):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps([_scaled(result, throughput, latency)]), encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", [
+        "Workflow_Benchmark.py", "--concurrency", "2", "--iterations", "1", "--workflows", "2",
+        "--latency", "0.05", "--jitter", "0", "--time-scale", "0.01",
+        "--baseline", str(baseline), "--tolerance", str(tolerance)])
+    if regressed:
+        with pytest.raises(SystemExit) as exit_info:
+            Workflow_Benchmark.main()
+        assert exit_info.value.code == 1
+        assert "Performance regressions against the baseline" in capsys.readouterr().out
+    else:
+        Workflow_Benchmark.main()
+        assert "No regressions against the baseline." in capsys.readouterr().out